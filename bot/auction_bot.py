@@ -4,31 +4,82 @@
 import asyncio
 import time
 import logging
-from playwright.async_api import async_playwright
 import os
 from datetime import datetime
 
-from utils.telegram_notifier import TelegramNotifier
+from utils.notification_outbox import create_notification_outbox
 from bot.ncalayer_client import NCALayerClient
+from bot.browser_session import BrowserSession
+from bot.dom_probe import DOMProbe
+from bot.dom_watcher import DOMWatcher
+from bot.network_detector import NetworkDetector
+from bot.bid_confirmation import BidConfirmation
+from bot.clock_sync import ClockSync, parse_start_time, sleep_until
+from bot.timer_parser import CountdownPredictor, parse_timer
+from bot.element_cache import ElementCache
+from bot.direct_submitter import BidOutcomeUnknown, DirectBidSubmitter
+from bot.connection_warmer import ConnectionWarmer, origin_of
+from bot.request_blocker import RequestBlocker
+from bot.screenshot_queue import ScreenshotQueue
 
 
 class AuctionBot:
     """Класс бота для автоматической подачи ставок на аукционе"""
     
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, ncalayer_client=None, screenshot_queue=None, notification_outbox=None):
         self.config_manager = config_manager
         self.config = config_manager.config
         self.setup_directories()
         self.setup_logging()
-        self.setup_notifiers()
-        self.ncalayer_client = NCALayerClient(self.config['ncalayer'])
+        self.setup_notifiers(notification_outbox)
+        # Клиент NCALayer может быть общим для нескольких лотов
+        self.owns_ncalayer_client = ncalayer_client is None
+        self.ncalayer_client = ncalayer_client or NCALayerClient(self.config['ncalayer'])
+        # Очередь скриншотов общая, чтобы ставка одного лота откладывала снимки всех
+        self.owns_screenshot_queue = screenshot_queue is None
+        self.screenshot_queue = screenshot_queue or ScreenshotQueue(self.config['logging'])
         
         self.browser = None
         self.page = None
         self.is_monitoring = False
+        # Сигнал остановки прерывает долгий сон до начала торгов
+        self.stop_requested = asyncio.Event()
         self.bid_submitted = False
+        # Ставка могла быть принята, но результат неизвестен: без повторов
+        self.bid_outcome_unknown = False
         self.start_time = None
         
+        # Единая точка срабатывания: опрос, MutationObserver и т.д.
+        self.auction_started = asyncio.Event()
+        self.trigger_source = None
+        self.detection_times = {}
+        self.dom_probe = DOMProbe(self.config['auction']['selectors'])
+        self.dom_watcher = None
+        self.network_detector = None
+        self.bid_confirmation = None
+        self.clock_sync = None
+        # Прогноз начала торгов в шкале time.monotonic и его погрешность (сек)
+        self.predicted_start = None
+        self.predicted_uncertainty = None
+        self.countdown_predictor = CountdownPredictor()
+        self.element_cache = None
+        
+        # Прямая подача ставки по HTTP (запись на репетиции и повтор)
+        direct_config = self.config['direct_http']
+        self.direct_submitter = None
+        if direct_config['enabled'] or direct_config['record']:
+            self.direct_submitter = DirectBidSubmitter(direct_config, self.config['auction']['price_limit'])
+        self.bid_path = None
+        self.connection_warmer = None
+        self.request_blocker = None
+        self.navigation_started = None
+        self.first_probe_pending = False
+        self.probe_failures = 0
+        # Внешний наблюдатель за срабатываниями (планировщик нескольких лотов)
+        self.on_trigger = None
+        # Реплика лота, подающая ставку в режиме избыточности
+        self.replica = None
+        
     def setup_directories(self):
         """Создание необходимых директорий"""
         os.makedirs(self.config['logging']['screenshots_path'], exist_ok=True)
@@ -52,74 +103,379 @@ class AuctionBot:
         self.logger.info(f"Лимит цены: {self.config['auction']['price_limit']:,}")
         self.logger.info(f"Telegram: {'Включен' if self.config['telegram']['enabled'] else 'Выключен'}")
     
-    def setup_notifiers(self):
-        """Настройка системы уведомлений"""
-        self.telegram_notifier = TelegramNotifier(self.config['telegram']) if self.config['telegram']['enabled'] else None
+    def setup_notifiers(self, notification_outbox=None):
+        """Настройка системы уведомлений
+        
+        Сообщения уходят в Telegram через очередь с фоновой отправкой;
+        несколько лотов используют одну очередь.
+        """
+        self.owns_notification_outbox = notification_outbox is None
+        if notification_outbox is None and self.config['telegram']['enabled']:
+            notification_outbox = create_notification_outbox(self.config['telegram'])
+        self.notification_outbox = notification_outbox
     
     async def send_notification(self, message):
-        """Отправка уведомлений"""
+        """Отправка уведомлений без ожидания сети"""
         self.logger.info(message)
         
-        if self.telegram_notifier:
-            try:
-                await self.telegram_notifier.send_message(message)
-            except Exception as e:
-                self.logger.error(f"Ошибка отправки Telegram: {e}")
+        if self.notification_outbox:
+            self.notification_outbox.post(message)
     
     async def start_monitoring(self):
         """Запуск мониторинга аукциона"""
         self.start_time = datetime.now()
         await self.send_notification(f"🚀 Мониторинг аукциона запущен\nВремя: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         
-        async with async_playwright() as p:
-            # Запуск браузера
-            self.browser = await p.chromium.launch(
-                headless=self.config['browser']['headless'],
-                args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-blink-features=AutomationControlled'
-                ]
-            )
+        # Запуск браузера или подключение к уже запущенному
+        self.browser = BrowserSession(self.config['browser'])
+        try:
+            await self.browser.start()
+            if self.owns_ncalayer_client:
+                await self.ncalayer_client.start()
             
-            # Создание страницы
-            self.page = await self.browser.new_page()
-            await self.page.set_viewport_size({"width": 1920, "height": 1080})
-            await self.page.set_extra_http_headers({
-                'User-Agent': self.config['browser']['user_agent']
-            })
+            # Блокировка картинок, шрифтов, аналитики и виджетов
+            await self.attach_request_blocker(self.browser.context)
             
-            # Переход на страницу аукциона
-            self.logger.info(f"Переход на страницу: {self.config['auction']['url']}")
-            await self.page.goto(
-                self.config['auction']['url'],
-                wait_until='networkidle',
-                timeout=self.config['browser']['timeout']
-            )
+            # Создание и подготовка страницы
+            await self.prepare_page(await self.browser.new_page())
             
             # Основной цикл мониторинга
             self.is_monitoring = True
+            await self.wait_for_scheduled_start()
             await self.monitoring_loop()
+        finally:
+            await self.cleanup()
+            await self.browser.close()
+    
+    async def attach_request_blocker(self, context):
+        """Подключение блокировки запросов к контексту браузера"""
+        request_blocker = RequestBlocker(self.config['browser']['block'])
+        if request_blocker.enabled:
+            self.request_blocker = request_blocker
+            await self.request_blocker.attach(context)
+    
+    async def prepare_page(self, page):
+        """Подготовка страницы лота: детекторы, навигация, кэш элементов"""
+        self.page = page
+        await self.page.set_viewport_size({"width": 1920, "height": 1080})
+        await self.page.set_extra_http_headers({
+            'User-Agent': self.config['browser']['user_agent']
+        })
+        
+        # Сетевой детектор подключается до перехода, чтобы не пропустить WebSocket
+        if self.config['auction']['network_triggers']:
+            self.network_detector = NetworkDetector(
+                self.config['auction']['network_triggers'],
+                self.trigger_auction_start
+            )
+            self.network_detector.attach(self.page)
+        
+        self.bid_confirmation = BidConfirmation(
+            self.config['auction']['selectors'],
+            self.config['auction']['confirm_triggers'],
+            self.config['auction']['confirm_timeout']
+        )
+        self.bid_confirmation.attach(self.page)
+        
+        if self.config['direct_http']['record']:
+            self.direct_submitter.attach_recorder(self.page)
+        
+        # Переход на страницу аукциона
+        await self.navigate()
+        
+        # Проба состояния регистрируется один раз на странице
+        await self.dom_probe.install(self.page)
+        
+        # Прямой HTTP-путь использует cookies сессии браузера
+        if self.config['direct_http']['enabled']:
+            await self.start_direct_submitter()
+        
+        # Прогрев соединений с площадкой и NCALayer
+        if self.config['prewarm']['enabled']:
+            self.setup_connection_warmer()
+        
+        # Кэш элементов конвейера ставки
+        self.element_cache = ElementCache(self.page, self.config['auction']['selectors'])
+        await self.element_cache.install()
+        await self.arm()
+        
+        # Push-детектор изменений DOM
+        if self.config['auction']['detection_mode'] == 'observer':
+            await self.install_dom_watcher()
+    
+    async def start_direct_submitter(self):
+        """Загрузка записанных запросов и открытие сессии прямой подачи"""
+        if not self.direct_submitter.load_recording():
+            self.logger.warning("Записанные запросы ставки не найдены, подача только через браузер")
+            return
+        await self.direct_submitter.start(self.page)
+        self.logger.info("Прямая подача ставки по HTTP подготовлена")
+    
+    async def navigate(self):
+        """Переход на страницу аукциона с выбранной стратегией готовности"""
+        readiness = self.config['browser']['readiness']
+        timeout = self.config['browser']['timeout']
+        self.logger.info(f"Переход на страницу: {self.config['auction']['url']}")
+        
+        self.navigation_started = time.perf_counter()
+        self.first_probe_pending = True
+        await self.page.goto(
+            self.config['auction']['url'],
+            wait_until='domcontentloaded' if readiness == 'selector' else readiness,
+            timeout=timeout
+        )
+        navigation_ms = (time.perf_counter() - self.navigation_started) * 1000
+        
+        if readiness == 'selector':
+            # Страница готова, как только появился любой из отслеживаемых элементов
+            selectors = self.config['auction']['selectors']
+            ready_selector = ', '.join(selectors[name] for name in ('timer', 'status', 'bid_button'))
+            try:
+                await self.page.wait_for_selector(ready_selector, state='attached', timeout=timeout)
+            except Exception as e:
+                self.logger.warning(f"Элементы аукциона не появились, мониторинг продолжается: {e}")
+        
+        ready_ms = (time.perf_counter() - self.navigation_started) * 1000
+        self.logger.info(f"Навигация: {navigation_ms:.0f} мс, страница готова через {ready_ms:.0f} мс")
+    
+    async def install_dom_watcher(self):
+        """Установка MutationObserver с откатом на опрос при ошибке"""
+        self.dom_watcher = DOMWatcher(self.on_dom_state)
+        try:
+            await self.dom_watcher.install(self.page)
+        except Exception as e:
+            self.logger.warning(f"MutationObserver недоступен, используется опрос: {e}")
+            self.dom_watcher = None
+    
+    def on_dom_state(self, state):
+        """Обработка состояния DOM, присланного MutationObserver"""
+        if self.evaluate_dom_state(state):
+            self.trigger_auction_start('observer')
+    
+    def trigger_auction_start(self, source):
+        """Фиксация начала торгов; побеждает первый сработавший источник"""
+        if source in self.detection_times:
+            return
+        self.detection_times[source] = time.perf_counter()
+        
+        if self.auction_started.is_set():
+            # Опоздавшие источники фиксируются для сравнения детекторов
+            lag = (self.detection_times[source] - self.detection_times[self.trigger_source]) * 1000
+            self.logger.info(f"Источник {source} отстал от {self.trigger_source} на {lag:.1f} мс")
+            return
+        
+        self.trigger_source = source
+        self.auction_started.set()
+        self.logger.info(f"Начало торгов обнаружено источником: {source}")
+        if self.on_trigger:
+            self.on_trigger(self)
+    
+    def reset_trigger(self):
+        """Сброс сигнала начала торгов для повторной попытки"""
+        self.auction_started.clear()
+        self.trigger_source = None
+        self.detection_times.clear()
+    
+    async def wait_for_auction_start(self, timeout):
+        """Ожидание сигнала начала торгов не дольше timeout секунд"""
+        try:
+            await asyncio.wait_for(self.auction_started.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def setup_connection_warmer(self):
+        """Регистрация соединений критического пути для прогрева"""
+        self.connection_warmer = ConnectionWarmer(self.config['prewarm'])
+        self.connection_warmer.add_page(self.page, self.config['auction']['url'])
+        self.connection_warmer.add_session(
+            'NCALayer',
+            self.ncalayer_client.get_session(),
+            self.ncalayer_client.base_url
+        )
+        if self.direct_submitter and self.direct_submitter.session:
+            self.connection_warmer.add_session(
+                'площадка (HTTP)',
+                self.direct_submitter.session,
+                origin_of(self.config['auction']['url'])
+            )
+        self.connection_warmer.start_keepalive()
+    
+    async def arm(self):
+        """Подготовка конвейера ставки: разрешение элементов заранее"""
+        try:
+            # Поле данных подписи площадка заполняет после нажатия ставки,
+            # поэтому оно не кэшируется заранее
+            await self.element_cache.arm(
+                ['bid_button', 'signature_input', 'confirm_button']
+            )
+            if self.direct_submitter and self.direct_submitter.session:
+                await self.direct_submitter.refresh_session(self.page)
+        except Exception as e:
+            self.logger.warning(f"Не удалось подготовить элементы: {e}")
+        
+        if self.connection_warmer:
+            await self.connection_warmer.warm_all()
+        
+        # Хранилище ключей расшифровывается заранее, а не при первой подписи
+        if self.config['ncalayer']['warm_up']:
+            await self.ncalayer_client.warm_up()
+        
+        # Задержка подписи вне бюджета - повод вмешаться до старта торгов
+        health = self.ncalayer_client.health
+        if health:
+            health.on_warning = self.send_notification
+            await health.check(force=True)
+    
+    async def sync_scheduled_start(self):
+        """Синхронизация часов и прогноз старта по auction.start_time
+
+        Возвращает момент старта по часам сервера или None, если он не задан.
+        """
+        clock_config = self.config['auction']['clock_sync']
+        start_time = self.config['auction']['start_time']
+        if not start_time or not clock_config['enabled']:
+            return None
+        
+        start_timestamp = parse_start_time(start_time)
+        if self.clock_sync is None:
+            self.clock_sync = ClockSync(clock_config, self.config['auction']['url'])
+        await self.clock_sync.synchronize()
+        self.update_predicted_start(
+            self.clock_sync.to_monotonic(start_timestamp),
+            self.clock_sync.uncertainty or 0
+        )
+        return start_timestamp
+    
+    async def wait_for_scheduled_start(self):
+        """Сон до T-минус-N по синхронизированным часам сервера
+
+        Сон прерывается stop_monitoring и сигналом начала торгов от
+        детекторов (start_time может быть задан неверно, например не в том
+        часовом поясе); подготовка к старту тогда не выполняется.
+        """
+        start_timestamp = await self.sync_scheduled_start()
+        if start_timestamp is None:
+            return
+        
+        wake_ahead = self.config['auction']['clock_sync']['wake_ahead'] / 1000
+        sleep_time = self.predicted_start - wake_ahead - time.monotonic()
+        if sleep_time > 0:
+            self.logger.info(f"Ожидание до начала торгов: пробуждение через {sleep_time:.1f} сек")
+            waiters = [
+                asyncio.ensure_future(self.stop_requested.wait()),
+                asyncio.ensure_future(self.auction_started.wait())
+            ]
+            try:
+                await asyncio.wait(waiters, timeout=sleep_time, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+            if self.stop_requested.is_set():
+                return
+            if self.auction_started.is_set():
+                self.logger.warning(
+                    f"Начало торгов обнаружено ({self.trigger_source}) раньше ожидаемого по start_time"
+                )
+                return
+            await self.prepare_for_start()
+    
+    async def prepare_for_start(self):
+        """Повторная синхронизация и подготовка элементов перед стартом
+
+        Подготовка (прогрев NCALayer и соединений) должна закончиться за
+        clock_sync.arm_margin до прогноза старта; не уложившаяся прерывается,
+        чтобы медленный NCALayer или хост площадки не задержали первую пробу.
+        """
+        # Повторная синхронизация компенсирует дрейф часов за время сна
+        self.predicted_uncertainty = None
+        await self.sync_scheduled_start()
+        
+        if self.predicted_start is None:
+            await self.arm()
+            return
+        arm_margin = self.config['auction']['clock_sync']['arm_margin'] / 1000
+        budget = self.predicted_start - arm_margin - time.monotonic()
+        if budget <= 0:
+            self.logger.warning("Подготовка к старту пропущена: до прогноза старта не осталось времени")
+            return
+        try:
+            await asyncio.wait_for(self.arm(), budget)
+        except asyncio.TimeoutError:
+            self.logger.warning(
+                f"Подготовка к старту не уложилась в {budget:.1f} сек и прервана, "
+                f"прогрев пропущен"
+            )
+    
+    def update_predicted_start(self, predicted_start, uncertainty):
+        """Принятие прогноза старта, если он точнее текущего
+
+        Прогноз, не пересекающийся с текущим, принимается независимо от
+        точности: площадка переставила или продлила отсчет, и прежний
+        момент старта больше не действует.
+        """
+        if self.predicted_uncertainty is not None and uncertainty > self.predicted_uncertainty:
+            moved = abs(predicted_start - self.predicted_start) > uncertainty + self.predicted_uncertainty
+            if not moved:
+                return
+            self.logger.info(
+                f"Отсчет до старта переставлен: прогноз сдвинут на "
+                f"{predicted_start - self.predicted_start:+.1f} сек"
+            )
+        self.predicted_start = predicted_start
+        self.predicted_uncertainty = uncertainty
+    
+    async def wait_for_next_probe(self, interval):
+        """Ожидание до следующей проверки с точным пробуждением к прогнозу старта"""
+        if self.predicted_start is not None:
+            clock_config = self.config['auction']['clock_sync']
+            remaining = self.predicted_start - time.monotonic()
+            if 0 < remaining <= interval:
+                # Финальная проба ровно в прогнозируемый момент
+                spin_window = clock_config['spin_window'] / 1000
+                if await self.wait_for_auction_start(max(remaining - spin_window, 0)):
+                    return True
+                await sleep_until(self.predicted_start, spin_window)
+                return self.auction_started.is_set()
+            if -clock_config['final_window'] / 1000 <= remaining <= 0:
+                # Частые пробы сразу после прогноза на случай его погрешности
+                interval = min(interval, clock_config['final_interval'] / 1000)
+        
+        return await self.wait_for_auction_start(interval)
     
     async def monitoring_loop(self):
         """Основной цикл мониторинга"""
         monitoring_start = time.time()
         
-        while self.is_monitoring and not self.bid_submitted:
+        # При работающем MutationObserver опрос остается только страховкой
+        if self.dom_watcher:
+            interval = self.config['auction']['fallback_interval'] / 1000
+        else:
+            interval = self.config['auction']['refresh_interval'] / 1000
+        
+        while self.is_monitoring and not self.bid_submitted and not self.bid_outcome_unknown:
             try:
                 # Проверка статуса аукциона
-                auction_started = await self.check_auction_status()
+                if not self.auction_started.is_set() and await self.check_auction_status():
+                    self.trigger_auction_start('polling')
                 
-                if auction_started and not self.bid_submitted:
+                # Ожидание сигнала до следующей проверки
+                if await self.wait_for_next_probe(interval):
                     await self.submit_bid()
+                    if not self.bid_submitted and not self.bid_outcome_unknown:
+                        # Повторная попытка после следующего обнаружения
+                        self.reset_trigger()
+                    continue
                 
                 # Проверка таймаута мониторинга (например, 1 час)
                 if time.time() - monitoring_start > 3600:
                     await self.send_notification("⏰ Мониторинг остановлен по таймауту (1 час)")
                     break
-                    
-                # Задержка между проверками
-                await asyncio.sleep(self.config['auction']['refresh_interval'] / 1000)
+                
+                # Восстановление: перезагрузка страницы после серии сбоев проверки
+                if self.probe_failures >= 3:
+                    self.probe_failures = 0
+                    await self.navigate()
                 
             except Exception as e:
                 self.logger.error(f"Ошибка в цикле мониторинга: {e}")
@@ -128,79 +484,80 @@ class AuctionBot:
     async def check_auction_status(self):
         """Проверка статуса аукциона"""
         try:
-            # Метод 1: Проверка активной кнопки ставки
-            bid_button = await self.page.query_selector(
-                self.config['auction']['selectors']['bid_button']
-            )
-            
-            if bid_button and await bid_button.is_enabled():
-                self.logger.info("🎯 Обнаружена активная кнопка ставки!")
-                return True
-            
-            # Метод 2: Проверка таймера
-            timer_element = await self.page.query_selector(
-                self.config['auction']['selectors']['timer']
-            )
-            if timer_element:
-                timer_text = await timer_element.text_content()
-                if self.is_timer_expired(timer_text):
-                    self.logger.info("⏰ Таймер истек - начало торгов!")
-                    return True
-            
-            # Метод 3: Проверка статуса
-            status_element = await self.page.query_selector(
-                self.config['auction']['selectors']['status']
-            )
-            if status_element:
-                status_text = await status_element.text_content()
-                if "начался" in status_text.lower() or "старт" in status_text.lower():
-                    self.logger.info("📢 Объявлено начало торгов!")
-                    return True
-                    
-            return False
+            # Кнопка, таймер и статус читаются одной пробой за один round trip
+            state = await self.dom_probe.probe()
+            self.probe_failures = 0
+            if self.first_probe_pending:
+                self.first_probe_pending = False
+                first_probe_ms = (time.perf_counter() - self.navigation_started) * 1000
+                self.logger.info(f"Первая проверка статуса через {first_probe_ms:.0f} мс после начала навигации")
+            return self.evaluate_dom_state(state or {})
             
         except Exception as e:
             self.logger.error(f"Ошибка проверки статуса аукциона: {e}")
+            self.probe_failures += 1
             return False
     
-    def is_timer_expired(self, timer_text):
-        """Проверка истечения таймера"""
-        if not timer_text:
-            return False
-            
-        timer_text = timer_text.strip().lower()
+    def evaluate_dom_state(self, state):
+        """Определение начала торгов по состоянию кнопки, таймера и статуса"""
+        if state.get('button_enabled'):
+            self.logger.info("🎯 Обнаружена активная кнопка ставки!")
+            return True
         
-        # Проверка различных форматов таймера
-        expired_indicators = [
-            "00:00:00", "00:00", "0:00", 
-            "время вышло", "таймер истек", "завершено",
-            "start", "начало"
-        ]
+        reading = parse_timer(state.get('timer_text'))
+        if reading is not None and reading.remaining_ms <= 0:
+            self.logger.info("⏰ Таймер истек - начало торгов!")
+            return True
+        if reading is not None:
+            self.countdown_predictor.add_reading(reading)
+            self.update_predicted_start(
+                self.countdown_predictor.predicted_start,
+                self.countdown_predictor.uncertainty
+            )
+        
+        if self.is_status_started(state.get('status_text')):
+            self.logger.info("📢 Объявлено начало торгов!")
+            return True
+        
+        return False
+    
+    def is_status_started(self, status_text):
+        """Проверка текста статуса на объявление начала торгов"""
+        if not status_text:
+            return False
         
-        return any(indicator in timer_text for indicator in expired_indicators)
+        status_text = status_text.lower()
+        return "начался" in status_text or "старт" in status_text
+    
+    def is_timer_expired(self, timer_text):
+        """Проверка истечения таймера"""
+        reading = parse_timer(timer_text)
+        return reading is not None and reading.remaining_ms <= 0
     
     async def submit_bid(self):
         """Подача ставки +1 шаг"""
         bid_start_time = time.time()
         
         try:
-            await self.send_notification("⚡ Начало торгов! Подача ставки...")
-            
-            # Скриншот перед подачей
-            await self.take_screenshot("before_bid")
-            
-            # Нажатие кнопки подачи ставки
-            await self.page.click(
-                self.config['auction']['selectors']['bid_button'],
-                timeout=5000
-            )
-            self.logger.info("✅ Кнопка ставки нажата")
-            
-            # Обработка подписи
-            await self.handle_signature_process()
-            
-            # Подтверждение ставки
-            confirmation_success = await self.confirm_bid()
+            # До подтверждения ставки скриншоты не снимаются
+            with self.screenshot_queue.critical_section():
+                await self.send_notification("⚡ Начало торгов! Подача ставки...")
+                
+                if await self.submit_bid_direct():
+                    self.bid_path = 'http'
+                    confirmation_success = True
+                else:
+                    self.bid_path = 'browser'
+                    
+                    # Нажатие кнопки подачи ставки
+                    await self.element_cache.click('bid_button', timeout=5000)
+                    self.logger.info("✅ Кнопка ставки нажата")
+                    
+                    # Обработка подписи
+                    await self.handle_signature_process()
+                    
+                    # Подтверждение ставки
+                    confirmation_success = await self.confirm_bid()
             
             if confirmation_success:
                 self.bid_submitted = True
@@ -209,38 +566,51 @@ class AuctionBot:
                 success_message = (
                     f"✅ Ставка успешно подана!\n"
                     f"⏱ Время реакции: {bid_time:.2f} мс\n"
+                    f"📡 Источник сигнала: {self.trigger_source}\n"
+                    f"🛣 Способ подачи: {self.bid_path}\n"
                     f"🏁 Общее время мониторинга: {(datetime.now() - self.start_time).total_seconds():.1f} сек"
                 )
                 
+                self.take_screenshot("bid_success")
                 await self.send_notification(success_message)
-                await self.take_screenshot("bid_success")
                 
                 # Запись в лог
                 self.log_bid_result(success=True, reaction_time=bid_time)
             else:
                 raise Exception("Не удалось подтвердить ставку")
                 
+        except BidOutcomeUnknown as e:
+            # Повтор мог бы подать ставку второй раз: решение за пользователем
+            self.bid_outcome_unknown = True
+            self.logger.error(f"Результат ставки неизвестен: {e}")
+            self.take_screenshot("bid_unknown")
+            await self.send_notification(
+                f"❓ Результат ставки неизвестен: {e}\n"
+                f"Автоматические повторы остановлены, проверьте лот вручную"
+            )
+            self.log_bid_result(success=False, error=str(e))
         except Exception as e:
             error_message = f"❌ Ошибка подачи ставки: {e}"
             self.logger.error(error_message)
+            self.take_screenshot("bid_error")
             await self.send_notification(error_message)
-            await self.take_screenshot("bid_error")
             self.log_bid_result(success=False, error=str(e))
     
+    async def submit_bid_direct(self):
+        """Подача ставки повтором записанных HTTP-запросов"""
+        if not self.direct_submitter or not self.direct_submitter.session:
+            return False
+        
+        submitted = await self.direct_submitter.submit(self.ncalayer_client.sign_data)
+        if not submitted:
+            self.logger.warning("Прямая подача не удалась, подача через браузер")
+        return submitted
+    
     async def handle_signature_process(self):
         """Обработка процесса подписи через NCALayer"""
         try:
-            # Ожидание появления формы подписи
-            await self.page.wait_for_selector(
-                self.config['auction']['selectors']['sign_data'],
-                timeout=10000
-            )
-            
-            # Получение данных для подписи
-            sign_data_element = await self.page.query_selector(
-                self.config['auction']['selectors']['sign_data']
-            )
-            sign_data = await sign_data_element.get_attribute('value')
+            # Ожидание появления формы подписи и получение данных для подписи
+            sign_data = await self.element_cache.get_value('sign_data', timeout=10000)
             
             if not sign_data:
                 raise Exception("Данные для подписи не найдены")
@@ -254,10 +624,7 @@ class AuctionBot:
                 raise Exception("Не удалось получить подпись от NCALayer")
             
             # Ввод подписи в форму
-            await self.page.fill(
-                self.config['auction']['selectors']['signature_input'],
-                signature
-            )
+            await self.element_cache.fill('signature_input', signature)
             
             self.logger.info("✅ Подпись успешно применена")
             
@@ -266,36 +633,30 @@ class AuctionBot:
             raise
     
     async def confirm_bid(self):
-        """Подтверждение ставки после подписи"""
+        """Подтверждение ставки после подписи
+        
+        Результат известен, как только площадка его показала или прислала
+        (см. BidConfirmation), а не после фиксированной паузы.
+        """
         try:
-            # Здесь должна быть логика подтверждения ставки
-            # Зависит от конкретной площадки
+            async def click_confirm():
+                if await self.element_cache.get('confirm_button'):
+                    await self.element_cache.click('confirm_button', timeout=5000)
             
-            # Пример: нажатие кнопки подтверждения
-            confirm_button = await self.page.query_selector('button[type="submit"]')
-            if confirm_button:
-                await confirm_button.click()
-                await self.page.wait_for_timeout(3000)  # Ожидание обработки
-                
-            # Проверка успешности
-            success_indicator = await self.page.query_selector('.success-message, .bid-confirmed')
-            return success_indicator is not None
+            success, source, elapsed_ms = await self.bid_confirmation.confirm(click_confirm)
+            if success:
+                self.logger.info(f"Ставка подтверждена ({source}) за {elapsed_ms:.0f} мс")
+            else:
+                self.logger.warning(f"Ставка не подтверждена ({source}) за {elapsed_ms:.0f} мс")
+            return success
             
         except Exception as e:
             self.logger.error(f"Ошибка подтверждения ставки: {e}")
             return False
     
-    async def take_screenshot(self, name):
-        """Создание скриншота"""
-        if self.config['logging']['screenshots']:
-            try:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-                filename = f"{name}_{timestamp}.png"
-                path = os.path.join(self.config['logging']['screenshots_path'], filename)
-                await self.page.screenshot(path=path)
-                self.logger.debug(f"Скриншот сохранен: {path}")
-            except Exception as e:
-                self.logger.error(f"Ошибка создания скриншота: {e}")
+    def take_screenshot(self, name):
+        """Постановка скриншота в фоновую очередь"""
+        self.screenshot_queue.capture(self.page, name)
     
     def log_bid_result(self, success=True, reaction_time=None, error=None):
         """Логирование результата подачи ставки"""
@@ -304,6 +665,9 @@ class AuctionBot:
             'success': success,
             'reaction_time_ms': reaction_time,
             'error': error,
+            'trigger_source': self.trigger_source,
+            'bid_path': self.bid_path,
+            'replica': self.replica,
             'url': self.config['auction']['url'],
             'price_limit': self.config['auction']['price_limit']
         }
@@ -316,7 +680,26 @@ class AuctionBot:
     async def stop_monitoring(self):
         """Остановка мониторинга"""
         self.is_monitoring = False
+        self.stop_requested.set()
+        # Сообщение ставится в очередь до ее закрытия в cleanup
+        await self.send_notification("🛑 Мониторинг остановлен")
+        await self.cleanup()
         if self.browser:
             await self.browser.close()
-        
-        await self.send_notification("🛑 Мониторинг остановлен")
+    
+    async def cleanup(self):
+        """Закрытие вспомогательных сессий"""
+        if self.request_blocker:
+            self.request_blocker.log_summary()
+        if self.connection_warmer:
+            await self.connection_warmer.stop()
+        if self.element_cache:
+            await self.element_cache.close()
+        if self.direct_submitter:
+            await self.direct_submitter.close()
+        if self.owns_ncalayer_client:
+            await self.ncalayer_client.close()
+        if self.owns_screenshot_queue:
+            await self.screenshot_queue.close()
+        if self.owns_notification_outbox and self.notification_outbox:
+            await self.notification_outbox.close()
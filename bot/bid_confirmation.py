@@ -0,0 +1,158 @@
+"""
+Подтверждение ставки по событиям страницы вместо фиксированного ожидания
+"""
+import asyncio
+import logging
+import time
+
+from bot.network_detector import NetworkMatcher
+
+
+# Элементы результата, видимые до нажатия (остатки прошлых действий и
+# скрытые контейнеры формы), помечаются и в расчет не берутся
+MARK_SEEN_SCRIPT = """
+(selectors) => {
+    const visible = (element) => element.getClientRects().length > 0
+        && getComputedStyle(element).visibility !== 'hidden';
+    for (const element of document.querySelectorAll('[data-auction-bot-seen]')) {
+        element.removeAttribute('data-auction-bot-seen');
+    }
+    for (const selector of selectors) {
+        for (const element of document.querySelectorAll(selector)) {
+            if (visible(element)) {
+                element.setAttribute('data-auction-bot-seen', '');
+            }
+        }
+    }
+}
+"""
+
+# Есть ли видимый элемент результата, появившийся после нажатия
+FRESH_VISIBLE_SCRIPT = """
+(selector) => Array.from(document.querySelectorAll(selector)).some(
+    (element) => !element.hasAttribute('data-auction-bot-seen')
+        && element.getClientRects().length > 0
+        && getComputedStyle(element).visibility !== 'hidden'
+)
+"""
+
+
+class BidConfirmation:
+    """Гонка признаков результата ставки
+
+    Результат определяется тем, что наступит первым: появление после
+    нажатия видимого элемента успеха (selectors.bid_success) или ошибки
+    (selectors.bid_error), ответ площадки по правилам
+    auction.confirm_triggers или истечение auction.confirm_timeout.
+    Правила записываются как network_triggers, с дополнительным полем
+    outcome: success или error.
+    """
+
+    def __init__(self, selectors, rules, timeout):
+        self.success_selector = selectors['bid_success']
+        self.error_selector = selectors['bid_error']
+        self.matchers = [
+            (NetworkMatcher(rule), rule.get('outcome', 'success') == 'success')
+            for rule in rules
+        ]
+        self.timeout = timeout
+        self.page = None
+        # Ожидаемый результат: (успех, источник); None вне подтверждения
+        self.pending = None
+        self.logger = logging.getLogger(__name__)
+
+    def attach(self, page):
+        """Подписка на сетевые события до перехода, чтобы не пропустить WebSocket"""
+        self.page = page
+        if any(m.source == 'websocket' for m, _ in self.matchers):
+            page.on('websocket', self._on_websocket)
+        if any(m.source == 'response' for m, _ in self.matchers):
+            page.on('response', self._on_response)
+
+    def _on_websocket(self, websocket):
+        """Подписка на кадры подходящего WebSocket"""
+        matchers = [
+            (m, success) for m, success in self.matchers
+            if m.source == 'websocket' and m.matches_url(websocket.url)
+        ]
+        if matchers:
+            websocket.on('framereceived', lambda payload: self._check(matchers, payload, 'websocket'))
+
+    async def _on_response(self, response):
+        """Проверка тела подходящего ответа во время подтверждения"""
+        if self.pending is None:
+            return
+        matchers = [
+            (m, success) for m, success in self.matchers
+            if m.source == 'response' and m.matches_url(response.url)
+        ]
+        if not matchers:
+            return
+
+        try:
+            body = await response.text()
+        except Exception as e:
+            self.logger.debug(f"Не удалось прочитать ответ {response.url}: {e}")
+            return
+        self._check(matchers, body, 'response')
+
+    def _check(self, matchers, payload, source):
+        """Сравнение содержимого с правилами и фиксация результата"""
+        if self.pending is None or self.pending.done():
+            return
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8', errors='ignore')
+
+        for matcher, success in matchers:
+            if matcher.matches_payload(payload):
+                self.pending.set_result((success, source))
+                return
+
+    async def _wait_selector(self, selector, success):
+        """Появление видимого элемента результата после нажатия"""
+        await self.page.wait_for_function(
+            FRESH_VISIBLE_SCRIPT, arg=selector, polling='mutation', timeout=self.timeout
+        )
+        return success, 'selector'
+
+    async def confirm(self, action=None):
+        """Выполнение action (нажатие подтверждения) и ожидание результата
+
+        Возвращает (успех, источник, длительность в мс). Источник 'timeout'
+        означает, что до истечения срока признаков не было; тогда успех
+        определяется разовой проверкой нового элемента успеха.
+        """
+        start = time.perf_counter()
+        # Ответ на нажатие может прийти раньше, чем завершится click()
+        self.pending = asyncio.get_running_loop().create_future()
+        tasks = []
+        try:
+            await self.page.evaluate(MARK_SEEN_SCRIPT, [self.success_selector, self.error_selector])
+            if action:
+                await action()
+            tasks = [
+                asyncio.ensure_future(self._wait_selector(self.success_selector, True)),
+                asyncio.ensure_future(self._wait_selector(self.error_selector, False))
+            ]
+            pending = {self.pending, *tasks}
+            deadline = start + self.timeout / 1000
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(deadline - time.perf_counter(), 0),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        success, source = task.result()
+                        return success, source, (time.perf_counter() - start) * 1000
+
+            success = await self.page.evaluate(FRESH_VISIBLE_SCRIPT, self.success_selector)
+            return success, 'timeout', (time.perf_counter() - start) * 1000
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            self.pending = None
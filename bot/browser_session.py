@@ -0,0 +1,117 @@
+"""
+Управление браузером: запуск, постоянный профиль или подключение по CDP
+"""
+import logging
+import os
+import subprocess
+import time
+import urllib.parse
+
+from playwright.async_api import async_playwright
+
+
+LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled'
+]
+
+
+class BrowserSession:
+    """Браузер и контекст, в которых работают страницы бота
+
+    Режимы (browser.mode):
+      launch     - новый Chromium на каждый запуск (холодный профиль)
+      persistent - Chromium с постоянным каталогом профиля (кэш и сессии сохраняются)
+      cdp        - подключение к уже запущенному Chromium; браузер переживает перезапуски бота
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.mode = config['mode']
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages = []
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self):
+        """Запуск или подключение к браузеру"""
+        started = time.perf_counter()
+        self.playwright = await async_playwright().start()
+        chromium = self.playwright.chromium
+
+        if self.mode == 'cdp':
+            self.browser = await chromium.connect_over_cdp(self.config['cdp_url'])
+            if self.browser.contexts:
+                self.context = self.browser.contexts[0]
+            else:
+                self.context = await self.browser.new_context()
+        elif self.mode == 'persistent':
+            self.context = await chromium.launch_persistent_context(
+                self.config['user_data_dir'],
+                headless=self.config['headless'],
+                args=LAUNCH_ARGS
+            )
+        else:
+            self.browser = await chromium.launch(
+                headless=self.config['headless'],
+                args=LAUNCH_ARGS
+            )
+            self.context = await self.browser.new_context()
+
+        startup_ms = (time.perf_counter() - started) * 1000
+        self.logger.info(f"Браузер готов ({self.mode}) за {startup_ms:.0f} мс")
+
+    async def new_page(self):
+        """Новая вкладка в общем контексте"""
+        page = await self.context.new_page()
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        """Закрытие браузера; при CDP закрываются только вкладки бота"""
+        try:
+            if self.mode == 'cdp':
+                for page in self.pages:
+                    if not page.is_closed():
+                        await page.close()
+            elif self.mode == 'persistent' and self.context:
+                await self.context.close()
+            elif self.browser:
+                await self.browser.close()
+        except Exception as e:
+            self.logger.debug(f"Ошибка закрытия браузера: {e}")
+        finally:
+            self.pages = []
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
+
+    @staticmethod
+    def launch_server(config):
+        """Запуск долгоживущего Chromium для подключения по CDP"""
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            executable = p.chromium.executable_path
+
+        port = urllib.parse.urlsplit(config['cdp_url']).port or 9222
+        user_data_dir = os.path.abspath(config['user_data_dir'])
+        args = [
+            executable,
+            f'--remote-debugging-port={port}',
+            f'--user-data-dir={user_data_dir}',
+            '--no-first-run',
+            '--no-default-browser-check'
+        ] + LAUNCH_ARGS
+        if config['headless']:
+            args.append('--headless=new')
+
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
+        return process.pid, port
@@ -0,0 +1,106 @@
+"""
+Синхронизация с часами сервера аукциона и точное ожидание момента старта
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+
+async def sleep_until(deadline, spin_window=0.03):
+    """Ожидание момента deadline (time.monotonic) с высокой точностью
+
+    Основная часть интервала проходит в обычном sleep, последние
+    spin_window секунд - в плотном цикле, не зависящем от разрешения таймера ОС.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining > spin_window:
+        await asyncio.sleep(remaining - spin_window)
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0)
+
+
+def parse_start_time(value):
+    """Разбор времени начала торгов (ISO 8601; без зоны - локальное время)"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+class ClockSync:
+    """Оценка смещения часов сервера по заголовкам Date в стиле NTP
+
+    Заголовок Date имеет точность в одну секунду, поэтому каждый замер
+    задает интервал допустимых смещений. Пересечение интервалов от замеров,
+    разнесенных по фазе внутри секунды, сужает оценку до долей секунды.
+    """
+
+    def __init__(self, config, url):
+        self.config = config
+        self.url = url
+        self.offset = 0.0
+        self.uncertainty = None
+        self.rtt = None
+        self.logger = logging.getLogger(__name__)
+
+    async def synchronize(self):
+        """Серия замеров и пересчет смещения часов сервера"""
+        samples = self.config['samples']
+        low, high = float('-inf'), float('inf')
+        best = None
+
+        async with aiohttp.ClientSession() as session:
+            for i in range(samples):
+                sample = await self._sample(session)
+                if sample:
+                    sample_low, sample_high, rtt = sample
+                    if best is None or rtt < best[2]:
+                        best = sample
+                    if sample_low > high or sample_high < low:
+                        # Противоречивые замеры: доверяем самому быстрому
+                        low, high = best[0], best[1]
+                    else:
+                        low, high = max(low, sample_low), min(high, sample_high)
+                if i < samples - 1:
+                    # Равномерный сдвиг фазы замеров внутри секунды
+                    await asyncio.sleep(1 / samples)
+
+        if best is None:
+            self.logger.warning("Не удалось синхронизировать часы с сервером, используется локальное время")
+            return self.offset
+
+        self.offset = (low + high) / 2
+        self.uncertainty = (high - low) / 2
+        self.rtt = best[2]
+        self.logger.info(
+            f"Часы сервера: смещение {self.offset * 1000:+.1f} мс "
+            f"(±{self.uncertainty * 1000:.1f} мс), RTT {self.rtt * 1000:.1f} мс"
+        )
+        return self.offset
+
+    async def _sample(self, session):
+        """Один замер: границы смещения и время запроса-ответа"""
+        try:
+            t0 = time.time()
+            async with session.head(self.url, allow_redirects=False) as response:
+                t1 = time.time()
+                date_header = response.headers.get('Date')
+            if not date_header:
+                return None
+            server_second = parsedate_to_datetime(date_header).timestamp()
+            # Сервер сформировал ответ в [t0, t1], его часы показывали [D, D + 1)
+            return server_second - t1, server_second + 1 - t0, t1 - t0
+        except Exception as e:
+            self.logger.debug(f"Замер времени сервера не удался: {e}")
+            return None
+
+    def server_time(self):
+        """Текущее время по часам сервера"""
+        return time.time() + self.offset
+
+    def to_monotonic(self, server_timestamp):
+        """Перевод момента по часам сервера в шкалу time.monotonic"""
+        return time.monotonic() + (server_timestamp - self.server_time())
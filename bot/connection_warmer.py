@@ -0,0 +1,147 @@
+"""
+Прогрев соединений с площадкой и NCALayer перед началом торгов
+"""
+import asyncio
+import logging
+import time
+import urllib.parse
+
+import aiohttp
+
+
+# Замер установки соединения браузером по Resource Timing API
+BROWSER_WARM_SCRIPT = """
+async (url) => {
+    const started = performance.now();
+    try {
+        await fetch(url, {method: 'HEAD', cache: 'no-store', credentials: 'include'});
+    } catch (e) {
+        return null;
+    }
+    const entries = performance.getEntriesByName(url).filter(e => e.startTime >= started);
+    const entry = entries[entries.length - 1];
+    if (!entry) {
+        return null;
+    }
+    return {
+        dns: entry.domainLookupEnd - entry.domainLookupStart,
+        connect: entry.connectEnd - entry.connectStart,
+        tls: entry.secureConnectionStart > 0 ? entry.connectEnd - entry.secureConnectionStart : 0,
+        total: entry.responseEnd - entry.startTime
+    };
+}
+"""
+
+
+def make_connector():
+    """Коннектор с закрепленным DNS и долгоживущими keep-alive соединениями"""
+    return aiohttp.TCPConnector(ttl_dns_cache=None, keepalive_timeout=300)
+
+
+def origin_of(url):
+    """Корень сайта для прогревочных запросов"""
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+class ConnectionWarmer:
+    """Прогрев и поддержание теплыми соединений критического пути"""
+
+    def __init__(self, config):
+        self.config = config
+        self.page = None
+        self.page_url = None
+        self.sessions = {}
+        self.keepalive_task = None
+        self.logger = logging.getLogger(__name__)
+
+    def add_page(self, page, url):
+        """Соединение браузера с площадкой"""
+        self.page = page
+        self.page_url = origin_of(url)
+
+    def add_session(self, name, session, url):
+        """Постоянная aiohttp-сессия (прямая подача, NCALayer)"""
+        self.sessions[name] = (session, url)
+
+    async def warm_all(self):
+        """Прогрев всех зарегистрированных соединений с отчетом о выигрыше"""
+        if self.page:
+            await self.warm_browser()
+        for name, (session, url) in self.sessions.items():
+            await self.warm_session(name, session, url)
+
+    async def warm_browser(self):
+        """Прогрев соединения браузера с площадкой"""
+        try:
+            timing = await self.page.evaluate(BROWSER_WARM_SCRIPT, self.page_url)
+        except Exception as e:
+            self.logger.debug(f"Прогрев браузера не удался: {e}")
+            return
+        if not timing:
+            return
+        handshake = timing['dns'] + timing['connect']
+        if handshake > 0:
+            self.logger.info(
+                f"Прогрев браузера: DNS {timing['dns']:.1f} мс, TCP+TLS {timing['connect']:.1f} мс "
+                f"(TLS {timing['tls']:.1f} мс) сэкономлено к моменту старта"
+            )
+        else:
+            self.logger.debug("Прогрев браузера: соединение уже было теплым")
+
+    async def warm_session(self, name, session, url):
+        """Прогрев aiohttp-сессии: холодный и теплый запрос для оценки выигрыша"""
+        try:
+            parts = urllib.parse.urlsplit(url)
+            port = parts.port or (443 if parts.scheme == 'https' else 80)
+            dns_start = time.perf_counter()
+            await asyncio.get_running_loop().getaddrinfo(parts.hostname, port)
+            dns_ms = (time.perf_counter() - dns_start) * 1000
+
+            cold_ms = await self._timed_request(session, url)
+            warm_ms = await self._timed_request(session, url)
+            self.logger.info(
+                f"Прогрев {name}: DNS {dns_ms:.1f} мс, холодный запрос {cold_ms:.1f} мс, "
+                f"теплый {warm_ms:.1f} мс, сэкономлено {max(cold_ms - warm_ms, 0):.1f} мс"
+            )
+            return cold_ms - warm_ms
+        except Exception as e:
+            self.logger.debug(f"Прогрев {name} не удался: {e}")
+            return None
+
+    async def _timed_request(self, session, url):
+        """Длительность одного HEAD-запроса, мс"""
+        start = time.perf_counter()
+        async with session.head(url, allow_redirects=False) as response:
+            await response.read()
+        return (time.perf_counter() - start) * 1000
+
+    def start_keepalive(self):
+        """Фоновое поддержание соединений теплыми"""
+        if self.keepalive_task is None:
+            self.keepalive_task = asyncio.ensure_future(self._keepalive_loop())
+
+    async def _keepalive_loop(self):
+        """Периодические легкие запросы, чтобы соединения не закрывались"""
+        while True:
+            await asyncio.sleep(self.config['keepalive_interval'])
+            if self.page:
+                try:
+                    await self.page.evaluate(BROWSER_WARM_SCRIPT, self.page_url)
+                except Exception as e:
+                    self.logger.debug(f"Поддержание соединения браузера: {e}")
+            for name, (session, url) in self.sessions.items():
+                try:
+                    await self._timed_request(session, url)
+                except Exception as e:
+                    self.logger.debug(f"Поддержание соединения {name}: {e}")
+
+    async def stop(self):
+        """Остановка фонового поддержания"""
+        if self.keepalive_task:
+            self.keepalive_task.cancel()
+            try:
+                await self.keepalive_task
+            except asyncio.CancelledError:
+                pass
+            self.keepalive_task = None
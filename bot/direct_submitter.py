@@ -0,0 +1,250 @@
+"""
+Прямая подача ставки по HTTP повтором запросов, записанных в браузере
+"""
+import json
+import logging
+import os
+import re
+import time
+import urllib.parse
+
+import aiohttp
+
+from bot.connection_warmer import make_connector
+from bot.network_detector import extract_json_path, parse_json_payload
+
+
+# Заголовки, которые aiohttp формирует сам или берет из cookies контекста
+SKIPPED_HEADERS = {'cookie', 'content-length', 'host', 'connection', 'accept-encoding'}
+
+# Заголовки и cookies с CSRF-токеном сессии
+CSRF_NAME = re.compile(r'csrf|xsrf', re.IGNORECASE)
+
+CSRF_META_SCRIPT = """
+() => {
+    const meta = document.querySelector('meta[name*="csrf" i], meta[name*="xsrf" i]');
+    return meta ? meta.content : null;
+}
+"""
+
+
+class BidOutcomeUnknown(Exception):
+    """Запрос ставки отправлен, но принят ли он - неизвестно"""
+
+
+def set_json_path(data, path, value):
+    """Запись значения по пути вида 'payload.signature'"""
+    parts = re.findall(r'[^.\[\]]+', path)
+    target = data
+    for part in parts[:-1]:
+        target = target[int(part)] if isinstance(target, list) else target.setdefault(part, {})
+    if isinstance(target, list):
+        target[int(parts[-1])] = value
+    else:
+        target[parts[-1]] = value
+
+
+class DirectBidSubmitter:
+    """Запись запросов ставки на репетиции и их повтор через aiohttp"""
+
+    def __init__(self, config, price_limit):
+        self.config = config
+        self.price_limit = price_limit
+        self.recording = {}
+        self.session = None
+        self.cookie_header = ''
+        # Актуальные значения записанных CSRF-заголовков
+        self.token_headers = {}
+        self.logger = logging.getLogger(__name__)
+
+    # --- Репетиция: запись запросов площадки ---
+
+    def attach_recorder(self, page):
+        """Запись запросов ставки и подтверждения, отправленных браузером"""
+        page.on('requestfinished', self._record_request)
+        self.logger.info("Запись запросов ставки включена (репетиция)")
+
+    async def _record_request(self, request):
+        """Сохранение подходящего запроса в файл записи"""
+        for kind in ('bid', 'confirm'):
+            pattern = self.config[f'{kind}_url']
+            if pattern and re.search(pattern, request.url):
+                headers = await request.all_headers()
+                self.recording[kind] = {
+                    'method': request.method,
+                    'url': request.url,
+                    'headers': {
+                        name: value for name, value in headers.items()
+                        if not name.startswith(':') and name.lower() not in SKIPPED_HEADERS
+                    },
+                    'body': request.post_data
+                }
+                self.save_recording()
+                self.logger.info(f"Записан запрос {kind}: {request.method} {request.url}")
+
+    def save_recording(self):
+        """Сохранение записанных запросов"""
+        with open(self.config['recording_file'], 'w', encoding='utf-8') as f:
+            json.dump(self.recording, f, ensure_ascii=False, indent=2)
+
+    def load_recording(self):
+        """Загрузка записанных запросов"""
+        if not os.path.exists(self.config['recording_file']):
+            return False
+        with open(self.config['recording_file'], 'r', encoding='utf-8') as f:
+            self.recording = json.load(f)
+        return self.is_ready()
+
+    def is_ready(self):
+        """Есть ли все необходимое для прямой подачи"""
+        return (
+            'bid' in self.recording
+            and 'confirm' in self.recording
+            and bool(self.config['sign_data_path'])
+        )
+
+    # --- Боевой режим: повтор запросов ---
+
+    async def start(self, page):
+        """Открытие постоянной keep-alive сессии и загрузка cookies браузера"""
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=make_connector(),
+                cookie_jar=aiohttp.DummyCookieJar()
+            )
+        await self.refresh_session(page)
+
+    async def refresh_session(self, page):
+        """Копирование cookies и CSRF-токена сессии браузера для адреса ставки
+
+        Токен для записанных CSRF-заголовков берется из cookie (XSRF-TOKEN,
+        csrftoken) или из meta-тега страницы.
+        """
+        cookies = await page.context.cookies([self.recording['bid']['url']])
+        self.cookie_header = '; '.join(f"{c['name']}={c['value']}" for c in cookies)
+
+        names = {
+            name for kind in ('bid', 'confirm')
+            for name in self.recording[kind]['headers'] if CSRF_NAME.search(name)
+        }
+        if not names:
+            return
+        token = next(
+            (urllib.parse.unquote(c['value']) for c in cookies if CSRF_NAME.search(c['name'])),
+            None
+        )
+        if token is None:
+            token = await page.evaluate(CSRF_META_SCRIPT)
+        if token:
+            self.token_headers = {name: token for name in names}
+        else:
+            self.logger.warning("CSRF-токен на странице не найден, используются записанные заголовки")
+
+    async def close(self):
+        """Закрытие HTTP-сессии"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def _send(self, recorded, body):
+        """Отправка записанного запроса с актуальными cookies"""
+        headers = dict(recorded['headers'])
+        headers.update((name, value) for name, value in self.token_headers.items() if name in headers)
+        if self.cookie_header:
+            headers['Cookie'] = self.cookie_header
+        async with self.session.request(
+            recorded['method'],
+            recorded['url'],
+            data=body.encode('utf-8') if body is not None else None,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.config['timeout'] / 1000)
+        ) as response:
+            return response.status, await response.text()
+
+    def recorded_amount(self):
+        """Сумма ставки в записанном запросе по direct_http.amount_path; None - не найдена"""
+        recorded = self.recording['bid']
+        body = recorded.get('body') or ''
+        path = self.config['amount_path']
+        if not path or not body:
+            return None
+
+        if 'json' in recorded['headers'].get('content-type', ''):
+            data = parse_json_payload(body)
+            value = extract_json_path(data, path) if data is not None else None
+        else:
+            value = (urllib.parse.parse_qs(body).get(path) or [None])[0]
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def build_confirm_body(self, signature):
+        """Подстановка подписи в тело запроса подтверждения"""
+        recorded = self.recording['confirm']
+        body = recorded.get('body') or ''
+        field = self.config['signature_field']
+        content_type = recorded['headers'].get('content-type', '')
+
+        if 'json' in content_type:
+            data = json.loads(body) if body else {}
+            set_json_path(data, field, signature)
+            return json.dumps(data, ensure_ascii=False)
+
+        data = urllib.parse.parse_qs(body, keep_blank_values=True)
+        data[field] = [signature]
+        return urllib.parse.urlencode(data, doseq=True)
+
+    async def submit(self, sign):
+        """Прямая подача ставки; sign - корутина подписи данных
+
+        Возвращает False, только если запрос ставки точно не принят: он не
+        отправлялся (сумма неизвестна или выше лимита, соединение не
+        установлено) или площадка ответила ошибкой. Тогда можно безопасно
+        перейти к подаче через браузер. Таймаут и разрыв после отправки
+        запроса ставки или подтверждения пробрасываются как BidOutcomeUnknown:
+        ставка могла быть принята, любой повтор подал бы ее дважды.
+        """
+        amount = self.recorded_amount()
+        if amount is None or amount > self.price_limit:
+            self.logger.warning(
+                f"Записанная сумма ставки {amount if amount is not None else 'неизвестна'}, "
+                f"лимит {self.price_limit}: прямая подача отменена"
+            )
+            return False
+
+        start = time.perf_counter()
+        try:
+            status, text = await self._send(self.recording['bid'], self.recording['bid'].get('body'))
+        except (aiohttp.ClientConnectorError, aiohttp.InvalidURL) as e:
+            self.logger.warning(f"Прямой запрос ставки не отправлен: {e}")
+            return False
+        except Exception as e:
+            raise BidOutcomeUnknown(f"Результат прямого запроса ставки неизвестен: {e!r}") from e
+        if not 200 <= status < 300:
+            self.logger.warning(f"Прямой запрос ставки отклонен: {status}")
+            return False
+        bid_ms = (time.perf_counter() - start) * 1000
+
+        data = parse_json_payload(text)
+        sign_data = extract_json_path(data, self.config['sign_data_path']) if data is not None else None
+        if not sign_data:
+            raise Exception("Данные для подписи не найдены в ответе на ставку")
+
+        signature = await sign(str(sign_data))
+        if not signature:
+            raise Exception("Не удалось получить подпись от NCALayer")
+
+        try:
+            status, text = await self._send(self.recording['confirm'], self.build_confirm_body(signature))
+        except (aiohttp.ClientConnectorError, aiohttp.InvalidURL):
+            raise
+        except Exception as e:
+            raise BidOutcomeUnknown(f"Результат прямого подтверждения ставки неизвестен: {e!r}") from e
+        success_contains = self.config['success_contains']
+        if not 200 <= status < 300 or (success_contains and success_contains not in text):
+            raise Exception(f"Подтверждение ставки отклонено: {status}")
+
+        total_ms = (time.perf_counter() - start) * 1000
+        self.logger.info(f"Ставка подана напрямую по HTTP: запрос {bid_ms:.1f} мс, всего {total_ms:.1f} мс")
+        return True
@@ -0,0 +1,62 @@
+"""
+Пакетная проверка состояния аукциона за один вызов к странице
+"""
+import json
+import logging
+
+
+# Функция-проба регистрируется в странице один раз и за один проход
+# читает кнопку ставки, таймер и статус по заданным селекторам
+PROBE_SCRIPT = """
+(selectors) => {
+    window.__PROBE__ = () => {
+        const button = document.querySelector(selectors.bid_button);
+        const timer = document.querySelector(selectors.timer);
+        const status = document.querySelector(selectors.status);
+        return {
+            button_enabled: !!button && !button.disabled,
+            timer_text: timer ? timer.textContent : null,
+            status_text: status ? status.textContent : null
+        };
+    };
+}
+"""
+
+
+class DOMProbe:
+    """Однократная регистрация и вызов пробы состояния DOM"""
+
+    FUNCTION_NAME = '__auctionBotProbe'
+
+    def __init__(self, selectors):
+        self.selectors = selectors
+        self.page = None
+        self.script = self.build_script()
+        self.call_expression = f"() => window.{self.FUNCTION_NAME} ? window.{self.FUNCTION_NAME}() : null"
+        self.logger = logging.getLogger(__name__)
+
+    def build_script(self):
+        """Сборка скрипта регистрации пробы с подставленными селекторами"""
+        script = PROBE_SCRIPT.replace('__PROBE__', self.FUNCTION_NAME)
+        selectors = {
+            'bid_button': self.selectors['bid_button'],
+            'timer': self.selectors['timer'],
+            'status': self.selectors['status']
+        }
+        return f"({script})({json.dumps(selectors)})"
+
+    async def install(self, page):
+        """Регистрация пробы на текущем и всех последующих документах"""
+        self.page = page
+        await page.add_init_script(self.script)
+        await page.evaluate(self.script)
+        self.logger.debug("Проба состояния DOM зарегистрирована")
+
+    async def probe(self):
+        """Чтение состояния кнопки, таймера и статуса за один round trip"""
+        state = await self.page.evaluate(self.call_expression)
+        if state is None:
+            # Документ заменен до выполнения init-скрипта: регистрируем заново
+            await self.page.evaluate(self.script)
+            state = await self.page.evaluate(self.call_expression)
+        return state
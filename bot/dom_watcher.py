@@ -0,0 +1,85 @@
+"""
+Push-детектор начала торгов на основе MutationObserver
+"""
+import logging
+
+from bot.dom_probe import DOMProbe
+
+
+# Скрипт выполняется в странице: следит за изменениями DOM и сообщает
+# в Python результат пробы состояния при каждом изменении.
+# Проба (bot.dom_probe) должна быть зарегистрирована раньше наблюдателя.
+WATCHER_SCRIPT = """
+() => {
+    if (window !== window.top || window.__auctionBotWatcher) {
+        return;
+    }
+    window.__auctionBotWatcher = true;
+
+    let lastState = null;
+    let scheduled = false;
+
+    const flush = () => {
+        scheduled = false;
+        if (!window.__PROBE__) {
+            return;
+        }
+        const state = window.__PROBE__();
+        const key = JSON.stringify(state);
+        if (key === lastState) {
+            return;
+        }
+        lastState = key;
+        window.__BINDING__(state);
+    };
+
+    const schedule = () => {
+        if (!scheduled) {
+            scheduled = true;
+            queueMicrotask(flush);
+        }
+    };
+
+    new MutationObserver(schedule).observe(document, {
+        subtree: true,
+        childList: true,
+        attributes: true,
+        characterData: true
+    });
+    schedule();
+}
+"""
+
+
+class DOMWatcher:
+    """Установка MutationObserver и доставка изменений DOM в Python"""
+
+    BINDING_NAME = '__auctionBotNotify'
+
+    def __init__(self, on_state):
+        self.on_state = on_state
+        self.installed = False
+        self.logger = logging.getLogger(__name__)
+
+    def build_script(self):
+        """Сборка скрипта наблюдателя"""
+        script = WATCHER_SCRIPT.replace('__BINDING__', self.BINDING_NAME)
+        script = script.replace('__PROBE__', DOMProbe.FUNCTION_NAME)
+        return f"({script})()"
+
+    async def install(self, page):
+        """Установка наблюдателя на текущий и все последующие документы страницы"""
+        script = self.build_script()
+        await page.expose_binding(self.BINDING_NAME, self._handle_binding)
+        # init-скрипт переустанавливает наблюдатель после каждой навигации
+        await page.add_init_script(script)
+        await page.evaluate(script)
+        self.installed = True
+        self.logger.info("MutationObserver установлен на странице")
+
+    def _handle_binding(self, source, state):
+        """Обработка уведомления из страницы"""
+        try:
+            self.on_state(state)
+        except Exception as e:
+            self.logger.error(f"Ошибка обработки изменения DOM: {e}")
@@ -0,0 +1,187 @@
+"""
+Кэш заранее разрешенных элементов для конвейера подачи ставки
+"""
+import asyncio
+import logging
+import re
+
+
+# Отслеживание замены закэшированных элементов: при удалении узла из DOM
+# страница сообщает в Python имя элемента, и кэш сбрасывает его
+ARMED_TRACKER_SCRIPT = """
+() => {
+    if (window.__auctionBotArmed) {
+        return;
+    }
+    window.__auctionBotArmed = {};
+    new MutationObserver(() => {
+        for (const [name, element] of Object.entries(window.__auctionBotArmed)) {
+            if (!element.isConnected) {
+                delete window.__auctionBotArmed[name];
+                window.__BINDING__(name);
+            }
+        }
+    }).observe(document, {subtree: true, childList: true});
+}
+"""
+
+REGISTER_SCRIPT = "(element, name) => { window.__auctionBotArmed[name] = element; }"
+
+# Значение поля, которое площадка заполняет после нажатия ставки
+FILLED_VALUE_SCRIPT = """
+(selector) => {
+    const element = document.querySelector(selector);
+    if (!element || !element.value || element.getClientRects().length === 0) {
+        return null;
+    }
+    return element.value;
+}
+"""
+
+# Псевдокласс ожидания активности не мешает найти кнопку заранее
+DISABLED_FILTER = re.compile(r':not\(\[disabled\]\)')
+
+
+class ElementCache:
+    """Разрешение и кэширование элементов до начала торгов"""
+
+    BINDING_NAME = '__auctionBotDetached'
+
+    def __init__(self, page, selectors):
+        self.page = page
+        self.selectors = selectors
+        self.handles = {}
+        self.armed_names = []
+        # Фоновые повторные разрешения элементов
+        self.tasks = set()
+        self.logger = logging.getLogger(__name__)
+        self.tracker_script = ARMED_TRACKER_SCRIPT.replace('__BINDING__', self.BINDING_NAME)
+
+    async def install(self):
+        """Подписка на навигацию и замену элементов"""
+        await self.page.expose_binding(self.BINDING_NAME, self._on_detached)
+        self.page.on('framenavigated', self._on_navigated)
+        self.page.on('domcontentloaded', lambda page: self._schedule_rearm(self.armed_names))
+
+    def arm_selector(self, name):
+        """Селектор для разрешения элемента до его активации"""
+        return DISABLED_FILTER.sub('', self.selectors[name])
+
+    async def arm(self, names):
+        """Разрешение и кэширование элементов; отсутствующие разрешаются позже"""
+        self.armed_names = list(names)
+        await self.page.evaluate(f"({self.tracker_script})()")
+        resolved = []
+        for name in names:
+            if await self._resolve(name):
+                resolved.append(name)
+        self.logger.info(f"Элементы подготовлены: {', '.join(resolved) or 'нет'}")
+        return resolved
+
+    async def _resolve(self, name):
+        """Поиск элемента и регистрация его в отслеживании замены"""
+        handle = await self.page.query_selector(self.arm_selector(name))
+        if not handle:
+            return None
+        await handle.evaluate(REGISTER_SCRIPT, name)
+        self.handles[name] = handle
+        return handle
+
+    def invalidate(self, name=None):
+        """Сброс одного или всех закэшированных элементов"""
+        if name is None:
+            self.handles.clear()
+        else:
+            self.handles.pop(name, None)
+
+    def _on_navigated(self, frame):
+        """Навигация основного фрейма: сброс элементов, оставшихся в старом документе
+
+        Навигация внутри документа (history API, якорь) элементы не заменяет.
+        """
+        if frame == self.page.main_frame:
+            self._schedule_rearm(list(self.handles))
+
+    async def _is_connected(self, handle):
+        """Находится ли элемент в текущем документе"""
+        try:
+            return await handle.evaluate("element => element.isConnected")
+        except Exception:
+            return False
+
+    def _on_detached(self, source, name):
+        """Элемент удален из DOM: сброс и повторное разрешение в фоне"""
+        self.invalidate(name)
+        self._schedule_rearm([name])
+
+    def _schedule_rearm(self, names):
+        """Фоновое повторное разрешение элементов"""
+        if names:
+            task = asyncio.ensure_future(self._rearm(names))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _rearm(self, names):
+        """Повторное разрешение после навигации или замены DOM"""
+        try:
+            for name in names:
+                handle = self.handles.get(name)
+                if handle and not await self._is_connected(handle):
+                    self.invalidate(name)
+            await self.page.evaluate(f"({self.tracker_script})()")
+            for name in names:
+                if name not in self.handles and name in self.armed_names:
+                    await self._resolve(name)
+        except Exception as e:
+            self.logger.debug(f"Повторная подготовка элементов не удалась: {e}")
+
+    async def get(self, name, timeout=None):
+        """Закэшированный элемент или ожидание его появления"""
+        handle = self.handles.get(name)
+        if handle:
+            return handle
+        if timeout is None:
+            handle = await self.page.query_selector(self.selectors[name])
+        else:
+            handle = await self.page.wait_for_selector(self.selectors[name], timeout=timeout)
+        if handle:
+            self.handles[name] = handle
+        return handle
+
+    async def get_value(self, name, timeout):
+        """Ожидание видимого поля с непустым значением"""
+        result = await self.page.wait_for_function(
+            FILLED_VALUE_SCRIPT, arg=self.selectors[name], timeout=timeout
+        )
+        return await result.json_value()
+
+    async def close(self):
+        """Отмена фоновых повторных разрешений"""
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def click(self, name, timeout):
+        """Нажатие на элемент; при устаревшем элементе - повтор по селектору"""
+        handle = self.handles.get(name)
+        if handle:
+            try:
+                await handle.click(timeout=timeout)
+                return
+            except Exception as e:
+                self.logger.debug(f"Закэшированный элемент {name} устарел: {e}")
+                self.invalidate(name)
+        await self.page.click(self.selectors[name], timeout=timeout)
+
+    async def fill(self, name, value):
+        """Заполнение поля; при устаревшем элементе - повтор по селектору"""
+        handle = self.handles.get(name)
+        if handle:
+            try:
+                await handle.fill(value)
+                return
+            except Exception as e:
+                self.logger.debug(f"Закэшированный элемент {name} устарел: {e}")
+                self.invalidate(name)
+        await self.page.fill(self.selectors[name], value)
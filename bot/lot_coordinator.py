@@ -0,0 +1,317 @@
+"""
+Распределение лотов по процессам-воркерам с контролем их состояния
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import time
+
+from bot.multi_lot import FINISHED_STATES, MultiLotEngine
+
+
+# Лоты, которые можно переносить между воркерами без риска пропустить старт:
+# страница еще загружается или прогноз старта дальше wake_ahead. Лот в
+# watching прогноза не имеет и может открыться в любой момент
+MOVABLE_STATES = ('loading', 'waiting')
+
+# Лоты у старта или в подаче ставки: перезапуск их воркера грозит повторной
+# ставкой или пропуском старта, пока новый воркер загружает страницу
+CRITICAL_STATES = ('final', 'bidding', 'standby')
+
+
+class LotWorker:
+    """Процесс-воркер: свой браузер и MultiLotEngine, связь с координатором через очереди"""
+
+    def __init__(self, worker_id, config_manager, commands, events):
+        self.worker_id = worker_id
+        self.config_manager = config_manager
+        self.settings = config_manager.config['sharding']
+        self.commands = commands
+        self.events = events
+        self.engine = None
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self):
+        """Работа движка, прием команд и отправка пульса"""
+        browser_config = self.config_manager.config['browser']
+        if browser_config['mode'] == 'persistent':
+            # Каталог профиля Chromium не может использоваться двумя процессами
+            browser_config['user_data_dir'] = f"{browser_config['user_data_dir']}_{self.worker_id}"
+
+        # Лоты воркеру назначает координатор командами add
+        self.config_manager.config['lots'] = []
+        self.engine = MultiLotEngine(self.config_manager, persistent=True)
+        engine_task = asyncio.ensure_future(self.engine.run())
+        command_task = asyncio.ensure_future(self._command_loop())
+        heartbeat_task = asyncio.ensure_future(self._heartbeat_loop())
+        try:
+            await asyncio.wait([engine_task, command_task], return_when=asyncio.FIRST_COMPLETED)
+            if engine_task.done():
+                # Сбой браузера: процесс завершается, координатор передаст лоты
+                engine_task.result()
+        finally:
+            heartbeat_task.cancel()
+            command_task.cancel()
+            self.engine.stop()
+            await asyncio.gather(engine_task, command_task, return_exceptions=True)
+
+    def _next_command(self):
+        """Ожидание команды с таймаутом, чтобы поток не блокировал выход"""
+        try:
+            return self.commands.get(timeout=1)
+        except queue.Empty:
+            return None
+
+    async def _command_loop(self):
+        """Команды координатора: add, remove, stop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self._next_command)
+            if message is None:
+                continue
+            command, payload = message
+            if command == 'stop':
+                return
+            if command == 'add':
+                self.engine.add_lot(payload)
+            elif command == 'remove':
+                await self.engine.remove_lot(payload)
+
+    async def _heartbeat_loop(self):
+        """Пульс с задержкой event loop и метриками лотов"""
+        interval = self.settings['heartbeat_interval'] / 1000
+        while True:
+            sleep_start = time.monotonic()
+            await asyncio.sleep(interval)
+            loop_lag_ms = max(time.monotonic() - sleep_start - interval, 0) * 1000
+            self.events.put({
+                'type': 'heartbeat',
+                'worker': self.worker_id,
+                'loop_lag_ms': loop_lag_ms,
+                'lots': self.engine.metrics()
+            })
+
+
+def worker_main(worker_id, config_manager, commands, events):
+    """Точка входа процесса-воркера"""
+    try:
+        asyncio.run(LotWorker(worker_id, config_manager, commands, events).run())
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerHandle:
+    """Состояние воркера на стороне координатора"""
+
+    def __init__(self, worker_id, process, commands):
+        self.worker_id = worker_id
+        self.process = process
+        self.commands = commands
+        self.lots = set()
+        self.last_heartbeat = time.monotonic()
+        self.loop_lag_ms = 0.0
+        self.saturated_beats = 0
+        self.stall_reported = False
+
+
+class LotCoordinator:
+    """Шардинг лотов по процессам-воркерам
+
+    Каждый воркер ведет свою часть лотов в своем браузере. Воркеры
+    присылают пульс с задержкой event loop и метриками лотов; лоты
+    умершего воркера передаются новому, а с перегруженного воркера
+    лоты, далекие от старта, переносятся на наименее загруженный.
+    """
+
+    def __init__(self, config_manager):
+        self.config_manager = config_manager
+        self.config = config_manager.config
+        self.settings = self.config['sharding']
+        self.context = multiprocessing.get_context('spawn')
+        self.events = self.context.Queue()
+        self.workers = {}
+        self.next_worker_id = 0
+        self.restarts = 0
+        self.lots = {}
+        self.lot_metrics = {}
+        for index, lot_config in enumerate(self.config['lots']):
+            lot_config = dict(lot_config)
+            lot_config.setdefault('name', f"#{index + 1}")
+            self.lots[lot_config['name']] = lot_config
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def worker_count(self):
+        """Число воркеров: не больше лотов; 0 в конфигурации - по числу ядер"""
+        workers = self.settings['workers'] or os.cpu_count() or 1
+        return max(1, min(workers, len(self.lots)))
+
+    def run(self):
+        """Запуск воркеров и контроль до завершения всех лотов"""
+        try:
+            for _ in range(self.worker_count):
+                self.start_worker()
+            # Равномерное распределение лотов по воркерам
+            handles = list(self.workers.values())
+            for index, name in enumerate(self.lots):
+                self.assign(name, handles[index % len(handles)])
+
+            interval = self.settings['heartbeat_interval'] / 1000
+            while not self.all_finished():
+                try:
+                    self.handle_event(self.events.get(timeout=interval))
+                except queue.Empty:
+                    pass
+                self.check_workers()
+        finally:
+            self.stop()
+
+    def start_worker(self):
+        """Запуск нового процесса-воркера"""
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+        commands = self.context.Queue()
+        process = self.context.Process(
+            target=worker_main,
+            args=(worker_id, self.config_manager, commands, self.events),
+            name=f"lot-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        handle = WorkerHandle(worker_id, process, commands)
+        self.workers[worker_id] = handle
+        self.logger.info(f"Воркер {worker_id} запущен (pid {process.pid})")
+        return handle
+
+    def assign(self, name, handle):
+        """Передача лота воркеру"""
+        handle.lots.add(name)
+        handle.commands.put(('add', self.lots[name]))
+
+    def all_finished(self):
+        """Все ли лоты завершены"""
+        return all(self.is_finished(name) for name in self.lots)
+
+    def handle_event(self, event):
+        """Обработка пульса воркера"""
+        handle = self.workers.get(event['worker'])
+        if handle is None:
+            return
+        handle.last_heartbeat = time.monotonic()
+        handle.stall_reported = False
+        handle.loop_lag_ms = event['loop_lag_ms']
+        for name, metrics in event['lots'].items():
+            if name in handle.lots:
+                self.lot_metrics[name] = metrics
+        self.logger.debug(
+            f"Воркер {handle.worker_id}: задержка loop {handle.loop_lag_ms:.1f} мс, "
+            f"лоты {event['lots']}"
+        )
+
+        if handle.loop_lag_ms > self.settings['max_loop_lag']:
+            handle.saturated_beats += 1
+        else:
+            handle.saturated_beats = 0
+        if handle.saturated_beats >= self.settings['saturation_beats']:
+            handle.saturated_beats = 0
+            self.relieve(handle)
+
+    def check_workers(self):
+        """Замена умерших и зависших воркеров с передачей их лотов
+
+        Лоты в критических состояниях (CRITICAL_STATES) не передаются:
+        зависший воркер с таким лотом не останавливается, а лот умершего
+        воркера снимается, так как исход его ставки неизвестен.
+        """
+        timeout = self.settings['heartbeat_timeout'] / 1000
+        for handle in list(self.workers.values()):
+            alive = handle.process.is_alive()
+            if alive and time.monotonic() - handle.last_heartbeat <= timeout:
+                continue
+            critical = sorted(
+                name for name in handle.lots
+                if self.lot_metrics.get(name, {}).get('state') in CRITICAL_STATES
+            )
+            if alive and critical:
+                if not handle.stall_reported:
+                    handle.stall_reported = True
+                    self.logger.warning(
+                        f"Воркер {handle.worker_id} не отвечает, но ведет лоты у старта: {critical}; "
+                        f"воркер не перезапускается"
+                    )
+                continue
+            self.logger.warning(
+                f"Воркер {handle.worker_id} {'не отвечает' if alive else 'завершился'}, "
+                f"лоты передаются: {sorted(handle.lots) or 'нет'}"
+            )
+            if alive:
+                handle.process.terminate()
+            del self.workers[handle.worker_id]
+
+            for name in critical:
+                self.logger.error(f"Лот {name} снят: воркер завершился у старта, исход ставки неизвестен")
+                self.lot_metrics[name] = {'state': 'failed', 'probe_ms': None, 'late_ms': None}
+
+            pending = [name for name in handle.lots if not self.is_finished(name)]
+            if not pending:
+                continue
+            if self.restarts >= self.settings['max_restarts']:
+                # Воркеры падают раз за разом: лоты снимаются, а не перезапускаются бесконечно
+                self.logger.error(f"Превышен лимит перезапусков воркеров, лоты сняты: {sorted(pending)}")
+                for name in pending:
+                    self.lot_metrics[name] = {'state': 'failed', 'probe_ms': None, 'late_ms': None}
+                continue
+            self.restarts += 1
+            replacement = self.start_worker()
+            for name in pending:
+                self.assign(name, replacement)
+
+    def is_finished(self, name):
+        """Завершен ли лот"""
+        return self.lot_metrics.get(name, {}).get('state') in FINISHED_STATES
+
+    def relieve(self, handle):
+        """Перенос одного лота с перегруженного воркера"""
+        movable = [
+            name for name in handle.lots
+            if self.lot_metrics.get(name, {}).get('state') in MOVABLE_STATES
+        ]
+        if len(handle.lots) < 2 or not movable:
+            return
+
+        candidates = [
+            other for other in self.workers.values()
+            if other is not handle
+            and other.loop_lag_ms <= self.settings['max_loop_lag']
+            and len(other.lots) < len(handle.lots) - 1
+        ]
+        if candidates:
+            target = min(candidates, key=lambda other: (len(other.lots), other.loop_lag_ms))
+        elif len(self.workers) < (os.cpu_count() or 1):
+            target = self.start_worker()
+        else:
+            self.logger.warning(f"Воркер {handle.worker_id} перегружен, свободных воркеров нет")
+            return
+
+        name = movable[0]
+        self.logger.info(
+            f"Воркер {handle.worker_id} перегружен ({handle.loop_lag_ms:.0f} мс): "
+            f"лот {name} переносится на воркер {target.worker_id}"
+        )
+        handle.lots.discard(name)
+        handle.commands.put(('remove', name))
+        self.lot_metrics.pop(name, None)
+        self.assign(name, target)
+
+    def stop(self):
+        """Остановка всех воркеров"""
+        for handle in self.workers.values():
+            handle.commands.put(('stop', None))
+        deadline = time.monotonic() + 10
+        for handle in self.workers.values():
+            handle.process.join(max(deadline - time.monotonic(), 0))
+            if handle.process.is_alive():
+                handle.process.terminate()
+        self.workers.clear()
@@ -0,0 +1,487 @@
+"""
+Мониторинг нескольких лотов в одном браузере с общим планировщиком проб
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime
+
+from bot.auction_bot import AuctionBot
+from bot.browser_session import BrowserSession
+from bot.clock_sync import sleep_until
+from bot.ncalayer_client import NCALayerClient
+from bot.request_blocker import RequestBlocker
+from bot.screenshot_queue import ScreenshotQueue
+from utils.notification_outbox import create_notification_outbox
+
+
+class LotState:
+    """Состояния лота в планировщике"""
+    LOADING = 'loading'     # открытие и подготовка страницы
+    WAITING = 'waiting'     # до старта далеко: редкие пробы
+    WATCHING = 'watching'   # обычный опрос
+    FINAL = 'final'         # последние секунды: частые пробы с приоритетом
+    BIDDING = 'bidding'     # подача ставки
+    STANDBY = 'standby'     # ставку подает другая реплика лота
+    DONE = 'done'           # ставка подана
+    FAILED = 'failed'       # лот выбыл из мониторинга
+
+
+# Очередность проб, назначенных на один момент: меньше - раньше
+PROBE_PRIORITY = {LotState.FINAL: 0, LotState.WATCHING: 1, LotState.WAITING: 2}
+
+FINISHED_STATES = (LotState.DONE, LotState.FAILED)
+
+# Сводное состояние лота по репликам: первое встреченное в этом порядке
+SUMMARY_ORDER = (
+    LotState.DONE, LotState.BIDDING, LotState.FINAL, LotState.WATCHING,
+    LotState.WAITING, LotState.LOADING, LotState.STANDBY, LotState.FAILED
+)
+
+REPLICA_RESULTS_LOG = "replica_results.log"
+
+# Ограничение мониторинга лота после перехода к активному опросу, сек
+MONITORING_TIMEOUT = 3600
+
+
+class BidToken:
+    """Общий для реплик лота признак «ставка в полете»
+
+    Ставку подает только реплика, захватившая токен; остальные ждут
+    исхода. Моменты обнаружения старта всеми репликами сохраняются,
+    чтобы оценить выигрыш от избыточности.
+    """
+
+    def __init__(self, name, replicas):
+        self.name = name
+        self.replicas = replicas
+        self.holder = None
+        self.finished = False
+        self.detections = {}
+
+    def record_detection(self, lot):
+        """Момент обнаружения старта репликой (perf_counter)"""
+        if lot.label not in self.detections:
+            bot = lot.bot
+            self.detections[lot.label] = bot.detection_times[bot.trigger_source]
+
+    def claim(self, lot):
+        """Захват права на ставку; True только для первой реплики"""
+        if self.holder is not None or self.finished:
+            return False
+        self.holder = lot
+        return True
+
+    def release(self, lot):
+        """Освобождение токена после неудачной ставки"""
+        if self.holder is lot:
+            self.holder = None
+            self.detections.pop(lot.label, None)
+
+    def race_result(self):
+        """Победившая реплика и ее опережение ближайшей следующей, мс"""
+        winner = self.holder.label
+        won_at = self.detections[winner]
+        later = sorted(at for label, at in self.detections.items() if label != winner)
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'lot': self.name,
+            'replicas': self.replicas,
+            'winner': winner,
+            'margin_ms': (later[0] - won_at) * 1000 if later else None,
+            'detections': {label: (at - won_at) * 1000 for label, at in self.detections.items()}
+        }
+
+
+class Lot:
+    """Реплика лота под управлением планировщика"""
+
+    def __init__(self, name, bot, token, replica=1):
+        self.name = name
+        self.label = name if token.replicas == 1 else f"{name}/{replica}"
+        self.bot = bot
+        self.token = token
+        self.state = LotState.LOADING
+        self.entry_id = None
+        self.watch_started = None
+        self.task = None
+        # Метрики: длительность пробы и опоздание относительно плана, мс
+        self.probe_ms = None
+        self.late_ms = None
+
+
+class MultiLotEngine:
+    """Несколько лотов в одном браузере: страница и бот на лот, общий планировщик
+
+    Каждый лот получает свою вкладку, селекторы, лимит цены и прогноз
+    старта. Пробы всех лотов мультиплексируются одной очередью по времени;
+    лоты в финальной фазе обслуживаются первыми, а число одновременных
+    проб ограничено multi_lot.max_parallel_probes. Загрузка страниц
+    ограничена отдельно (multi_lot.max_parallel_loads) и слоты проб не
+    занимает.
+
+    Лот с replicas: K открывается на K независимых страницах; ставку
+    подает первая обнаружившая старт реплика, остальные переходят в
+    ожидание через общий BidToken, поэтому двойной ставки не бывает.
+
+    При persistent=True движок работает до вызова stop(), даже если все
+    лоты завершены: лоты добавляются и снимаются на ходу (воркер шардинга).
+    """
+
+    def __init__(self, config_manager, persistent=False):
+        self.config_manager = config_manager
+        self.config = config_manager.config
+        self.settings = self.config['multi_lot']
+        self.persistent = persistent
+        self.stopping = False
+        self.ncalayer_client = NCALayerClient(self.config['ncalayer'])
+        self.screenshot_queue = ScreenshotQueue(self.config['logging'])
+        self.notification_outbox = None
+        if self.config['telegram']['enabled']:
+            self.notification_outbox = create_notification_outbox(self.config['telegram'])
+        self.lots = []
+        self.browser = None
+        self.request_blocker = None
+        self.queue = []
+        self.entry_ids = itertools.count()
+        self.wakeup = asyncio.Event()
+        self.probe_slots = asyncio.Semaphore(self.settings['max_parallel_probes'])
+        self.load_slots = asyncio.Semaphore(self.settings['max_parallel_loads'])
+        self.logger = logging.getLogger(__name__)
+        for index, lot_config in enumerate(self.config['lots']):
+            self.add_lot(lot_config, f"#{index + 1}")
+
+    async def run(self):
+        """Запуск браузера, подготовка лотов и работа планировщика"""
+        self.browser = BrowserSession(self.config['browser'])
+        try:
+            await self.browser.start()
+            await self.ncalayer_client.start()
+
+            request_blocker = RequestBlocker(self.config['browser']['block'])
+            if request_blocker.enabled:
+                self.request_blocker = request_blocker
+                await self.request_blocker.attach(self.browser.context)
+
+            for lot in self.lots:
+                if lot.task is None:
+                    lot.task = asyncio.ensure_future(self._load(lot))
+            await self._schedule_loop()
+        finally:
+            for lot in self.lots:
+                if lot.task and not lot.task.done():
+                    lot.task.cancel()
+                await lot.bot.cleanup()
+            if self.request_blocker:
+                self.request_blocker.log_summary()
+            await self.screenshot_queue.close()
+            if self.notification_outbox:
+                await self.notification_outbox.close()
+            await self.ncalayer_client.close()
+            await self.browser.close()
+
+    def add_lot(self, lot_config, default_name=None):
+        """Добавление лота и его реплик; после запуска браузера страницы открываются сразу"""
+        name = lot_config.get('name') or default_name or f"#{len({lot.name for lot in self.lots}) + 1}"
+        token = BidToken(name, lot_config.get('replicas', 1))
+        for replica in range(1, token.replicas + 1):
+            bot = AuctionBot(
+                self.config_manager.for_lot(lot_config),
+                ncalayer_client=self.ncalayer_client,
+                screenshot_queue=self.screenshot_queue,
+                notification_outbox=self.notification_outbox
+            )
+            bot.on_trigger = self._on_trigger
+            lot = Lot(name, bot, token, replica)
+            self.lots.append(lot)
+            if self.browser and self.browser.context:
+                lot.task = asyncio.ensure_future(self._load(lot))
+        return token
+
+    async def remove_lot(self, name):
+        """Снятие лота со всеми репликами и закрытие их страниц"""
+        removed = [lot for lot in self.lots if lot.name == name]
+        for lot in removed:
+            self.lots.remove(lot)
+            lot.entry_id = None
+            if lot.task and not lot.task.done():
+                lot.task.cancel()
+            await lot.bot.cleanup()
+            if lot.bot.page and not lot.bot.page.is_closed():
+                await lot.bot.page.close()
+        if removed:
+            self.logger.info(f"Лот {name} снят с мониторинга")
+            self.wakeup.set()
+        return removed
+
+    def metrics(self):
+        """Сводные состояние и задержки по каждому лоту с учетом реплик"""
+        summary = {}
+        for name in dict.fromkeys(lot.name for lot in self.lots):
+            replicas = [lot for lot in self.lots if lot.name == name]
+            states = {lot.state for lot in replicas}
+            probe_ms = [lot.probe_ms for lot in replicas if lot.probe_ms is not None]
+            late_ms = [lot.late_ms for lot in replicas if lot.late_ms is not None]
+            summary[name] = {
+                'state': next(state for state in SUMMARY_ORDER if state in states),
+                'probe_ms': min(probe_ms) if probe_ms else None,
+                'late_ms': min(late_ms) if late_ms else None,
+                'replicas': len(replicas)
+            }
+        return summary
+
+    def stop(self):
+        """Остановка планировщика"""
+        self.stopping = True
+        self.wakeup.set()
+
+    async def _load(self, lot):
+        """Открытие страницы лота, синхронизация часов и постановка в очередь"""
+        bot = lot.bot
+        try:
+            async with self.load_slots:
+                bot.start_time = datetime.now()
+                await bot.prepare_page(await self.browser.new_page())
+                await bot.sync_scheduled_start()
+        except Exception as e:
+            self.logger.error(f"Лот {lot.label}: ошибка подготовки страницы: {e}")
+            self._set_state(lot, LotState.FAILED)
+            return
+
+        bot.is_monitoring = True
+        await bot.send_notification(f"🚀 Мониторинг лота {lot.label} запущен\nURL: {bot.config['auction']['url']}")
+        self._set_state(lot, self._phase(lot))
+        self._schedule(lot, time.monotonic())
+
+    def _set_state(self, lot, state):
+        """Переход лота в новое состояние"""
+        if state == lot.state:
+            return
+        self.logger.info(f"Лот {lot.label}: {lot.state} -> {state}")
+        lot.state = state
+        if state in (LotState.WATCHING, LotState.FINAL) and lot.watch_started is None:
+            lot.watch_started = time.monotonic()
+
+    def _phase(self, lot):
+        """Фаза опроса по прогнозу старта лота"""
+        bot = lot.bot
+        if bot.predicted_start is None:
+            return LotState.WATCHING
+        clock_config = bot.config['auction']['clock_sync']
+        remaining = bot.predicted_start - time.monotonic()
+        if remaining > clock_config['wake_ahead'] / 1000:
+            return LotState.WAITING
+        if remaining < -clock_config['final_window'] / 1000:
+            # Прогноз не подтвердился: обычный опрос
+            return LotState.WATCHING
+        return LotState.FINAL
+
+    def _next_probe_at(self, lot):
+        """Момент следующей пробы с точным попаданием в границы фаз"""
+        bot = lot.bot
+        auction = bot.config['auction']
+        now = time.monotonic()
+
+        if lot.state == LotState.WAITING:
+            interval = self.settings['idle_interval'] / 1000
+        elif bot.dom_watcher:
+            interval = auction['fallback_interval'] / 1000
+        else:
+            interval = auction['refresh_interval'] / 1000
+
+        if bot.predicted_start is None:
+            return now + interval
+
+        remaining = bot.predicted_start - now
+        if lot.state == LotState.WAITING:
+            # Пробуждение ровно к переходу в финальную фазу
+            wake_at = bot.predicted_start - auction['clock_sync']['wake_ahead'] / 1000
+            return min(now + interval, wake_at)
+        if remaining > 0:
+            # Финальная проба ровно в прогнозируемый момент
+            return min(now + interval, bot.predicted_start)
+        if lot.state == LotState.FINAL:
+            interval = min(interval, auction['clock_sync']['final_interval'] / 1000)
+        return now + interval
+
+    def _schedule(self, lot, at):
+        """Постановка пробы лота в очередь; прежняя запись становится недействительной"""
+        lot.entry_id = next(self.entry_ids)
+        heapq.heappush(self.queue, (at, PROBE_PRIORITY[lot.state], lot.entry_id, lot))
+        self.wakeup.set()
+
+    def _on_trigger(self, bot):
+        """Сигнал начала торгов от любого детектора любого лота"""
+        self.wakeup.set()
+
+    def _aims_at_start(self, entry):
+        """Нацелена ли проба из очереди ровно на прогноз старта лота"""
+        at, priority, entry_id, lot = entry
+        return entry_id == lot.entry_id and lot.bot.predicted_start == at
+
+    async def _wait(self, deadline, precise=False):
+        """Ожидание момента пробы или внеочередного пробуждения
+
+        Плотный цикл последних spin_window секунд - только для пробы,
+        нацеленной на прогноз старта (precise); остальные пробы ждут
+        обычным таймером, чтобы планировщик не занимал процессор.
+        """
+        if deadline is None:
+            await self.wakeup.wait()
+            return True
+        if not precise:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), max(deadline - time.monotonic(), 0))
+                return True
+            except asyncio.TimeoutError:
+                return False
+        spin_window = self.config['auction']['clock_sync']['spin_window'] / 1000
+        timeout = deadline - time.monotonic() - spin_window
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+                return True
+            except asyncio.TimeoutError:
+                pass
+        await sleep_until(deadline, spin_window)
+        return self.wakeup.is_set()
+
+    async def _schedule_loop(self):
+        """Общий планировщик проб всех лотов"""
+        while not self.stopping and (
+            self.persistent or any(lot.state not in FINISHED_STATES for lot in self.lots)
+        ):
+            self.wakeup.clear()
+            self._start_bids()
+
+            deadline = self.queue[0][0] if self.queue else None
+            if deadline is None or deadline > time.monotonic():
+                precise = deadline is not None and self._aims_at_start(self.queue[0])
+                if await self._wait(deadline, precise):
+                    continue
+
+            # Все наступившие пробы: сначала финальная фаза, затем по времени
+            due = []
+            now = time.monotonic()
+            while self.queue and self.queue[0][0] <= now:
+                at, priority, entry_id, lot = heapq.heappop(self.queue)
+                if entry_id == lot.entry_id and lot.state in PROBE_PRIORITY:
+                    due.append((priority, at, entry_id, lot))
+            for priority, at, entry_id, lot in sorted(due):
+                lot.entry_id = None
+                lot.late_ms = (time.monotonic() - at) * 1000
+                lot.task = asyncio.ensure_future(self._probe(lot))
+
+    def _start_bids(self):
+        """Подача ставок по лотам, получившим сигнал начала торгов"""
+        triggered = [
+            lot for lot in self.lots
+            if lot.state in (*PROBE_PRIORITY, LotState.STANDBY) and lot.bot.auction_started.is_set()
+        ]
+        for lot in triggered:
+            lot.token.record_detection(lot)
+
+        # Токен получает реплика, обнаружившая старт раньше других
+        triggered.sort(key=lambda lot: lot.token.detections[lot.label])
+        for lot in triggered:
+            if lot.state == LotState.STANDBY or not lot.token.claim(lot):
+                continue
+            self._cancel(lot)
+            self._set_state(lot, LotState.BIDDING)
+            lot.task = asyncio.ensure_future(self._bid(lot))
+            for replica in self._replicas(lot):
+                if replica.state in PROBE_PRIORITY:
+                    self._cancel(replica)
+                    self._set_state(replica, LotState.STANDBY)
+
+    def _replicas(self, lot):
+        """Остальные реплики того же лота"""
+        return [other for other in self.lots if other.token is lot.token and other is not lot]
+
+    def _cancel(self, lot):
+        """Снятие запланированной и текущей пробы лота"""
+        lot.entry_id = None
+        if lot.task and not lot.task.done():
+            lot.task.cancel()
+
+    async def _probe(self, lot):
+        """Одна проба лота и выбор времени следующей"""
+        bot = lot.bot
+        async with self.probe_slots:
+            probe_start = time.perf_counter()
+            started = await bot.check_auction_status()
+            lot.probe_ms = (time.perf_counter() - probe_start) * 1000
+            if started:
+                bot.trigger_auction_start('polling')
+                return
+
+        if time.monotonic() - (lot.watch_started or time.monotonic()) > MONITORING_TIMEOUT:
+            await bot.send_notification(f"⏰ Мониторинг лота {lot.label} остановлен по таймауту (1 час)")
+            self._set_state(lot, LotState.FAILED)
+            self.wakeup.set()
+            return
+
+        next_probe_at = None
+        try:
+            # Восстановление: перезагрузка страницы после серии сбоев проверки
+            if bot.probe_failures >= 3:
+                bot.probe_failures = 0
+                await bot.navigate()
+
+            phase = self._phase(lot)
+            if lot.state == LotState.WAITING and phase != LotState.WAITING:
+                await bot.prepare_for_start()
+                phase = self._phase(lot)
+            self._set_state(lot, phase)
+            next_probe_at = self._next_probe_at(lot)
+        except Exception as e:
+            self.logger.error(f"Лот {lot.label}: ошибка в цикле мониторинга: {e}")
+            next_probe_at = time.monotonic() + 1  # Пауза при ошибке
+        finally:
+            if lot.state in PROBE_PRIORITY and next_probe_at is not None:
+                self._schedule(lot, next_probe_at)
+
+    async def _bid(self, lot):
+        """Подача ставки по лоту; при неудаче лот возвращается к опросу"""
+        bot = lot.bot
+        bot.replica = lot.label
+        try:
+            await bot.submit_bid()
+        except Exception as e:
+            self.logger.error(f"Лот {lot.label}: ошибка подачи ставки: {e}")
+
+        if bot.bid_submitted:
+            lot.token.finished = True
+            for replica in [lot] + self._replicas(lot):
+                self._set_state(replica, LotState.DONE)
+            if lot.token.replicas > 1:
+                self.log_race_result(lot.token)
+            self.wakeup.set()
+        elif bot.bid_outcome_unknown:
+            # Ставка могла быть принята: повтор любой репликой подал бы ее дважды
+            lot.token.finished = True
+            for replica in [lot] + self._replicas(lot):
+                self._set_state(replica, LotState.FAILED)
+            self.wakeup.set()
+        else:
+            # Повторная попытка после следующего обнаружения; реплика,
+            # уже заметившая старт, получит токен на следующем шаге
+            lot.token.release(lot)
+            bot.reset_trigger()
+            for replica in [lot] + self._replicas(lot):
+                if replica.state in (LotState.BIDDING, LotState.STANDBY):
+                    self._set_state(replica, self._phase(replica))
+                    self._schedule(replica, time.monotonic())
+
+    def log_race_result(self, token):
+        """Запись победившей реплики и ее опережения для подбора числа реплик"""
+        result = token.race_result()
+        margin = f"{result['margin_ms']:.1f} мс" if result['margin_ms'] is not None else "остальные не успели"
+        self.logger.info(
+            f"Лот {token.name}: ставку подала реплика {result['winner']}, опережение {margin} "
+            f"(обнаружили старт {len(result['detections'])} из {token.replicas})"
+        )
+        with open(REPLICA_RESULTS_LOG, 'a', encoding='utf-8') as f:
+            f.write(f"{result}\n")
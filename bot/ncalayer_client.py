@@ -3,10 +3,26 @@
 """
 import aiohttp
 import asyncio
+import base64
+import contextlib
 import logging
 import urllib.parse
 import os
-import subprocess
+import time
+import uuid
+from collections import deque
+
+from aiohttp import web
+
+from bot.connection_warmer import make_connector
+from bot.ncalayer_health import NCALayerHealthMonitor
+from bot.ncalayer_transport import NCALayerWebSocket
+
+
+# Повторный прогрев хранилища не чаще, чем раз в указанное число секунд
+WARM_UP_INTERVAL = 30
+
+WARM_UP_DATA = "auction-bot-warm-up"
 
 
 class NCALayerClient:
@@ -14,18 +30,251 @@ class NCALayerClient:
     
     def __init__(self, config):
         self.config = config
+        self.session = None
+        self.ping_task = None
+        self.last_used = 0.0
+        # Выполняющиеся запросы подписи основным способом (пинги их пропускают)
+        self.primary_in_flight = 0
+        self.websocket = None
+        self.key_info = None
+        self.warmed_at = None
+        self.warm_up_lock = asyncio.Lock()
+        # Локальный сервер, на который NCALayer возвращает подпись по протоколу ncalayer://
+        self.callback_server = None
+        self.callback_port = None
+        # Ожидающие подпись запросы по протоколу: nonce из адреса callback -> future
+        self.pending_callbacks = {}
+        # Запуск адреса ncalayer:// вместо системного обработчика (заменитель NCALayer)
+        self.protocol_opener = None
+        self.protocol_lock = asyncio.Lock()
+        # Запросы подписи, собираемые в пакет в течение batch_window
+        self.batch = []
+        self.batch_task = None
+        # Длительности успешных подписей основным способом для расчета хеджирования, сек
+        self.primary_latencies = deque(maxlen=100)
+        self.hedge_stats = {'requests': 0, 'fired': 0, 'won': 0}
+        # Фоновые пинги и предохранитель основного способа подписи
+        self.health = NCALayerHealthMonitor(self, config['health']) if config['health']['enabled'] else None
         self.logger = logging.getLogger(__name__)
     
+    @property
+    def base_url(self):
+        """Адрес HTTP API NCALayer"""
+        return f"http://localhost:{self.config['port']}/"
+    
+    def get_session(self):
+        """Постоянная keep-alive сессия до NCALayer"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(connector=make_connector())
+        return self.session
+    
+    async def start(self):
+        """Открытие пула соединений и фоновые пинги простоя
+        
+        При transport: websocket вместо пингов HTTP соединение держится
+        heartbeat-кадрами WebSocket.
+        """
+        session = self.get_session()
+        if self.config['transport'] == 'websocket':
+            if self.websocket is None:
+                self.websocket = NCALayerWebSocket(
+                    self.config['ws_url'], session, heartbeat=self.config['ping_interval']
+                )
+            await self.websocket.start()
+        elif self.ping_task is None:
+            await self.ping()
+            self.ping_task = asyncio.ensure_future(self._ping_loop())
+        if self.health:
+            self.health.start()
+    
+    async def ping(self):
+        """Легкий запрос к NCALayer: соединение в пуле остается открытым"""
+        start = time.perf_counter()
+        try:
+            async with self.get_session().get(
+                self.base_url,
+                timeout=aiohttp.ClientTimeout(total=self.config['timeout']/1000)
+            ) as response:
+                await response.read()
+        except Exception as e:
+            self.logger.debug(f"NCALayer не ответил на пинг: {e}")
+            return None
+        self.last_used = time.monotonic()
+        return (time.perf_counter() - start) * 1000
+    
+    async def ping_primary(self):
+        """Пинг основного способа подписи, мс; None - NCALayer не ответил"""
+        if self.config['transport'] != 'websocket':
+            return await self.ping()
+        start = time.perf_counter()
+        try:
+            if self.websocket is None:
+                await self.start()
+            response = await self.websocket.request(
+                {"module": "kz.gov.pki.knca.commonUtils", "method": "getActiveTokens"},
+                timeout=self.config['timeout']/1000
+            )
+        except Exception as e:
+            self.logger.debug(f"NCALayer не ответил на пинг WebSocket: {e}")
+            return None
+        if str(response.get('code')) != '200':
+            return None
+        return (time.perf_counter() - start) * 1000
+    
+    async def _ping_loop(self):
+        """Пинги только в простое, чтобы не конкурировать с подписью"""
+        interval = self.config['ping_interval']
+        while True:
+            await asyncio.sleep(max(self.last_used + interval - time.monotonic(), 0.1))
+            if time.monotonic() - self.last_used >= interval:
+                await self.ping()
+    
+    def callback_url(self, nonce):
+        """Адрес, на который NCALayer отправляет подпись по запросу nonce"""
+        return f"http://127.0.0.1:{self.callback_port}/callback/{nonce}"
+    
+    async def start_callback_server(self):
+        """Запуск локального сервера приема подписи от NCALayer"""
+        if self.callback_server is not None:
+            return
+        app = web.Application()
+        app.router.add_post('/callback/{nonce}', self._callback_handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', self.config['callback_port'])
+        await site.start()
+        self.callback_server = runner
+        self.callback_port = site._server.sockets[0].getsockname()[1]
+        self.logger.info(f"Сервер приема подписи NCALayer: порт {self.callback_port}")
+    
+    async def _callback_handler(self, request):
+        """Прием подписи: JSON или форма с полем signature"""
+        if request.content_type == 'application/json':
+            data = await request.json()
+        else:
+            data = dict(await request.post())
+        await self.handle_callback(request.match_info['nonce'], data)
+        return web.json_response({'result': 'OK'})
+    
+    async def handle_callback(self, nonce, data):
+        """Подпись от NCALayer: пробуждение запроса с тем же nonce
+
+        Подпись из диалога отмененного запроса (проигравшее хеджирование)
+        приходит с чужим nonce и отбрасывается: она сделана над другими данными.
+        """
+        signature = data.get('signature') or data.get('responseObject')
+        if not signature:
+            self.logger.warning(f"Ответ NCALayer без подписи: {data}")
+            return
+        future = self.pending_callbacks.get(nonce)
+        if future is None or future.done():
+            self.logger.warning("Подпись NCALayer по неизвестному или отмененному запросу отброшена")
+            return
+        future.set_result(signature)
+    
+    async def close(self):
+        """Остановка пингов и закрытие пула соединений NCALayer"""
+        if self.health:
+            await self.health.stop()
+            self.logger.info(self.health.summary())
+        if self.ping_task:
+            self.ping_task.cancel()
+            try:
+                await self.ping_task
+            except asyncio.CancelledError:
+                pass
+            self.ping_task = None
+        if self.websocket:
+            summary = self.websocket.latency_summary()
+            if summary:
+                self.logger.info(
+                    f"WebSocket NCALayer: запросов {summary['count']}, медиана {summary['p50']:.1f} мс, "
+                    f"p95 {summary['p95']:.1f} мс, переподключений {self.websocket.reconnects}"
+                )
+            await self.websocket.close()
+            self.websocket = None
+        if self.hedge_stats['requests']:
+            self.logger.info(
+                f"Хеджирование подписи: запусков {self.hedge_rate('fired'):.0%}, "
+                f"побед запасного способа {self.hedge_rate('won'):.0%} "
+                f"из {self.hedge_stats['requests']} подписей"
+            )
+        if self.callback_server:
+            await self.callback_server.cleanup()
+            self.callback_server = None
+        if self.session:
+            await self.session.close()
+            self.session = None
+    
+    def hedge_delay(self):
+        """Задержка запуска запасного способа подписи, сек
+
+        ncalayer.hedge_delay - число мс или "p95": 95-й перцентиль недавних
+        подписей основным способом (пока истории мало - hedge_fallback_delay).
+        """
+        delay = self.config['hedge_delay']
+        if delay != 'p95':
+            return delay / 1000
+        if len(self.primary_latencies) < 10:
+            return self.config['hedge_fallback_delay'] / 1000
+        return self.primary_percentile(95) / 1000
+    
+    def primary_percentile(self, percent):
+        """Перцентиль недавних подписей основным способом, мс; None без истории"""
+        if not self.primary_latencies:
+            return None
+        latencies = sorted(self.primary_latencies)
+        return latencies[min(int(len(latencies) * percent / 100), len(latencies) - 1)] * 1000
+    
+    def primary_available(self):
+        """Не отключен ли основной способ предохранителем"""
+        return self.health is None or self.health.breaker.allow_request()
+    
+    @contextlib.contextmanager
+    def _primary_call(self):
+        """Учет запроса подписи основным способом на время его выполнения"""
+        self.primary_in_flight += 1
+        try:
+            yield
+        finally:
+            self.primary_in_flight -= 1
+    
+    def _record_primary(self, success):
+        """Учет результата основного способа в предохранителе"""
+        if self.health:
+            self.health.breaker.record(success)
+    
+    def hedge_rate(self, name):
+        """Доля подписей, где хедж был запущен (fired) или победил (won)"""
+        if not self.hedge_stats['requests']:
+            return 0.0
+        return self.hedge_stats[name] / self.hedge_stats['requests']
+    
     async def sign_data(self, data_to_sign):
-        """Подписание данных через NCALayer"""
+        """Подписание данных через NCALayer
+        
+        При ncalayer.batch_window > 0 одновременные запросы нескольких
+        лотов собираются в один пакетный вызов (см. sign_many).
+        """
+        if self.config['batch_window'] > 0:
+            return await self._sign_coalesced(data_to_sign)
+        return await self._sign_single(data_to_sign)
+    
+    async def _sign_single(self, data_to_sign):
+        """Подписание одного документа с хеджированием
+        
+        Основной способ - HTTP или WebSocket (ncalayer.transport). Запасной
+        (протокол ncalayer://) запускается, если основной не ответил за
+        hedge_delay или вернул ошибку; берется первый результат,
+        проигравший запрос отменяется. Пока основной способ отключен
+        предохранителем (ncalayer.health), подпись сразу идет запасным.
+        """
         try:
-            # Попытка HTTP подключения
-            signature = await self._sign_via_http(data_to_sign)
-            if signature:
-                return signature
-            
-            # Попытка через протокол ncalayer://
-            signature = await self._sign_via_protocol(data_to_sign)
+            if self.primary_available():
+                signature = await self._sign_hedged(data_to_sign)
+            else:
+                self.logger.warning("Основной способ NCALayer отключен предохранителем, подпись запасным способом")
+                signature = await self._sign_via_protocol(data_to_sign)
             if signature:
                 return signature
                 
@@ -35,52 +284,350 @@ class NCALayerClient:
             self.logger.error(f"Ошибка подписи через NCALayer: {e}")
             raise
     
-    async def _sign_via_http(self, data_to_sign):
-        """Подписание через HTTP API NCALayer"""
+    async def sign_many(self, items):
+        """Подписание нескольких документов одним вызовом NCALayer
+        
+        Если транспорт не поддерживает пакет или пакет не подписан,
+        документы подписываются по отдельности параллельно.
+        """
+        results = await self._sign_many_results(items)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+    
+    async def _sign_many_results(self, items):
+        """Подписи или исключения по каждому документу пакета"""
+        start = time.perf_counter()
+        signatures = await self._sign_batch_hedged(items)
+        if signatures is not None:
+            self.logger.info(
+                f"Пакетная подпись: {len(items)} документов за {(time.perf_counter() - start) * 1000:.1f} мс"
+            )
+            return signatures
+        return await asyncio.gather(*(self._sign_single(item) for item in items), return_exceptions=True)
+    
+    async def _sign_coalesced(self, data_to_sign):
+        """Постановка запроса в пакет, отправляемый по истечении batch_window"""
+        future = asyncio.get_running_loop().create_future()
+        self.batch.append((data_to_sign, future))
+        if self.batch_task is None:
+            self.batch_task = asyncio.ensure_future(self._flush_batch())
+        return await future
+    
+    async def _flush_batch(self):
+        """Отправка собранного пакета и раздача подписей ожидающим"""
+        await asyncio.sleep(self.config['batch_window'] / 1000)
+        batch, self.batch = self.batch, []
+        self.batch_task = None
+        
+        items = [data for data, _ in batch]
+        if len(items) == 1:
+            results = await asyncio.gather(self._sign_single(items[0]), return_exceptions=True)
+        else:
+            results = await self._sign_many_results(items)
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    async def _sign_batch_hedged(self, items):
+        """Пакетный вызов с хеджированием, как у одиночной подписи
+        
+        Если пакет не подписан за hedge_delay, параллельно запускается
+        подпись каждого документа запасным способом; берется первый полный
+        результат. None - пакет не подписан ни одним способом.
+        """
+        if not self.primary_available():
+            return None
+        self.hedge_stats['requests'] += 1
+        primary = asyncio.ensure_future(self._sign_batch(items))
+        hedge = None
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"http://localhost:{self.config['port']}/sign",
-                    json={
-                        "data": data_to_sign,
-                        "storage": self.config['storage'],
-                        "password": self.config['password']
-                    },
-                    timeout=aiohttp.ClientTimeout(total=self.config['timeout']/1000)
-                ) as response:
-                    
-                    if response.status == 200:
-                        result = await response.json()
-                        self.logger.info("Подпись получена через HTTP API")
-                        return result.get('signature')
-                    else:
-                        self.logger.warning(f"HTTP API недоступен: {response.status}")
-                        return None
-                        
-        except Exception as e:
-            self.logger.debug(f"HTTP метод не сработал: {e}")
+            await asyncio.wait([primary], timeout=self.hedge_delay())
+            if primary.done():
+                return primary.result()
+            
+            self.hedge_stats['fired'] += 1
+            self.logger.info("NCALayer не подписал пакет вовремя, запуск запасного способа подписи")
+            hedge = asyncio.ensure_future(self._sign_many_via_protocol(items))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result():
+                        if task is hedge:
+                            self.hedge_stats['won'] += 1
+                        return task.result()
             return None
+        finally:
+            for task in (primary, hedge):
+                if task and not task.done():
+                    task.cancel()
     
-    async def _sign_via_protocol(self, data_to_sign):
-        """Подписание через протокол ncalayer://"""
+    async def _sign_many_via_protocol(self, items):
+        """Подпись документов пакета запасным способом по очереди"""
+        signatures = []
+        for item in items:
+            signature = await self._sign_via_protocol(item)
+            if not signature:
+                return None
+            signatures.append(signature)
+        return signatures
+    
+    async def _sign_batch(self, items):
+        """Пакетный вызов основного транспорта; None - пакет не подписан
+        
+        Таймаут и ошибки соединения учитываются предохранителем; отказ
+        транспорта от пакетного вызова сбоем не считается.
+        """
+        with self._primary_call():
+            try:
+                if self.config['transport'] == 'websocket':
+                    if self.websocket is None:
+                        await self.start()
+                    response = await self.websocket.request(
+                        {
+                            "module": "kz.gov.pki.knca.basics",
+                            "method": "sign",
+                            "args": {
+                                "allowedStorages": [self.config['storage']],
+                                "format": "cms",
+                                "data": [
+                                    base64.b64encode(item.encode('utf-8')).decode('ascii') for item in items
+                                ],
+                                "signingParams": {"decode": True, "encapsulate": True},
+                                "signerParams": {"extKeyUsageOids": []},
+                                "locale": "ru"
+                            }
+                        },
+                        timeout=self.config['timeout']/1000
+                    )
+                    signatures = response.get('body', {}).get('result') if response.get('status') else None
+                else:
+                    async with self.get_session().post(
+                        f"{self.base_url}sign_many",
+                        json={
+                            "data": items,
+                            "storage": self.config['storage'],
+                            "password": self.config['password']
+                        },
+                        timeout=aiohttp.ClientTimeout(total=self.config['timeout']/1000)
+                    ) as response:
+                        self.last_used = time.monotonic()
+                        if response.status != 200:
+                            return None
+                        signatures = (await response.json()).get('signatures')
+            except Exception as e:
+                self.logger.debug(f"Пакетная подпись не сработала: {e}")
+                self._record_primary(False)
+                return None
+        
+            if not isinstance(signatures, list) or len(signatures) != len(items) or not all(signatures):
+                return None
+            self._record_primary(True)
+            return signatures
+    
+    async def _sign_hedged(self, data_to_sign):
+        """Гонка основного и запасного способа с отложенным стартом запасного"""
+        self.hedge_stats['requests'] += 1
+        primary = asyncio.ensure_future(self._sign_primary_timed(data_to_sign))
+        hedge = None
         try:
-            ncalayer_url = f"ncalayer://sign?data={urllib.parse.quote(data_to_sign)}"
+            await asyncio.wait([primary], timeout=self.hedge_delay())
+            if primary.done() and primary.result():
+                return primary.result()
             
-            if os.name == 'nt':  # Windows
-                subprocess.Popen(['start', ncalayer_url], shell=True)
-            else:  # Linux/Mac
-                import webbrowser
-                webbrowser.open(ncalayer_url)
+            self.hedge_stats['fired'] += 1
+            self.logger.info("NCALayer не ответил вовремя, запуск запасного способа подписи")
+            hedge = asyncio.ensure_future(self._sign_via_protocol(data_to_sign))
+            pending = {task for task in (primary, hedge) if not task.done()}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result():
+                        if task is hedge:
+                            self.hedge_stats['won'] += 1
+                        return task.result()
+            return None
+        finally:
+            for task in (primary, hedge):
+                if task and not task.done():
+                    task.cancel()
+    
+    async def _sign_primary(self, data_to_sign):
+        """Подписание основным способом (ncalayer.transport)"""
+        with self._primary_call():
+            if self.config['transport'] == 'websocket':
+                return await self._sign_via_websocket(data_to_sign)
+            return await self._sign_via_http(data_to_sign)
+    
+    async def _sign_primary_timed(self, data_to_sign):
+        """Подписание основным способом с учетом длительности успешных запросов"""
+        start = time.perf_counter()
+        signature = await self._sign_primary(data_to_sign)
+        if signature:
+            self.primary_latencies.append(time.perf_counter() - start)
+        self._record_primary(bool(signature))
+        return signature
+    
+    async def warm_up(self):
+        """Прогрев хранилища ключей до начала торгов
+        
+        Загружает хранилище и сведения о ключе, затем дважды подписывает
+        служебные данные: первая (холодная) подпись расшифровывает ключ,
+        вторая показывает время подписи на горячем хранилище.
+        """
+        async with self.warm_up_lock:
+            if self.warmed_at is not None and time.monotonic() - self.warmed_at < WARM_UP_INTERVAL:
+                return True
+            
+            start = time.perf_counter()
+            if self.key_info is None:
+                self.key_info = await self._get_key_info()
+            key_ms = (time.perf_counter() - start) * 1000
             
-            self.logger.info("Запрос на подпись отправлен в NCALayer")
+            start = time.perf_counter()
+            if not await self._sign_primary(WARM_UP_DATA):
+                self._record_primary(False)
+                self.logger.warning("Прогрев NCALayer не удался: подпись служебных данных не получена")
+                return False
+            cold_ms = (time.perf_counter() - start) * 1000
             
-            # Здесь должна быть логика ожидания и получения callback
-            # В реальной реализации нужно настроить callback endpoint
-            await asyncio.sleep(10)  # Временная заглушка
+            start = time.perf_counter()
+            if await self._sign_primary(WARM_UP_DATA):
+                self.primary_latencies.append(time.perf_counter() - start)
+            warm_ms = (time.perf_counter() - start) * 1000
             
-            # Для демонстрации возвращаем тестовую подпись
-            return "SIMULATED_SIGNATURE_FOR_DEMO"
+            self.warmed_at = time.monotonic()
+            alias = (self.key_info or {}).get('alias', 'неизвестен')
+            self.logger.info(
+                f"Прогрев NCALayer: ключ {alias}, сведения о ключе {key_ms:.0f} мс, "
+                f"холодная подпись {cold_ms:.0f} мс, теплая {warm_ms:.0f} мс"
+            )
+            return True
+    
+    async def _get_key_info(self):
+        """Сведения о ключе хранилища (алиас, владелец, срок действия)"""
+        try:
+            if self.config['transport'] == 'websocket':
+                if self.websocket is None:
+                    await self.start()
+                response = await self.websocket.request(
+                    {
+                        "module": "kz.gov.pki.knca.commonUtils",
+                        "method": "getKeyInfo",
+                        "args": [self.config['storage']]
+                    },
+                    timeout=self.config['timeout']/1000
+                )
+                if str(response.get('code')) != '200':
+                    return None
+                return response.get('responseObject')
             
+            async with self.get_session().post(
+                f"{self.base_url}keyinfo",
+                json={"storage": self.config['storage'], "password": self.config['password']},
+                timeout=aiohttp.ClientTimeout(total=self.config['timeout']/1000)
+            ) as response:
+                if response.status != 200:
+                    return None
+                return await response.json()
         except Exception as e:
-            self.logger.error(f"Ошибка вызова NCALayer через протокол: {e}")
+            self.logger.debug(f"Сведения о ключе не получены: {e}")
             return None
+    
+    async def _sign_via_websocket(self, data_to_sign):
+        """Подписание CMS через WebSocket-API NCALayer (модуль commonUtils)"""
+        try:
+            if self.websocket is None:
+                await self.start()
+            response = await self.websocket.request(
+                {
+                    "module": "kz.gov.pki.knca.commonUtils",
+                    "method": "createCMSSignatureFromBase64",
+                    "args": [
+                        self.config['storage'],
+                        "SIGNATURE",
+                        base64.b64encode(data_to_sign.encode('utf-8')).decode('ascii'),
+                        True
+                    ]
+                },
+                timeout=self.config['timeout']/1000
+            )
+        except Exception as e:
+            self.logger.debug(f"WebSocket метод не сработал: {e}")
+            return None
+        
+        if str(response.get('code')) != '200':
+            self.logger.warning(f"NCALayer отклонил подпись: {response.get('message') or response.get('code')}")
+            return None
+        self.logger.info("Подпись получена через WebSocket NCALayer")
+        return response.get('responseObject')
+    
+    async def _sign_via_http(self, data_to_sign):
+        """Подписание через HTTP API NCALayer"""
+        try:
+            session = self.get_session()
+            async with session.post(
+                f"{self.base_url}sign",
+                json={
+                    "data": data_to_sign,
+                    "storage": self.config['storage'],
+                    "password": self.config['password']
+                },
+                timeout=aiohttp.ClientTimeout(total=self.config['timeout']/1000)
+            ) as response:
+                
+                self.last_used = time.monotonic()
+                if response.status == 200:
+                    result = await response.json()
+                    self.logger.info("Подпись получена через HTTP API")
+                    return result.get('signature')
+                else:
+                    self.logger.warning(f"HTTP API недоступен: {response.status}")
+                    return None
+                        
+        except Exception as e:
+            self.logger.debug(f"HTTP метод не сработал: {e}")
+            return None
+    
+    async def _sign_via_protocol(self, data_to_sign):
+        """Подписание через протокол ncalayer:// с возвратом подписи на callback-сервер"""
+        # Подпись по протоколу требует участия пользователя, запросы идут по одному
+        async with self.protocol_lock:
+            nonce = uuid.uuid4().hex
+            try:
+                await self.start_callback_server()
+                future = asyncio.get_running_loop().create_future()
+                self.pending_callbacks[nonce] = future
+                
+                query = urllib.parse.urlencode({'data': data_to_sign, 'callback': self.callback_url(nonce)})
+                ncalayer_url = f"ncalayer://sign?{query}"
+                
+                if self.protocol_opener:
+                    self.protocol_opener(ncalayer_url)
+                elif os.name == 'nt':  # Windows
+                    os.startfile(ncalayer_url)
+                else:  # Linux/Mac
+                    import webbrowser
+                    webbrowser.open(ncalayer_url)
+                
+                self.logger.info("Запрос на подпись отправлен в NCALayer")
+                
+                signature = await asyncio.wait_for(future, self.config['timeout']/1000)
+                self.logger.info("Подпись получена через протокол ncalayer://")
+                return signature
+                
+            except asyncio.TimeoutError:
+                self.logger.warning("NCALayer не вернул подпись по протоколу за отведенное время")
+                return None
+            except Exception as e:
+                self.logger.error(f"Ошибка вызова NCALayer через протокол: {e}")
+                return None
+            finally:
+                self.pending_callbacks.pop(nonce, None)
@@ -0,0 +1,195 @@
+"""
+Контроль состояния NCALayer: задержки, предохранитель и предупреждения
+"""
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+
+
+# Границы корзин гистограммы задержек, мс
+HISTOGRAM_BUCKETS = [5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+class LatencyHistogram:
+    """Гистограмма задержек по скользящему окну последних замеров"""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+
+    def add(self, latency_ms):
+        """Новый замер, мс"""
+        self.samples.append(latency_ms)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def percentile(self, percent):
+        """Перцентиль задержки по окну, мс; None без замеров"""
+        if not self.samples:
+            return None
+        samples = sorted(self.samples)
+        return samples[min(int(len(samples) * percent / 100), len(samples) - 1)]
+
+    def buckets(self):
+        """Число замеров по корзинам: {'<=5': n, ..., '>5000': n}"""
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for sample in self.samples:
+            counts[bisect.bisect_left(HISTOGRAM_BUCKETS, sample)] += 1
+        labels = [f"<={edge}" for edge in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]}"]
+        return dict(zip(labels, counts))
+
+
+class CircuitBreaker:
+    """Предохранитель основного способа подписи
+
+    closed    - запросы идут основным способом
+    open      - после failure_threshold сбоев подряд основной способ
+                пропускается на reset_timeout секунд
+    half_open - по истечении паузы один пробный запрос решает, закрыться
+                предохранителю или снова разомкнуться; остальные запросы
+                идут в обход, пока проба не завершится (или не пропадет:
+                через reset_timeout разрешается новая)
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started = None
+
+    @property
+    def state(self):
+        """Текущее состояние предохранителя"""
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow_request(self):
+        """Можно ли обращаться к основному способу; в half_open - захват пробы"""
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'open':
+            return False
+        now = time.monotonic()
+        if self.trial_started is not None and now - self.trial_started < self.reset_timeout:
+            return False
+        self.trial_started = now
+        return True
+
+    def record(self, success):
+        """Учет результата обращения"""
+        self.trial_started = None
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class NCALayerHealthMonitor:
+    """Фоновые пинги NCALayer, гистограмма задержек и предохранитель
+
+    Предупреждение через on_warning (например, send_notification бота)
+    отправляется при переходе в неисправное состояние: предохранитель
+    разомкнут или p95 подписи/пинга выше ncalayer.health.latency_budget.
+    """
+
+    def __init__(self, client, config, on_warning=None):
+        self.client = client
+        self.config = config
+        self.on_warning = on_warning
+        self.ping_latency = LatencyHistogram(config['window'])
+        self.breaker = CircuitBreaker(config['failure_threshold'], config['reset_timeout'])
+        self.task = None
+        self.warned = False
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        """Запуск фоновых пингов"""
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        """Остановка пингов"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _loop(self):
+        """Пинги с заданной частотой и проверка бюджета задержки
+
+        Пока идет подпись основным способом, пинг пропускается: в WebSocket
+        NCALayer он встал бы в очередь перед подписью.
+        """
+        while True:
+            # Соединение только что проверено при запуске клиента
+            await asyncio.sleep(self.config['interval'])
+            if self.client.primary_in_flight:
+                continue
+            latency_ms = await self.client.ping_primary()
+            self.record(latency_ms)
+            await self.check()
+
+    def record(self, latency_ms):
+        """Учет пинга или подписи основным способом; None - сбой"""
+        self.breaker.record(latency_ms is not None)
+        if latency_ms is not None:
+            self.ping_latency.add(latency_ms)
+
+    def problems(self):
+        """Причины неисправности основного способа"""
+        problems = []
+        budget = self.config['latency_budget']
+        if self.breaker.state == 'open':
+            problems.append(f"NCALayer не отвечает ({self.breaker.failures} сбоев подряд)")
+        ping_p95 = self.ping_latency.percentile(95)
+        if ping_p95 is not None and ping_p95 > budget:
+            problems.append(f"p95 пинга {ping_p95:.0f} мс выше бюджета {budget} мс")
+        sign_p95 = self.client.primary_percentile(95)
+        if sign_p95 is not None and sign_p95 > budget:
+            problems.append(f"p95 подписи {sign_p95:.0f} мс выше бюджета {budget} мс")
+        return problems
+
+    async def check(self, force=False):
+        """Предупреждение при переходе в неисправное состояние
+
+        force - предупредить, даже если о неисправности уже сообщалось
+        (проверка перед торгами).
+        """
+        problems = self.problems()
+        if problems and (force or not self.warned):
+            self.warned = True
+            message = "⚠️ NCALayer: " + "; ".join(problems)
+            self.logger.warning(message)
+            if self.on_warning:
+                try:
+                    await self.on_warning(message)
+                except Exception as e:
+                    self.logger.debug(f"Предупреждение о NCALayer не отправлено: {e}")
+        elif not problems and self.warned:
+            self.warned = False
+            self.logger.info("NCALayer снова в норме")
+        return problems
+
+    def summary(self):
+        """Краткая сводка для лога"""
+        p50 = self.ping_latency.percentile(50)
+        p95 = self.ping_latency.percentile(95)
+        if p50 is None:
+            return f"NCALayer: замеров нет, предохранитель {self.breaker.state}"
+        return (
+            f"NCALayer: пинг p50 {p50:.1f} мс, p95 {p95:.1f} мс, предохранитель {self.breaker.state}, "
+            f"гистограмма {self.ping_latency.buckets()}"
+        )
@@ -0,0 +1,168 @@
+"""
+WebSocket-транспорт NCALayer с мультиплексированием запросов
+"""
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+
+import aiohttp
+
+
+class NCALayerWebSocket:
+    """Постоянное WebSocket-соединение с NCALayer
+
+    Запросы помечаются полем id, ответ возвращается ожидающей корутине по
+    нему. NCALayer обрабатывает запросы по очереди и id в ответе не
+    возвращает, поэтому ответ без известного id отдается самому старому
+    ожидающему запросу. Отмененный или просроченный запрос остается в
+    очереди до своего ответа, и этот ответ отбрасывается, а не достается
+    следующему запросу. При разрыве соединение восстанавливается с
+    нарастающей паузой, ожидающие запросы получают ошибку.
+    """
+
+    def __init__(self, url, session, heartbeat=None, reconnect_delay=0.5):
+        self.url = url
+        self.session = session
+        self.heartbeat = heartbeat
+        self.reconnect_delay = reconnect_delay
+        self.ws = None
+        self.connected = asyncio.Event()
+        self.task = None
+        self.closing = False
+        self.request_ids = itertools.count(1)
+        self.pending = {}
+        self.order = deque()
+        # Отправленные запросы, ответ на которые больше никто не ждет
+        self.abandoned = set()
+        # Длительности запросов от отправки до ответа, сек
+        self.latencies = deque(maxlen=100)
+        self.reconnects = 0
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self, timeout=5):
+        """Подключение; при неудаче попытки продолжаются в фоне"""
+        if self.task is None:
+            self.closing = False
+            self.task = asyncio.ensure_future(self._run())
+        try:
+            await asyncio.wait_for(self.connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.logger.warning(f"WebSocket NCALayer недоступен: {self.url}")
+            return False
+
+    async def _run(self):
+        """Чтение ответов и автоматическое переподключение"""
+        delay = self.reconnect_delay
+        while not self.closing:
+            try:
+                async with self.session.ws_connect(self.url, ssl=False, heartbeat=self.heartbeat) as ws:
+                    self.ws = ws
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    self.logger.info(f"WebSocket NCALayer подключен: {self.url}")
+                    async for message in ws:
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            self._dispatch(message.data)
+                        elif message.type == aiohttp.WSMsgType.ERROR:
+                            break
+            except Exception as e:
+                self.logger.debug(f"Ошибка WebSocket NCALayer: {e}")
+            finally:
+                self.ws = None
+                self.connected.clear()
+                self._fail_pending(ConnectionError("Соединение с NCALayer разорвано"))
+
+            if self.closing:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    async def request(self, payload, timeout):
+        """Отправка запроса и ожидание ответа на него"""
+        if self.ws is None:
+            await asyncio.wait_for(self.connected.wait(), timeout)
+
+        request_id = str(next(self.request_ids))
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = (future, time.perf_counter())
+        self.order.append(request_id)
+        sent = False
+        try:
+            await self.ws.send_str(json.dumps(dict(payload, id=request_id), ensure_ascii=False))
+            sent = True
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if sent and request_id in self.pending:
+                # Ответ еще придет и займет место этого запроса в очереди
+                self.abandoned.add(request_id)
+            else:
+                self.pending.pop(request_id, None)
+                if request_id in self.order:
+                    self.order.remove(request_id)
+
+    def _dispatch(self, text):
+        """Передача ответа ожидающему запросу по id или по порядку"""
+        try:
+            data = json.loads(text)
+        except ValueError:
+            self.logger.debug(f"Некорректный ответ NCALayer: {text[:200]}")
+            return
+
+        request_id = str(data.get('id')) if isinstance(data, dict) and 'id' in data else None
+        if request_id not in self.pending:
+            if not self.order:
+                # Служебное сообщение (например, версия при подключении)
+                self.logger.debug(f"Сообщение NCALayer без запроса: {text[:200]}")
+                return
+            request_id = self.order[0]
+
+        self.order.remove(request_id)
+        future, started = self.pending.pop(request_id)
+        if request_id in self.abandoned:
+            self.abandoned.discard(request_id)
+            self.logger.debug(f"Отброшен поздний ответ NCALayer на запрос {request_id}")
+            return
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+        self.logger.debug(f"Ответ NCALayer на запрос {request_id} за {latency * 1000:.1f} мс")
+        if not future.done():
+            future.set_result(data)
+
+    def _fail_pending(self, error):
+        """Ошибка всем ожидающим запросам"""
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending.clear()
+        self.order.clear()
+        self.abandoned.clear()
+
+    def latency_summary(self):
+        """Медиана и 95-й перцентиль длительности запросов, мс"""
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return {
+            'p50': latencies[len(latencies) // 2] * 1000,
+            'p95': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000,
+            'count': len(latencies)
+        }
+
+    async def close(self):
+        """Закрытие соединения без переподключения"""
+        self.closing = True
+        if self.ws is not None:
+            await self.ws.close()
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        self._fail_pending(ConnectionError("Клиент NCALayer закрыт"))
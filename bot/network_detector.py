@@ -0,0 +1,130 @@
+"""
+Обнаружение начала торгов по сетевому трафику страницы (WebSocket и XHR)
+"""
+import json
+import logging
+import re
+
+
+def extract_json_path(data, path):
+    """Извлечение значения по пути вида 'data.lot.status' или 'items[0].state'"""
+    for part in re.findall(r'[^.\[\]]+', path):
+        if isinstance(data, list):
+            if not part.isdigit() or int(part) >= len(data):
+                return None
+            data = data[int(part)]
+        elif isinstance(data, dict):
+            if part not in data:
+                return None
+            data = data[part]
+        else:
+            return None
+    return data
+
+
+def parse_json_payload(text):
+    """Разбор JSON из сообщения, в том числе с префиксом (Socket.IO: 42[...])"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    if not starts:
+        return None
+    try:
+        return json.loads(text[min(starts):])
+    except ValueError:
+        return None
+
+
+class NetworkMatcher:
+    """Правило срабатывания: регулярное выражение URL плюс JSON-путь или подстрока"""
+
+    def __init__(self, rule):
+        self.source = rule.get('source', 'response')
+        self.url_pattern = re.compile(rule['url'])
+        self.json_path = rule.get('json_path')
+        self.equals = rule.get('equals')
+        self.contains = rule.get('contains')
+
+    def matches_url(self, url):
+        """Проверка URL сообщения или ответа"""
+        return self.url_pattern.search(url) is not None
+
+    def matches_payload(self, text):
+        """Проверка содержимого кадра WebSocket или тела ответа"""
+        if not text:
+            return False
+
+        if not self.json_path:
+            return self.contains is not None and self.contains in text
+
+        data = parse_json_payload(text)
+        if data is None:
+            return False
+
+        value = extract_json_path(data, self.json_path)
+        if value is None:
+            return False
+        if self.equals is not None:
+            return str(value) == str(self.equals)
+        if self.contains is not None:
+            return self.contains in str(value)
+        return bool(value)
+
+
+class NetworkDetector:
+    """Подписка на кадры WebSocket и ответы XHR страницы"""
+
+    def __init__(self, rules, on_trigger):
+        self.matchers = [NetworkMatcher(rule) for rule in rules]
+        self.on_trigger = on_trigger
+        self.logger = logging.getLogger(__name__)
+
+    def attach(self, page):
+        """Подписка на сетевые события страницы"""
+        if any(m.source == 'websocket' for m in self.matchers):
+            page.on('websocket', self._on_websocket)
+        if any(m.source == 'response' for m in self.matchers):
+            page.on('response', self._on_response)
+        self.logger.info(f"Сетевой детектор подключен, правил: {len(self.matchers)}")
+
+    def _on_websocket(self, websocket):
+        """Подписка на входящие кадры подходящего WebSocket"""
+        matchers = [
+            m for m in self.matchers
+            if m.source == 'websocket' and m.matches_url(websocket.url)
+        ]
+        if not matchers:
+            return
+
+        self.logger.debug(f"Отслеживается WebSocket: {websocket.url}")
+        websocket.on(
+            'framereceived',
+            lambda payload: self._check(matchers, payload, 'websocket')
+        )
+
+    async def _on_response(self, response):
+        """Проверка тела подходящего ответа"""
+        matchers = [
+            m for m in self.matchers
+            if m.source == 'response' and m.matches_url(response.url)
+        ]
+        if not matchers:
+            return
+
+        try:
+            body = await response.text()
+        except Exception as e:
+            self.logger.debug(f"Не удалось прочитать ответ {response.url}: {e}")
+            return
+        self._check(matchers, body, 'response')
+
+    def _check(self, matchers, payload, source):
+        """Сравнение содержимого с правилами и вызов общего триггера"""
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8', errors='ignore')
+
+        if any(m.matches_payload(payload) for m in matchers):
+            self.on_trigger(source)
@@ -0,0 +1,119 @@
+"""
+Блокировка лишних запросов страницы аукциона
+"""
+import logging
+import re
+from collections import Counter
+
+
+# Встроенные наборы правил блокировки
+PRESETS = {
+    'lean': {
+        'resource_types': ['image', 'media', 'font'],
+        'url_patterns': [
+            r'google-analytics\.com',
+            r'googletagmanager\.com',
+            r'doubleclick\.net',
+            r'mc\.yandex\.(ru|kz)',
+            r'facebook\.(net|com)/tr',
+            r'connect\.facebook\.net',
+            r'hotjar\.com',
+            r'jivosite\.com',
+            r'code\.jivo\.ru',
+            r'widget\.replain\.cc',
+            r'tawk\.to',
+            r'vk\.com/rtrg'
+        ]
+    }
+}
+
+# Расширения файлов для типов ресурсов: маршрутизация задается только
+# шаблоном URL, поэтому тип ресурса распознается по расширению
+RESOURCE_EXTENSIONS = {
+    'image': ['png', 'jpe?g', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'],
+    'media': ['mp4', 'webm', 'ogg', 'mp3', 'wav', 'm4a'],
+    'font': ['woff2?', 'ttf', 'otf', 'eot'],
+    'stylesheet': ['css']
+}
+
+
+class RequestBlocker:
+    """Отклонение запросов по типу ресурса и шаблонам URL
+
+    Маршрутизация Playwright отключает HTTP-кэш браузера, поэтому
+    блокировку стоит включать, только если правила действительно нужны.
+    В Python попадают только запросы, подходящие под route_pattern:
+    шаблоны URL и расширения файлов блокируемых типов. Запросы ставки и
+    подтверждения идут мимо обработчика. Ресурсы без расширения в URL
+    (например, картинки из /image?id=) при этом не блокируются.
+    """
+
+    def __init__(self, config):
+        preset = PRESETS.get(config.get('preset') or '', {})
+        self.resource_types = set(preset.get('resource_types', [])) | set(config.get('resource_types', []))
+        self.patterns = list(preset.get('url_patterns', [])) + list(config.get('url_patterns', []))
+        self.url_pattern = re.compile('|'.join(f'(?:{p})' for p in self.patterns)) if self.patterns else None
+        self.blocked = Counter()
+        self.allowed = 0
+        self.loaded_bytes = 0
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def enabled(self):
+        """Заданы ли правила блокировки"""
+        return bool(self.resource_types or self.url_pattern)
+
+    def should_block(self, resource_type, url):
+        """Проверка запроса по правилам"""
+        if resource_type in self.resource_types:
+            return True
+        return self.url_pattern is not None and self.url_pattern.search(url) is not None
+
+    def route_pattern(self):
+        """Шаблон URL для маршрутизации; '**/*', если тип не распознается по расширению"""
+        unknown = self.resource_types - RESOURCE_EXTENSIONS.keys()
+        if unknown:
+            self.logger.warning(
+                f"Типы ресурсов {sorted(unknown)} не распознаются по URL, "
+                f"через обработчик пойдут все запросы"
+            )
+            return '**/*'
+        patterns = list(self.patterns)
+        extensions = [ext for name in sorted(self.resource_types) for ext in RESOURCE_EXTENSIONS[name]]
+        if extensions:
+            patterns.append(r'\.(?:' + '|'.join(extensions) + r')(?:[?#]|$)')
+        return re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+
+    async def attach(self, context):
+        """Подключение маршрутизации ко всем страницам контекста"""
+        await context.route(self.route_pattern(), self._handle_route)
+        context.on('response', self._on_response)
+        self.logger.info(
+            f"Блокировка запросов: типы {sorted(self.resource_types) or '-'}, "
+            f"шаблонов URL {len(self.patterns)}"
+        )
+
+    async def _handle_route(self, route):
+        """Отклонение или пропуск запроса, попавшего под route_pattern"""
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked[request.resource_type] += 1
+            await route.abort('blockedbyclient')
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+    def _on_response(self, response):
+        """Учет объема пропущенных ответов по Content-Length"""
+        length = response.headers.get('content-length')
+        if length and length.isdigit():
+            self.loaded_bytes += int(length)
+
+    def log_summary(self):
+        """Итоги блокировки за запуск"""
+        total = sum(self.blocked.values())
+        by_type = ', '.join(f"{name}: {count}" for name, count in self.blocked.most_common())
+        self.logger.info(
+            f"Заблокировано запросов: {total} ({by_type or 'нет'}), пропущено: {self.allowed}, "
+            f"загружено {self.loaded_bytes / 1024:.0f} КБ"
+        )
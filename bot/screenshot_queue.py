@@ -0,0 +1,97 @@
+"""
+Фоновая очередь скриншотов вне конвейера подачи ставки
+"""
+import asyncio
+import contextlib
+import logging
+import os
+from datetime import datetime
+
+
+class ScreenshotQueue:
+    """Скриншоты через ограниченную очередь и фоновый воркер
+
+    capture() только ставит запрос в очередь; снимок в JPEG делает и на
+    диск записывает воркер. Пока открыта хотя бы одна критическая секция
+    (от начала торгов до подтверждения ставки), воркер снимков не делает:
+    запросы ждут ее окончания. При переполнении очереди новые запросы
+    отбрасываются.
+    """
+
+    def __init__(self, config):
+        self.enabled = config['screenshots']
+        self.path = config['screenshots_path']
+        self.quality = config['screenshot_quality']
+        self.queue = asyncio.Queue(maxsize=config['screenshot_queue_size'])
+        self.critical_sections = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.task = None
+        self.dropped = 0
+        self.logger = logging.getLogger(__name__)
+
+    def capture(self, page, name):
+        """Постановка скриншота страницы в очередь"""
+        if not self.enabled or page is None:
+            return
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._worker())
+        try:
+            self.queue.put_nowait((page, name, datetime.now()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self.logger.warning(f"Очередь скриншотов переполнена, снимок {name} пропущен")
+
+    @contextlib.contextmanager
+    def critical_section(self):
+        """Участок, на котором скриншоты откладываются"""
+        self.critical_sections += 1
+        self.idle.clear()
+        try:
+            yield
+        finally:
+            self.critical_sections -= 1
+            if self.critical_sections == 0:
+                self.idle.set()
+
+    async def _worker(self):
+        """Снимки по очереди вне критических секций"""
+        loop = asyncio.get_running_loop()
+        while True:
+            page, name, requested_at = await self.queue.get()
+            try:
+                await self.idle.wait()
+                if page.is_closed():
+                    continue
+                data = await page.screenshot(type='jpeg', quality=self.quality)
+                filename = f"{name}_{requested_at.strftime('%Y%m%d_%H%M%S_%f')}.jpg"
+                path = os.path.join(self.path, filename)
+                await loop.run_in_executor(None, self._write, path, data)
+                self.logger.debug(f"Скриншот сохранен: {path}")
+            except Exception as e:
+                self.logger.error(f"Ошибка создания скриншота: {e}")
+            finally:
+                self.queue.task_done()
+
+    @staticmethod
+    def _write(path, data):
+        """Запись файла в потоке исполнителя"""
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    async def close(self, timeout=5):
+        """Сохранение оставшихся снимков и остановка воркера"""
+        if self.task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Не сохранено скриншотов: {self.queue.qsize()}")
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        if self.dropped:
+            self.logger.warning(f"Пропущено скриншотов из-за переполнения очереди: {self.dropped}")
@@ -0,0 +1,143 @@
+"""
+Разбор таймера обратного отсчета и прогноз момента начала торгов
+"""
+import re
+import time
+from collections import namedtuple
+
+
+# Оставшееся время и разрешение отображения таймера, мс
+TimerReading = namedtuple('TimerReading', ['remaining_ms', 'resolution_ms'])
+
+# [N дн.] HH:MM:SS, MM:SS и MM:SS.cc
+CLOCK_PATTERN = re.compile(
+    r'(?:(\d+)\s*(?:d|д|дн|день|дня|дней|days?)\.?\s*)?'
+    r'(\d{1,3}):(\d{2})(?::(\d{2}))?(?:[.,](\d{1,3}))?'
+)
+
+# Словесные формы: "1 ч 30 мин", "5 мин 10 сек", "2 days 3h"
+WORD_PATTERN = re.compile(
+    r'(\d+(?:[.,]\d+)?)\s*'
+    r'(дн|день|дня|дней|д|days?|d|'
+    r'часов|часа|час|ч|сағ|hours?|hrs?|h|'
+    r'минуты|минута|минут|мин|м|minutes?|mins?|m|'
+    r'секунды|секунда|секунд|сек|с|seconds?|secs?|s)\b'
+)
+
+UNIT_MS = {
+    'day': 86400000,
+    'hour': 3600000,
+    'minute': 60000,
+    'second': 1000
+}
+
+EXPIRED_INDICATORS = [
+    "время вышло", "таймер истек", "завершено",
+    "start", "начало", "старт"
+]
+
+
+def _unit_of(word):
+    """Нормализация единицы времени словесной формы"""
+    if word.startswith(('д', 'd')):
+        return 'day'
+    if word.startswith(('ч', 'са', 'h')):
+        return 'hour'
+    if word.startswith(('м', 'm')):
+        return 'minute'
+    return 'second'
+
+
+def parse_timer(timer_text):
+    """Перевод текста таймера в оставшиеся миллисекунды
+
+    Возвращает TimerReading или None, если текст не похож на таймер.
+    """
+    if not timer_text:
+        return None
+
+    text = timer_text.strip().lower()
+
+    match = CLOCK_PATTERN.search(text)
+    if match:
+        days, first, second, third, fraction = match.groups()
+        if third is not None:
+            hours, minutes, seconds = int(first), int(second), int(third)
+        else:
+            hours, minutes, seconds = 0, int(first), int(second)
+
+        remaining = (
+            int(days or 0) * UNIT_MS['day']
+            + hours * UNIT_MS['hour']
+            + minutes * UNIT_MS['minute']
+            + seconds * UNIT_MS['second']
+        )
+        resolution = UNIT_MS['second']
+        if fraction:
+            resolution = 10 ** (3 - len(fraction))
+            remaining += int(fraction) * resolution
+        return TimerReading(remaining, resolution)
+
+    words = WORD_PATTERN.findall(text)
+    if words:
+        remaining = 0
+        resolution = UNIT_MS['day']
+        for value, word in words:
+            unit_ms = UNIT_MS[_unit_of(word)]
+            remaining += int(float(value.replace(',', '.')) * unit_ms)
+            resolution = min(resolution, unit_ms)
+        return TimerReading(remaining, resolution)
+
+    if any(indicator in text for indicator in EXPIRED_INDICATORS):
+        return TimerReading(0, 0)
+
+    return None
+
+
+class CountdownPredictor:
+    """Прогноз момента старта по последовательным показаниям таймера
+
+    Показание r с разрешением res означает, что старт наступит через
+    [r, r + res] мс от момента чтения. Пересечение таких интервалов по мере
+    смены показаний сужает прогноз до долей разрешения таймера.
+    """
+
+    def __init__(self):
+        self.low = None
+        self.high = None
+        self.samples = 0
+
+    def add_reading(self, reading, at=None):
+        """Учет очередного показания таймера (at - момент по time.monotonic)"""
+        if reading is None or reading.remaining_ms <= 0:
+            return
+        at = time.monotonic() if at is None else at
+
+        low = at + reading.remaining_ms / 1000
+        high = low + reading.resolution_ms / 1000
+        if self.low is None or low > self.high or high < self.low:
+            # Первое показание или таймер переставлен площадкой
+            self.low, self.high = low, high
+        else:
+            self.low, self.high = max(self.low, low), min(self.high, high)
+        self.samples += 1
+
+    def reset(self):
+        """Сброс накопленного прогноза"""
+        self.low = None
+        self.high = None
+        self.samples = 0
+
+    @property
+    def predicted_start(self):
+        """Прогноз старта в шкале time.monotonic"""
+        if self.low is None:
+            return None
+        return (self.low + self.high) / 2
+
+    @property
+    def uncertainty(self):
+        """Полуширина интервала прогноза, сек"""
+        if self.low is None:
+            return None
+        return (self.high - self.low) / 2
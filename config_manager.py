@@ -1,6 +1,7 @@
 """
 Универсальный менеджер конфигурации
 """
+import copy
 import yaml
 import os
 from typing import Dict, Any
@@ -22,36 +23,118 @@ class ConfigManager:
                 'price_limit': 1000000,
                 'bid_delay': 100,
                 'refresh_interval': 200,
+                'detection_mode': "polling",
+                'fallback_interval': 1000,
+                'network_triggers': [],
+                'confirm_triggers': [],
+                'confirm_timeout': 10000,
+                'start_time': "",
+                'clock_sync': {
+                    'enabled': True,
+                    'samples': 8,
+                    'wake_ahead': 10000,
+                    'arm_margin': 2000,
+                    'spin_window': 30,
+                    'final_window': 2000,
+                    'final_interval': 20
+                },
                 'selectors': {
                     'bid_button': "button.bid-button:not([disabled])",
                     'timer': ".auction-timer", 
                     'status': ".auction-status",
                     'sign_data': "#signData",
-                    'signature_input': "#signatureInput"
+                    'signature_input': "#signatureInput",
+                    'confirm_button': 'button[type="submit"]',
+                    'bid_success': ".success-message, .bid-confirmed",
+                    'bid_error': ".error-message, .bid-rejected"
                 }
             },
+            'lots': [],
+            'multi_lot': {
+                'max_parallel_probes': 4,
+                'max_parallel_loads': 2,
+                'idle_interval': 2000
+            },
+            'sharding': {
+                'workers': 1,
+                'heartbeat_interval': 1000,
+                'heartbeat_timeout': 10000,
+                'max_loop_lag': 100,
+                'saturation_beats': 3,
+                'max_restarts': 3
+            },
+            'direct_http': {
+                'enabled': False,
+                'record': False,
+                'recording_file': "bid_requests.json",
+                'bid_url': "",
+                'confirm_url': "",
+                'amount_path': "",
+                'sign_data_path': "",
+                'signature_field': "signature",
+                'success_contains': "",
+                'timeout': 5000
+            },
             'ncalayer': {
                 'port': 13579,
                 'storage': "PKCS12",
                 'password': "",
-                'timeout': 30000
+                'timeout': 30000,
+                'hedge_delay': "p95",
+                'hedge_fallback_delay': 1000,
+                'health': {
+                    'enabled': True,
+                    'interval': 5,
+                    'window': 200,
+                    'latency_budget': 1000,
+                    'failure_threshold': 3,
+                    'reset_timeout': 10
+                },
+                'ping_interval': 15,
+                'transport': "http",
+                'ws_url': "wss://127.0.0.1:13579/",
+                'warm_up': True,
+                'callback_port': 0,
+                'batch_window': 0
+            },
+            'prewarm': {
+                'enabled': True,
+                'keepalive_interval': 20
             },
             'telegram': {
                 'enabled': False,
                 'bot_token': "YOUR_BOT_TOKEN",
-                'chat_id': "YOUR_CHAT_ID"
+                'chat_id': "YOUR_CHAT_ID",
+                'outbox': {
+                    'queue_size': 100,
+                    'coalesce_window': 300,
+                    'min_interval': 1000,
+                    'max_retries': 3,
+                    'retry_delay': 1000
+                }
             },
             'logging': {
                 'level': "INFO",
                 'screenshots': True,
                 'screenshots_path': "screenshots",
+                'screenshot_quality': 60,
+                'screenshot_queue_size': 10,
                 'log_file': "auction_bot.log",
                 'max_log_size': 10485760
             },
             'browser': {
+                'mode': "launch",
+                'user_data_dir': "browser_profile",
+                'cdp_url': "http://127.0.0.1:9222",
                 'headless': False,
                 'timeout': 30000,
-                'user_agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                'readiness': "selector",
+                'user_agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+                'block': {
+                    'preset': "",
+                    'resource_types': [],
+                    'url_patterns': []
+                }
             }
         }
     
@@ -104,6 +187,14 @@ class ConfigManager:
         if args.refresh_interval:
             self.config['auction']['refresh_interval'] = args.refresh_interval
             changes_made = True
+            
+        if args.start_time:
+            self.config['auction']['start_time'] = args.start_time
+            changes_made = True
+            
+        if args.detection_mode:
+            self.config['auction']['detection_mode'] = args.detection_mode
+            changes_made = True
         
         # Селекторы
         if args.bid_button_selector:
@@ -138,6 +229,10 @@ class ConfigManager:
         if args.storage_password:
             self.config['ncalayer']['password'] = args.storage_password
             changes_made = True
+            
+        if args.ncalayer_transport:
+            self.config['ncalayer']['transport'] = args.ncalayer_transport
+            changes_made = True
         
         # Telegram
         if args.telegram_token:
@@ -156,6 +251,24 @@ class ConfigManager:
             self.config['telegram']['enabled'] = False
             changes_made = True
         
+        # Браузер
+        if args.browser_mode:
+            self.config['browser']['mode'] = args.browser_mode
+            changes_made = True
+            
+        if args.cdp_url:
+            self.config['browser']['cdp_url'] = args.cdp_url
+            changes_made = True
+            
+        if args.block_preset:
+            self.config['browser']['block']['preset'] = args.block_preset
+            changes_made = True
+        
+        # Шардинг лотов по процессам
+        if args.workers is not None:
+            self.config['sharding']['workers'] = args.workers
+            changes_made = True
+        
         # Логирование
         if args.enable_screenshots:
             self.config['logging']['screenshots'] = True
@@ -264,6 +377,33 @@ Telegram: {'✅ Включен' if self.config['telegram']['enabled'] else '❌
         else:
             print("❌ Профили конфигурации не найдены")
     
+    def for_lot(self, lot: Dict[str, Any]) -> 'ConfigManager':
+        """Копия конфигурации для одного лота из списка lots
+
+        Параметры лота (url, price_limit, selectors, start_time и т.д.)
+        накладываются на общий раздел auction, вложенный раздел direct_http
+        лота - на общий direct_http. Записанный запрос ставки относится к
+        одному лоту, поэтому прямая подача работает только у лотов со своим
+        direct_http.recording_file, остальные подают ставку через браузер.
+        """
+        lot = dict(lot)
+        direct_http = lot.pop('direct_http', None) or {}
+        lot_manager = copy.copy(self)
+        lot_manager.config = copy.deepcopy(self.config)
+        lot_manager.config['lots'] = []
+        self._deep_update(lot_manager.config['auction'], lot)
+        
+        direct_config = lot_manager.config['direct_http']
+        self._deep_update(direct_config, direct_http)
+        if (direct_config['enabled'] or direct_config['record']) and not direct_http.get('recording_file'):
+            print(
+                f"⚠️ Лот {lot.get('name') or lot.get('url')}: прямая подача отключена, "
+                f"нет своего direct_http.recording_file"
+            )
+            direct_config['enabled'] = False
+            direct_config['record'] = False
+        return lot_manager
+    
     def _deep_update(self, original: Dict, update: Dict):
         """Рекурсивное обновление словаря"""
         for key, value in update.items():
@@ -30,6 +30,14 @@ def parse_arguments():
   Графический режим Tkinter:
     python main.py --gui-tk
 
+  Постоянный браузер:
+    python main.py --launch-browser
+    python main.py --browser-mode cdp
+
+  Несколько лотов (список lots в конфигурации):
+    python main.py --config config_lots.yaml --headless
+    python main.py --config config_lots.yaml --headless --workers 0
+
   Тестирование:
     python main.py --test-speed 5
         """
@@ -43,6 +51,10 @@ def parse_arguments():
     # Основные параметры
     parser.add_argument('--config', default='config.yaml', help='Путь к конфигурационному файлу')
     parser.add_argument('--headless', action='store_true', help='Запуск браузера в фоновом режиме')
+    parser.add_argument('--browser-mode', choices=['launch', 'persistent', 'cdp'],
+                        help='Режим браузера: новый запуск, постоянный профиль или подключение по CDP')
+    parser.add_argument('--cdp-url', help='Адрес отладочного порта запущенного Chromium')
+    parser.add_argument('--block-preset', choices=['lean'], help='Набор правил блокировки лишних запросов')
     parser.add_argument('--edit-config', action='store_true', help='Редактировать конфигурацию перед запуском')
     
     # Параметры аукциона
@@ -50,6 +62,9 @@ def parse_arguments():
     parser.add_argument('--price-limit', type=int, help='Лимит цены')
     parser.add_argument('--bid-delay', type=int, help='Задержка подачи (мс)')
     parser.add_argument('--refresh-interval', type=int, help='Интервал проверки (мс)')
+    parser.add_argument('--start-time', help='Время начала торгов (ISO 8601, например 2025-01-31T10:00:00)')
+    parser.add_argument('--detection-mode', choices=['polling', 'observer'],
+                        help='Способ обнаружения начала торгов (опрос или MutationObserver)')
     
     # Селекторы
     parser.add_argument('--bid-button-selector', help='Селектор кнопки ставки')
@@ -62,6 +77,8 @@ def parse_arguments():
     parser.add_argument('--ncalayer-port', type=int, help='Порт NCALayer')
     parser.add_argument('--storage-type', help='Тип хранилища (PKCS12/PKCS8)')
     parser.add_argument('--storage-password', help='Пароль хранилища')
+    parser.add_argument('--ncalayer-transport', choices=['http', 'websocket'],
+                        help='Основной способ связи с NCALayer')
     
     # Telegram
     parser.add_argument('--telegram-token', help='Token бота Telegram')
@@ -69,6 +86,10 @@ def parse_arguments():
     parser.add_argument('--enable-telegram', action='store_true', help='Включить Telegram уведомления')
     parser.add_argument('--disable-telegram', action='store_true', help='Выключить Telegram уведомления')
     
+    # Несколько лотов
+    parser.add_argument('--workers', type=int,
+                        help='Число процессов-воркеров для лотов (0 - по числу ядер)')
+    
     # Логирование
     parser.add_argument('--enable-screenshots', action='store_true', help='Включить сохранение скриншотов')
     parser.add_argument('--disable-screenshots', action='store_true', help='Выключить сохранение скриншотов')
@@ -77,29 +98,58 @@ def parse_arguments():
     parser.add_argument('--generate-config', help='Сгенерировать конфигурационный файл с указанным именем')
     parser.add_argument('--list-profiles', action='store_true', help='Показать все профили конфигурации')
     parser.add_argument('--test-speed', type=int, help='Запустить тест скорости (количество попыток)')
+    parser.add_argument('--launch-browser', action='store_true',
+                        help='Запустить долгоживущий Chromium для подключения бота по CDP')
     
     return parser.parse_args()
 
 
-async def run_console_bot(args):
+def load_console_config(args):
+    """Конфигурация консольного режима; None - редактирование отменено"""
+    config_manager = ConfigManager(args.config)
+    
+    # Применяем параметры из командной строки к конфигурации
+    if config_manager.apply_command_line_args(args):
+        print("✅ Параметры из командной строки применены")
+    
+    # Редактирование конфигурации если запрошено
+    if args.edit_config:
+        if not config_manager.interactive_config_edit():
+            print("Редактирование отменено")
+            return None
+    
+    if args.headless:
+        config_manager.config['browser']['headless'] = True
+    return config_manager
+
+
+def run_lot_coordinator(config_manager):
+    """Распределение лотов по процессам-воркерам, каждый со своим браузером
+    
+    Цикл координатора синхронный и выполняется вне event loop.
+    """
+    from bot.lot_coordinator import LotCoordinator
+    coordinator = LotCoordinator(config_manager)
+    print(f"🚀 Запуск мониторинга лотов: {len(coordinator.lots)}, воркеров: {coordinator.worker_count}...")
+    try:
+        coordinator.run()
+    except KeyboardInterrupt:
+        print("\n⏹ Остановка бота...")
+
+
+async def run_console_bot(config_manager):
     """Запуск бота в консольном режиме"""
     try:
-        config_manager = ConfigManager(args.config)
-        
-        # Применяем параметры из командной строки к конфигурации
-        if config_manager.apply_command_line_args(args):
-            print("✅ Параметры из командной строки применены")
-        
-        # Редактирование конфигурации если запрошено
-        if args.edit_config:
-            if not config_manager.interactive_config_edit():
-                print("Редактирование отменено")
-                return
+        # Несколько лотов отслеживаются в одном браузере общим планировщиком
+        if config_manager.config['lots']:
+            from bot.multi_lot import MultiLotEngine
+            engine = MultiLotEngine(config_manager)
+            print(f"🚀 Запуск мониторинга лотов: {len(engine.lots)}...")
+            await engine.run()
+            return
         
         from bot.auction_bot import AuctionBot
         bot = AuctionBot(config_manager)
-        if args.headless:
-            bot.config['browser']['headless'] = True
             
         print("🚀 Запуск мониторинга аукциона...")
         await bot.start_monitoring()
@@ -123,6 +173,15 @@ def handle_special_commands(args):
         ConfigManager.list_profiles()
         return True
         
+    if args.launch_browser:
+        from bot.browser_session import BrowserSession
+        config_manager = ConfigManager(args.config)
+        config_manager.apply_command_line_args(args)
+        pid, port = BrowserSession.launch_server(config_manager.config['browser'])
+        print(f"✅ Chromium запущен (PID {pid}), порт отладки {port}")
+        print("Запускайте бота с --browser-mode cdp, браузер переживет перезапуски")
+        return True
+        
     if args.test_speed:
         from speed_test import SpeedTester
         tester = SpeedTester(args.config, args.test_speed)
@@ -175,7 +234,17 @@ def main():
         run_tkinter_gui(args)
     else:
         print("Запуск в консольном режиме...")
-        asyncio.run(run_console_bot(args))
+        try:
+            config_manager = load_console_config(args)
+        except Exception as e:
+            print(f"❌ Ошибка: {e}")
+            sys.exit(1)
+        if config_manager is None:
+            return
+        if config_manager.config['lots'] and config_manager.config['sharding']['workers'] != 1:
+            run_lot_coordinator(config_manager)
+        else:
+            asyncio.run(run_console_bot(config_manager))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,299 @@
+"""
+Локальный заменитель NCALayer для тестирования подписи без токена
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import statistics
+import time
+import urllib.parse
+
+import aiohttp
+from aiohttp import web
+
+
+class LatencyProfile:
+    """Распределение задержки ответа
+
+    fixed    - постоянная задержка base мс
+    normal   - нормальное распределение: среднее base, отклонение spread мс
+    longtail - логнормальное: медиана base, параметр хвоста spread (sigma)
+    stall    - задержка base мс и периодические зависания на stall_ms
+               каждые stall_every секунд
+    """
+
+    def __init__(self, kind='fixed', base=20, spread=0.0, stall_every=10.0, stall_ms=2000, seed=None):
+        self.kind = kind
+        self.base = base
+        self.spread = spread
+        self.stall_every = stall_every
+        self.stall_ms = stall_ms
+        self.random = random.Random(seed)
+        self.started = time.monotonic()
+
+    def next_delay(self):
+        """Задержка очередного ответа, сек"""
+        if self.kind == 'normal':
+            delay_ms = max(self.random.gauss(self.base, self.spread), 0)
+        elif self.kind == 'longtail':
+            delay_ms = self.random.lognormvariate(0, self.spread) * self.base
+        elif self.kind == 'stall':
+            # Запрос, попавший в окно зависания, ждет его окончания
+            phase = (time.monotonic() - self.started) % self.stall_every
+            stall_left = max(self.stall_ms / 1000 - phase, 0)
+            delay_ms = self.base + stall_left * 1000
+        else:
+            delay_ms = self.base
+        return delay_ms / 1000
+
+
+def fake_cms(data):
+    """Детерминированная «подпись» CMS для данных"""
+    digest = hashlib.sha256(data.encode('utf-8')).hexdigest()
+    return base64.b64encode(f"FAKE-CMS:{digest}".encode('ascii')).decode('ascii')
+
+
+KEY_INFO = {
+    'alias': 'simulator-key',
+    'subjectDn': 'CN=ТЕСТОВ ТЕСТ,SERIALNUMBER=IIN000000000000',
+    'certNotAfter': '2099-12-31T23:59:59'
+}
+
+
+class NCALayerSimulator:
+    """Заменитель NCALayer: HTTP API бота и WebSocket-протокол NCALayer"""
+
+    def __init__(self, port=13579, profile=None, failure_rate=0.0, echo_ids=False, seed=None):
+        self.port = port
+        self.profile = profile or LatencyProfile()
+        self.failure_rate = failure_rate
+        self.echo_ids = echo_ids
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'failures': 0, 'protocol': 0}
+        self.runner = None
+        self.protocol_tasks = set()
+
+    def create_app(self):
+        """Приложение с маршрутами HTTP и WebSocket"""
+        app = web.Application()
+        app.router.add_get('/', self.handle_root)
+        app.router.add_post('/sign', self.handle_sign)
+        app.router.add_post('/sign_many', self.handle_sign_many)
+        app.router.add_post('/keyinfo', self.handle_keyinfo)
+        return app
+
+    async def start(self):
+        """Запуск сервера; при port=0 выбирается свободный порт"""
+        self.runner = web.AppRunner(self.create_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        """Остановка сервера"""
+        for task in list(self.protocol_tasks):
+            task.cancel()
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def respond(self):
+        """Задержка по профилю и решение о сбое"""
+        self.stats['requests'] += 1
+        await asyncio.sleep(self.profile.next_delay())
+        if self.random.random() < self.failure_rate:
+            self.stats['failures'] += 1
+            return False
+        return True
+
+    def open_protocol_url(self, url):
+        """Обработчик ncalayer://sign вместо настоящего NCALayer
+
+        Подпись отправляется на адрес callback с той же задержкой и долей
+        сбоев, что и у основного способа; при сбое ответа нет, как при
+        незакрытом диалоге.
+        """
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+        task = asyncio.ensure_future(self._answer_protocol(query['data'][0], query['callback'][0]))
+        self.protocol_tasks.add(task)
+        task.add_done_callback(self.protocol_tasks.discard)
+
+    async def _answer_protocol(self, data, callback):
+        """Отправка подписи по протоколу на callback-сервер клиента"""
+        self.stats['protocol'] += 1
+        if not await self.respond():
+            return
+        async with aiohttp.ClientSession() as session:
+            async with session.post(callback, json={'signature': fake_cms(data)}) as response:
+                await response.read()
+
+    async def handle_root(self, request):
+        """WebSocket NCALayer или проверка доступности"""
+        if request.headers.get('Upgrade', '').lower() == 'websocket':
+            return await self.handle_websocket(request)
+        return web.Response(text='NCALayer simulator')
+
+    async def handle_sign(self, request):
+        """HTTP API: подпись данных"""
+        data = await request.json()
+        if not await self.respond():
+            return web.json_response({'error': 'Simulated failure'}, status=500)
+        return web.json_response({'signature': fake_cms(data['data'])})
+
+    async def handle_sign_many(self, request):
+        """HTTP API: пакетная подпись за одну задержку"""
+        data = await request.json()
+        if not await self.respond():
+            return web.json_response({'error': 'Simulated failure'}, status=500)
+        return web.json_response({'signatures': [fake_cms(item) for item in data['data']]})
+
+    async def handle_keyinfo(self, request):
+        """HTTP API: сведения о ключе"""
+        if not await self.respond():
+            return web.json_response({'error': 'Simulated failure'}, status=500)
+        return web.json_response(KEY_INFO)
+
+    async def handle_websocket(self, request):
+        """Протокол NCALayer: запросы обрабатываются по очереди, как в оригинале"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_str(json.dumps({'result': {'version': '1.4'}}))
+
+        async for message in ws:
+            if message.type != aiohttp.WSMsgType.TEXT:
+                continue
+            try:
+                payload = json.loads(message.data)
+            except ValueError:
+                await ws.send_str(json.dumps({'code': '500', 'message': 'Invalid JSON'}))
+                continue
+            response = await self.process(payload)
+            if self.echo_ids and 'id' in payload:
+                response['id'] = payload['id']
+            await ws.send_str(json.dumps(response, ensure_ascii=False))
+        return ws
+
+    async def process(self, payload):
+        """Выполнение метода модуля NCALayer"""
+        module = payload.get('module')
+        method = payload.get('method')
+        args = payload.get('args') or []
+        if not await self.respond():
+            if module == 'kz.gov.pki.knca.basics':
+                return {'status': False, 'code': '500', 'message': 'Simulated failure'}
+            return {'code': '500', 'message': 'Simulated failure'}
+
+        if module == 'kz.gov.pki.knca.basics' and method == 'sign':
+            # Модуль basics подписывает массив документов одним вызовом
+            data = args['data'] if isinstance(args['data'], list) else [args['data']]
+            signatures = [fake_cms(base64.b64decode(item).decode('utf-8')) for item in data]
+            return {'status': True, 'body': {'result': signatures}}
+
+        if method == 'createCMSSignatureFromBase64':
+            data = base64.b64decode(args[2]).decode('utf-8')
+            return {'code': '200', 'responseObject': fake_cms(data)}
+        if method == 'getKeyInfo':
+            return {'code': '200', 'responseObject': KEY_INFO}
+        if method == 'getActiveTokens':
+            return {'code': '200', 'responseObject': []}
+        return {'code': '500', 'message': f'Unknown method: {method}'}
+
+
+async def run_benchmark(simulator, transport, count, config_path):
+    """Замер подписи через NCALayerClient на работающем заменителе
+
+    Запасной способ (ncalayer://) тоже обслуживает заменитель, поэтому
+    хеджирование измеряется без запуска настоящего NCALayer.
+    """
+    from bot.ncalayer_client import NCALayerClient
+    from config_manager import ConfigManager
+
+    port = simulator.port
+    config = ConfigManager(config_path).config['ncalayer']
+    config.update(port=port, transport=transport, ws_url=f"ws://127.0.0.1:{port}/")
+    client = NCALayerClient(config)
+    client.protocol_opener = simulator.open_protocol_url
+    await client.start()
+
+    latencies = []
+    failures = 0
+    try:
+        for index in range(count):
+            start = time.perf_counter()
+            try:
+                await client.sign_data(f"benchmark-{index}")
+                latencies.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                failures += 1
+    finally:
+        await client.close()
+
+    print("\n" + "=" * 50)
+    print(f"📊 ПОДПИСЬ ЧЕРЕЗ ЗАМЕНИТЕЛЬ NCALAYER ({transport})")
+    print("=" * 50)
+    print(f"Подписей: {len(latencies)}, ошибок: {failures}")
+    if latencies:
+        latencies.sort()
+        print(f"Медиана: {statistics.median(latencies):.2f} мс")
+        print(f"p95: {latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]:.2f} мс")
+        print(f"Максимум: {latencies[-1]:.2f} мс")
+    print(f"Хедж запущен: {client.hedge_rate('fired'):.0%}, победил: {client.hedge_rate('won'):.0%}")
+    print(f"Подписей по протоколу: {simulator.stats['protocol']}")
+
+
+async def main(args):
+    """Запуск заменителя и, при необходимости, замера"""
+    profile = LatencyProfile(
+        kind=args.profile,
+        base=args.latency,
+        spread=args.spread,
+        stall_every=args.stall_every,
+        stall_ms=args.stall_ms,
+        seed=args.seed
+    )
+    simulator = NCALayerSimulator(
+        port=args.port,
+        profile=profile,
+        failure_rate=args.failure_rate,
+        echo_ids=args.echo_ids,
+        seed=args.seed
+    )
+    port = await simulator.start()
+    print(f"🚀 Заменитель NCALayer: http://127.0.0.1:{port}/ и ws://127.0.0.1:{port}/")
+    print(f"Профиль задержки: {args.profile}, доля сбоев: {args.failure_rate:.0%}")
+
+    try:
+        if args.benchmark:
+            await run_benchmark(simulator, args.transport, args.benchmark, args.config)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Локальный заменитель NCALayer')
+    parser.add_argument('--port', type=int, default=13579, help='Порт (0 - любой свободный)')
+    parser.add_argument('--profile', choices=['fixed', 'normal', 'longtail', 'stall'], default='fixed',
+                        help='Распределение задержки ответа')
+    parser.add_argument('--latency', type=float, default=20, help='Базовая задержка (мс)')
+    parser.add_argument('--spread', type=float, default=0.0,
+                        help='Разброс: отклонение для normal (мс), sigma для longtail')
+    parser.add_argument('--stall-every', type=float, default=10.0, help='Период зависаний для stall (сек)')
+    parser.add_argument('--stall-ms', type=float, default=2000, help='Длительность зависания для stall (мс)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Доля ответов с ошибкой (0..1)')
+    parser.add_argument('--echo-ids', action='store_true', help='Возвращать id запроса в ответах WebSocket')
+    parser.add_argument('--seed', type=int, help='Зерно генератора для воспроизводимых замеров')
+    parser.add_argument('--benchmark', type=int, help='Выполнить указанное число подписей и вывести статистику')
+    parser.add_argument('--transport', choices=['http', 'websocket'], default='http',
+                        help='Транспорт клиента при замере')
+    parser.add_argument('--config', default='config.yaml', help='Конфигурация клиента при замере')
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        print("\n⏹ Заменитель NCALayer остановлен")
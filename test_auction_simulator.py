@@ -18,6 +18,13 @@ class AuctionSimulator:
         self.bid_received_time = None
         self.setup_routes()
     
+    @staticmethod
+    def format_timer(seconds_left):
+        """Форматирование оставшегося времени как MM:SS.cc"""
+        minutes, seconds = divmod(int(seconds_left), 60)
+        centiseconds = int((seconds_left % 1) * 100)
+        return f"{minutes:02d}:{seconds:02d}.{centiseconds:02d}"
+    
     def setup_routes(self):
         """Настройка маршрутов симулятора"""
         
@@ -28,8 +35,10 @@ class AuctionSimulator:
             
             # Если аукцион еще не начался
             if not self.auction_start_time or current_time < self.auction_start_time:
-                time_until_start = (self.auction_start_time - current_time).total_seconds() if self.auction_start_time else 0
-                timer_text = f"{int(time_until_start):02d}:{int((time_until_start % 1) * 100):02d}"
+                if self.auction_start_time:
+                    timer_text = self.format_timer((self.auction_start_time - current_time).total_seconds())
+                else:
+                    timer_text = "--:--"
                 button_disabled = "disabled"
                 status = "До начала:"
             else:
@@ -139,7 +148,7 @@ class AuctionSimulator:
                 }
             elif self.auction_start_time:
                 time_left = (self.auction_start_time - current_time).total_seconds()
-                timer_text = f"{int(time_left):02d}:{int((time_left % 1) * 100):02d}"
+                timer_text = self.format_timer(time_left)
                 return {
                     'timer_text': timer_text,
                     'auction_started': False
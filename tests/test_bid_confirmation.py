@@ -0,0 +1,132 @@
+"""
+Тесты подтверждения ставки по событиям страницы
+"""
+import asyncio
+
+import pytest
+
+from bot.bid_confirmation import FRESH_VISIBLE_SCRIPT, MARK_SEEN_SCRIPT, BidConfirmation
+
+
+SELECTORS = {'bid_success': '.bid-confirmed', 'bid_error': '.bid-rejected'}
+
+
+class FakeResponse:
+    """Ответ площадки с телом"""
+
+    def __init__(self, url, body):
+        self.url = url
+        self.body = body
+
+    async def text(self):
+        return self.body
+
+
+class FakePage:
+    """Страница, на которой элементы появляются и показываются по команде теста"""
+
+    def __init__(self):
+        self.handlers = {}
+        # Селектор -> элементы вида {'visible': bool, 'seen': bool}
+        self.elements = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def add(self, selector, visible=True):
+        element = {'visible': visible, 'seen': False}
+        self.elements.setdefault(selector, []).append(element)
+        return element
+
+    def fresh(self, selector):
+        return any(e['visible'] and not e['seen'] for e in self.elements.get(selector, []))
+
+    async def evaluate(self, script, arg):
+        if script == MARK_SEEN_SCRIPT:
+            for selector, elements in self.elements.items():
+                for element in elements:
+                    element['seen'] = selector in arg and element['visible']
+            return None
+        assert script == FRESH_VISIBLE_SCRIPT
+        return self.fresh(arg)
+
+    async def wait_for_function(self, script, arg, polling, timeout):
+        assert script == FRESH_VISIBLE_SCRIPT
+        deadline = asyncio.get_running_loop().time() + timeout / 1000
+        while not self.fresh(arg):
+            if asyncio.get_running_loop().time() > deadline:
+                raise TimeoutError(f"Timeout {timeout}ms exceeded")
+            await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_selector_resolves_immediately():
+    """Результат определяется появлением элемента, без фиксированной паузы"""
+    page = FakePage()
+    confirmation = BidConfirmation(SELECTORS, [], timeout=5000)
+    confirmation.attach(page)
+
+    async def click():
+        asyncio.get_running_loop().call_later(0.02, page.add, '.bid-rejected')
+
+    success, source, elapsed_ms = await confirmation.confirm(click)
+    assert (success, source) == (False, 'selector')
+    assert elapsed_ms < 1000
+    assert confirmation.pending is None
+
+
+@pytest.mark.asyncio
+async def test_network_response_wins():
+    """Ответ площадки на подтверждение учитывается по правилам confirm_triggers"""
+    page = FakePage()
+    rules = [
+        {'url': r'/bid/confirm', 'json_path': 'status', 'equals': 'ACCEPTED'},
+        {'url': r'/bid/confirm', 'json_path': 'status', 'equals': 'REJECTED', 'outcome': 'error'}
+    ]
+    confirmation = BidConfirmation(SELECTORS, rules, timeout=5000)
+    confirmation.attach(page)
+
+    async def click():
+        await page.handlers['response'](FakeResponse('https://auction-site.com/other', '{"status": "ACCEPTED"}'))
+        await page.handlers['response'](FakeResponse('https://auction-site.com/bid/confirm', '{"status": "REJECTED"}'))
+
+    success, source, _ = await confirmation.confirm(click)
+    assert (success, source) == (False, 'response')
+
+
+@pytest.mark.asyncio
+async def test_deadline_checks_success_once():
+    """По истечении срока результат берется разовой проверкой элемента успеха"""
+    page = FakePage()
+    confirmation = BidConfirmation(SELECTORS, [], timeout=50)
+    confirmation.attach(page)
+
+    success, source, elapsed_ms = await confirmation.confirm()
+    assert (success, source) == (False, 'timeout')
+    assert elapsed_ms >= 50
+
+
+@pytest.mark.asyncio
+async def test_elements_present_before_click_ignored():
+    """Скрытый контейнер ошибки и оставшееся сообщение об успехе не решают исход"""
+    page = FakePage()
+    hidden_error = page.add('.bid-rejected', visible=False)
+    page.add('.bid-confirmed')
+    confirmation = BidConfirmation(SELECTORS, [], timeout=100)
+    confirmation.attach(page)
+
+    success, source, _ = await confirmation.confirm()
+    assert (success, source) == (False, 'timeout')
+
+    async def confirmed():
+        page.add('.bid-confirmed')
+
+    success, source, _ = await confirmation.confirm(confirmed)
+    assert (success, source) == (True, 'selector')
+
+    async def click():
+        hidden_error['visible'] = True
+
+    success, source, _ = await confirmation.confirm(click)
+    assert (success, source) == (False, 'selector')
+
@@ -2,7 +2,11 @@
 Тесты для аукционного бота
 """
 import pytest
+import pytest_asyncio
 import asyncio
+import time
+from datetime import datetime
+from bot.direct_submitter import BidOutcomeUnknown
 from bot.auction_bot import AuctionBot
 from config_manager import ConfigManager
 
@@ -10,7 +14,7 @@ from config_manager import ConfigManager
 class TestAuctionBot:
     """Тесты для AuctionBot"""
     
-    @pytest.fixture
+    @pytest_asyncio.fixture
     async def bot(self):
         """Создание экземпляра бота для тестов"""
         config_manager = ConfigManager()
@@ -33,7 +37,122 @@ class TestAuctionBot:
         assert bot.is_timer_expired("00:00") == True
         assert bot.is_timer_expired("время вышло") == True
         assert bot.is_timer_expired("01:30:00") == False
+        assert bot.is_timer_expired("10:00:00") == False
+        assert bot.is_timer_expired("00:00.00") == True
+        assert bot.is_timer_expired("00:09.45") == False
         assert bot.is_timer_expired("") == False
+    
+    @pytest.mark.asyncio
+    async def test_first_trigger_source_wins(self, bot):
+        """Тест фиксации первого источника сигнала начала торгов"""
+        assert bot.evaluate_dom_state({'button_enabled': True}) == True
+        assert bot.evaluate_dom_state({'status_text': 'Ожидание'}) == False
+        
+        bot.on_dom_state({'button_enabled': True})
+        bot.trigger_auction_start('polling')
+        
+        assert bot.auction_started.is_set()
+        assert bot.trigger_source == 'observer'
+    
+    @pytest.mark.asyncio
+    async def test_prediction_follows_extended_countdown(self, bot):
+        """Тест принятия более позднего прогноза после продления отсчета"""
+        bot.update_predicted_start(100.0, 0.1)
+        
+        # Менее точный прогноз в пределах текущего отклоняется
+        bot.update_predicted_start(100.3, 0.5)
+        assert bot.predicted_start == 100.0
+        assert bot.predicted_uncertainty == 0.1
+        
+        # Отсчет продлен на минуту: прежний момент старта больше не действует
+        bot.update_predicted_start(160.0, 0.5)
+        assert bot.predicted_start == 160.0
+        assert bot.predicted_uncertainty == 0.5
+    
+    @pytest.mark.asyncio
+    async def test_stop_interrupts_scheduled_start_wait(self, bot):
+        """Тест прерывания сна до начала торгов остановкой мониторинга"""
+        prepared = []
+        
+        async def sync_scheduled_start():
+            bot.predicted_start = time.monotonic() + 3600
+            return time.time() + 3600
+        
+        async def prepare_for_start():
+            prepared.append(True)
+        
+        bot.sync_scheduled_start = sync_scheduled_start
+        bot.prepare_for_start = prepare_for_start
+        wait = asyncio.ensure_future(bot.wait_for_scheduled_start())
+        await asyncio.sleep(0.05)
+        await bot.stop_monitoring()
+        
+        await asyncio.wait_for(wait, 1)
+        assert not prepared
+    
+    @pytest.mark.asyncio
+    async def test_trigger_interrupts_scheduled_start_wait(self, bot):
+        """Тест выхода из сна до начала торгов по сигналу детектора"""
+        prepared = []
+        
+        async def sync_scheduled_start():
+            bot.predicted_start = time.monotonic() + 3600
+            return time.time() + 3600
+        
+        async def prepare_for_start():
+            prepared.append(True)
+        
+        bot.sync_scheduled_start = sync_scheduled_start
+        bot.prepare_for_start = prepare_for_start
+        wait = asyncio.ensure_future(bot.wait_for_scheduled_start())
+        await asyncio.sleep(0.05)
+        bot.trigger_auction_start('observer')
+        
+        await asyncio.wait_for(wait, 1)
+        assert not prepared
+        assert bot.auction_started.is_set()
+    
+    @pytest.mark.asyncio
+    async def test_prepare_for_start_respects_deadline(self, bot):
+        """Тест прерывания медленной подготовки до прогноза старта"""
+        armed = []
+        
+        async def sync_scheduled_start():
+            bot.predicted_start = time.monotonic() + 0.1 + bot.config['auction']['clock_sync']['arm_margin'] / 1000
+            return time.time()
+        
+        async def arm():
+            await asyncio.sleep(3600)
+            armed.append(True)
+        
+        bot.sync_scheduled_start = sync_scheduled_start
+        bot.arm = arm
+        
+        await asyncio.wait_for(bot.prepare_for_start(), 1)
+        assert not armed
+    
+    @pytest.mark.asyncio
+    async def test_unknown_direct_bid_outcome_stops_retries(self, bot):
+        """Тест остановки повторов после прямой ставки с неизвестным результатом"""
+        async def submit_bid_direct():
+            raise BidOutcomeUnknown("Результат прямого запроса ставки неизвестен")
+        
+        async def wait_for_next_probe(interval):
+            return True
+        
+        async def check_auction_status():
+            return False
+        
+        bot.submit_bid_direct = submit_bid_direct
+        bot.wait_for_next_probe = wait_for_next_probe
+        bot.check_auction_status = check_auction_status
+        bot.start_time = datetime.now()
+        bot.is_monitoring = True
+        
+        await asyncio.wait_for(bot.monitoring_loop(), 1)
+        assert bot.bid_outcome_unknown
+        assert not bot.bid_submitted
+        assert bot.bid_path is None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+"""
+Тесты для синхронизации часов с сервером аукциона
+"""
+import pytest
+import time
+from bot.clock_sync import ClockSync, sleep_until
+
+
+class FakeClockSync(ClockSync):
+    """ClockSync с заранее заданными замерами вместо HTTP-запросов"""
+    
+    def __init__(self, samples):
+        super().__init__({'samples': len(samples)}, 'http://localhost')
+        self.fake_samples = list(samples)
+    
+    async def _sample(self, session):
+        return self.fake_samples.pop(0)
+
+
+class TestClockSync:
+    """Тесты для ClockSync"""
+    
+    @pytest.mark.asyncio
+    async def test_offset_interval_intersection(self):
+        """Тест сужения оценки смещения пересечением интервалов"""
+        clock_sync = FakeClockSync([
+            (1.9, 3.0, 0.1),
+            (2.4, 3.4, 0.05),
+            None
+        ])
+        offset = await clock_sync.synchronize()
+        
+        assert offset == pytest.approx(2.7)
+        assert clock_sync.uncertainty == pytest.approx(0.3)
+        assert clock_sync.rtt == pytest.approx(0.05)
+    
+    @pytest.mark.asyncio
+    async def test_sleep_until_precision(self):
+        """Тест точного пробуждения к заданному моменту"""
+        deadline = time.monotonic() + 0.05
+        await sleep_until(deadline, spin_window=0.02)
+        assert 0 <= time.monotonic() - deadline < 0.01
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
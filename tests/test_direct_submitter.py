@@ -0,0 +1,129 @@
+"""
+Тесты для прямой подачи ставки по HTTP
+"""
+import asyncio
+import json
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from bot.direct_submitter import BidOutcomeUnknown, DirectBidSubmitter
+
+
+class TestDirectBidSubmitter:
+    """Тесты для DirectBidSubmitter"""
+    
+    @pytest_asyncio.fixture
+    async def platform(self):
+        """Локальная площадка с эндпоинтами ставки и подтверждения"""
+        received = {}
+        
+        async def bid(request):
+            received['cookie'] = request.headers.get('Cookie')
+            received['csrf'] = request.headers.get('X-CSRF-Token')
+            if request.query.get('slow'):
+                await asyncio.sleep(1)
+            return web.json_response({'sign': {'data': 'PAYLOAD'}})
+        
+        async def confirm(request):
+            received['confirm'] = await request.json()
+            return web.json_response({'result': 'OK'})
+        
+        app = web.Application()
+        app.router.add_post('/lot/1/bid', bid)
+        app.router.add_post('/lot/1/confirm', confirm)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        yield f"http://127.0.0.1:{port}", received
+        await runner.cleanup()
+    
+    def make_submitter(self, base_url, amount=1000, timeout=5000):
+        """Создание DirectBidSubmitter с записанными запросами"""
+        submitter = DirectBidSubmitter({
+            'amount_path': 'amount',
+            'sign_data_path': 'sign.data',
+            'signature_field': 'payload.signature',
+            'success_contains': 'OK',
+            'timeout': timeout
+        }, price_limit=5000)
+        submitter.recording = {
+            'bid': {
+                'method': 'POST',
+                'url': f"{base_url}/lot/1/bid",
+                'headers': {'content-type': 'application/x-www-form-urlencoded', 'X-CSRF-Token': 'old'},
+                'body': f"lot=1&amount={amount}"
+            },
+            'confirm': {
+                'method': 'POST',
+                'url': f"{base_url}/lot/1/confirm",
+                'headers': {'content-type': 'application/json'},
+                'body': json.dumps({'payload': {'lot': 1, 'signature': ''}})
+            }
+        }
+        return submitter
+    
+    @pytest.mark.asyncio
+    async def test_replay_fills_signature(self, platform):
+        """Тест повтора ставки с подстановкой подписи"""
+        base_url, received = platform
+        submitter = self.make_submitter(base_url)
+        submitter.session = aiohttp.ClientSession(cookie_jar=aiohttp.DummyCookieJar())
+        submitter.cookie_header = 'session=abc'
+        submitter.token_headers = {'X-CSRF-Token': 'fresh'}
+        
+        async def sign(data):
+            return f"SIGNED({data})"
+        
+        try:
+            assert await submitter.submit(sign) == True
+        finally:
+            await submitter.close()
+        
+        assert received['cookie'] == 'session=abc'
+        assert received['csrf'] == 'fresh'
+        assert received['confirm'] == {'payload': {'lot': 1, 'signature': 'SIGNED(PAYLOAD)'}}
+    
+    @pytest.mark.asyncio
+    async def test_unreachable_platform_falls_back(self):
+        """Тест отказа без подачи ставки при недоступной площадке"""
+        submitter = self.make_submitter("http://127.0.0.1:9")
+        submitter.session = aiohttp.ClientSession()
+        try:
+            assert await submitter.submit(None) == False
+        finally:
+            await submitter.close()
+
+    
+    @pytest.mark.asyncio
+    async def test_amount_above_limit_not_sent(self, platform):
+        """Тест отказа от повтора, если записанная сумма выше лимита или неизвестна"""
+        base_url, received = platform
+        submitter = self.make_submitter(base_url, amount=9000)
+        submitter.session = aiohttp.ClientSession()
+        try:
+            assert await submitter.submit(None) == False
+            submitter.recording['bid']['body'] = 'lot=1'
+            assert await submitter.submit(None) == False
+        finally:
+            await submitter.close()
+        assert 'cookie' not in received
+    
+    @pytest.mark.asyncio
+    async def test_timeout_after_send_raises(self, platform):
+        """Тест таймаута после отправки: ставка могла быть принята, переход к браузеру запрещен"""
+        base_url, received = platform
+        submitter = self.make_submitter(base_url, timeout=100)
+        submitter.recording['bid']['url'] += '?slow=1'
+        submitter.session = aiohttp.ClientSession()
+        try:
+            with pytest.raises(BidOutcomeUnknown, match="неизвестен"):
+                await submitter.submit(None)
+        finally:
+            await submitter.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,55 @@
+"""
+Тесты кэша элементов конвейера ставки
+"""
+import asyncio
+
+import pytest
+
+from bot.element_cache import ElementCache
+
+
+class FakeHandle:
+    """Элемент, который может оказаться вне текущего документа"""
+
+    def __init__(self, connected=True):
+        self.connected = connected
+
+    async def evaluate(self, script, *args):
+        if not self.connected:
+            raise Exception("Element is not attached to the DOM")
+        return True
+
+
+class FakePage:
+    """Страница с новым элементом для каждого поиска"""
+
+    def __init__(self):
+        self.main_frame = object()
+        self.queries = []
+
+    async def evaluate(self, script):
+        return None
+
+    async def query_selector(self, selector):
+        self.queries.append(selector)
+        return FakeHandle()
+
+
+@pytest.mark.asyncio
+async def test_navigation_keeps_connected_elements():
+    """Навигация внутри документа не сбрасывает живые элементы, старые - переразрешаются"""
+    page = FakePage()
+    cache = ElementCache(page, {'bid_button': 'button.bid', 'confirm_button': 'button[type="submit"]'})
+    cache.armed_names = ['bid_button', 'confirm_button']
+    live = FakeHandle()
+    stale = FakeHandle(connected=False)
+    cache.handles = {'bid_button': live, 'confirm_button': stale}
+
+    cache._on_navigated(page.main_frame)
+    await asyncio.gather(*cache.tasks)
+
+    assert cache.handles['bid_button'] is live
+    assert cache.handles['confirm_button'] is not stale
+    assert page.queries == ['button[type="submit"]']
+    assert not cache.tasks
+    await cache.close()
@@ -0,0 +1,113 @@
+"""
+Тесты распределения лотов по воркерам
+"""
+import queue
+
+import pytest
+
+from bot.lot_coordinator import LotCoordinator, WorkerHandle
+from config_manager import ConfigManager
+
+
+@pytest.fixture
+def coordinator():
+    """Координатор с тремя лотами и двумя воркерами без процессов"""
+    config_manager = ConfigManager()
+    config_manager.config['lots'] = [
+        {'url': 'https://auction-site.com/lot/1'},
+        {'url': 'https://auction-site.com/lot/2'},
+        {'url': 'https://auction-site.com/lot/3'}
+    ]
+    config_manager.config['sharding']['workers'] = 2
+    coordinator = LotCoordinator(config_manager)
+    for worker_id in range(2):
+        coordinator.workers[worker_id] = WorkerHandle(worker_id, None, queue.Queue())
+    return coordinator
+
+
+def heartbeat(worker_id, loop_lag_ms, lots):
+    """Пульс воркера"""
+    return {
+        'type': 'heartbeat',
+        'worker': worker_id,
+        'loop_lag_ms': loop_lag_ms,
+        'lots': {name: {'state': state, 'probe_ms': 5.0, 'late_ms': 1.0} for name, state in lots.items()}
+    }
+
+
+def test_lot_names_and_worker_count(coordinator):
+    """Лотам без имени назначаются имена, воркеров не больше лотов"""
+    assert list(coordinator.lots) == ['#1', '#2', '#3']
+    assert coordinator.worker_count == 2
+
+    coordinator.settings['workers'] = 8
+    assert coordinator.worker_count == 3
+
+
+def test_saturated_worker_is_relieved(coordinator):
+    """С перегруженного воркера переносится лот, далекий от старта"""
+    busy, idle = coordinator.workers[0], coordinator.workers[1]
+    for name in coordinator.lots:
+        coordinator.assign(name, busy)
+    busy.commands = queue.Queue()
+
+    lots = {'#1': 'final', '#2': 'waiting', '#3': 'watching'}
+    for _ in range(coordinator.settings['saturation_beats']):
+        coordinator.handle_event(heartbeat(0, 500, lots))
+
+    command, moved = busy.commands.get_nowait()
+    assert command == 'remove'
+    assert moved == '#2'
+    assert moved not in busy.lots
+    assert idle.commands.get_nowait() == ('add', coordinator.lots[moved])
+    assert idle.lots == {moved}
+    assert '#1' in busy.lots
+    assert '#3' in busy.lots
+
+
+def test_finished_lots(coordinator):
+    """Мониторинг завершается, когда все лоты завершены"""
+    coordinator.assign('#1', coordinator.workers[0])
+    coordinator.assign('#2', coordinator.workers[0])
+    coordinator.assign('#3', coordinator.workers[1])
+
+    coordinator.handle_event(heartbeat(0, 0, {'#1': 'done', '#2': 'failed'}))
+    assert not coordinator.all_finished()
+
+    coordinator.handle_event(heartbeat(1, 0, {'#3': 'done'}))
+    assert coordinator.all_finished()
+
+
+class FakeProcess:
+    """Процесс воркера с заданным состоянием"""
+
+    def __init__(self, alive):
+        self.alive = alive
+        self.terminated = False
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.terminated = True
+
+
+def test_lots_near_start_not_reassigned(coordinator, monkeypatch):
+    """Лоты у старта и в ставке не передаются новому воркеру"""
+    stalled, dead = coordinator.workers[0], coordinator.workers[1]
+    stalled.process, dead.process = FakeProcess(alive=True), FakeProcess(alive=False)
+    coordinator.assign('#1', stalled)
+    coordinator.assign('#2', dead)
+    coordinator.assign('#3', dead)
+    coordinator.handle_event(heartbeat(0, 0, {'#1': 'final'}))
+    coordinator.handle_event(heartbeat(1, 0, {'#2': 'bidding', '#3': 'watching'}))
+    stalled.last_heartbeat = dead.last_heartbeat = 0
+
+    replacement = WorkerHandle(2, FakeProcess(alive=True), queue.Queue())
+    monkeypatch.setattr(coordinator, 'start_worker', lambda: replacement)
+    coordinator.check_workers()
+
+    assert not stalled.process.terminated
+    assert 0 in coordinator.workers
+    assert coordinator.lot_metrics['#2']['state'] == 'failed'
+    assert replacement.lots == {'#3'}
@@ -0,0 +1,196 @@
+"""
+Тесты мониторинга нескольких лотов
+"""
+import asyncio
+import time
+
+import pytest
+
+from bot.multi_lot import LotState, MultiLotEngine
+from config_manager import ConfigManager
+
+
+@pytest.fixture
+def config_manager():
+    """Конфигурация с двумя лотами"""
+    config_manager = ConfigManager()
+    config_manager.config['lots'] = [
+        {'name': 'A', 'url': 'https://auction-site.com/lot/1', 'price_limit': 500},
+        {'url': 'https://auction-site.com/lot/2', 'selectors': {'timer': '#timer'}}
+    ]
+    return config_manager
+
+
+def test_for_lot_overrides_auction(config_manager):
+    """Параметры лота накладываются на общий раздел auction"""
+    lot_config = config_manager.for_lot(config_manager.config['lots'][1]).config
+
+    assert lot_config['auction']['url'] == 'https://auction-site.com/lot/2'
+    assert lot_config['auction']['selectors']['timer'] == '#timer'
+    assert lot_config['auction']['selectors']['status'] == '.auction-status'
+    assert lot_config['lots'] == []
+    assert config_manager.config['auction']['selectors']['timer'] == '.auction-timer'
+
+
+def test_for_lot_direct_http_needs_own_recording(config_manager):
+    """Прямая подача лота работает только со своей записью запроса ставки"""
+    config_manager.config['direct_http']['enabled'] = True
+    config_manager.config['lots'][1]['direct_http'] = {'recording_file': 'bid_requests_2.json'}
+
+    shared = config_manager.for_lot(config_manager.config['lots'][0]).config['direct_http']
+    own = config_manager.for_lot(config_manager.config['lots'][1]).config
+
+    assert not shared['enabled']
+    assert own['direct_http']['enabled']
+    assert own['direct_http']['recording_file'] == 'bid_requests_2.json'
+    assert 'direct_http' not in own['auction']
+    assert config_manager.config['direct_http']['recording_file'] == 'bid_requests.json'
+
+
+@pytest.mark.asyncio
+async def test_lot_phases(config_manager):
+    """Фаза опроса определяется прогнозом старта"""
+    engine = MultiLotEngine(config_manager)
+    lot = engine.lots[0]
+
+    assert lot.name == 'A'
+    assert engine.lots[1].name == '#2'
+    assert lot.bot.config['auction']['price_limit'] == 500
+    assert lot.bot.ncalayer_client is engine.lots[1].bot.ncalayer_client
+
+    assert engine._phase(lot) == LotState.WATCHING
+
+    lot.bot.predicted_start = time.monotonic() + 60
+    assert engine._phase(lot) == LotState.WAITING
+
+    lot.bot.predicted_start = time.monotonic() + 1
+    assert engine._phase(lot) == LotState.FINAL
+    engine._set_state(lot, LotState.FINAL)
+    assert engine._next_probe_at(lot) <= lot.bot.predicted_start
+
+    lot.bot.predicted_start = time.monotonic() - 60
+    assert engine._phase(lot) == LotState.WATCHING
+
+
+@pytest.mark.asyncio
+async def test_final_lot_probed_first(config_manager):
+    """Пробы, назначенные на один момент, начинаются с лота в финальной фазе"""
+    engine = MultiLotEngine(config_manager)
+    watching, final = engine.lots
+    engine._set_state(watching, LotState.WATCHING)
+    engine._set_state(final, LotState.FINAL)
+
+    at = time.monotonic()
+    engine._schedule(watching, at)
+    engine._schedule(final, at)
+
+    assert engine.queue[0][3] is final
+
+
+@pytest.mark.asyncio
+async def test_first_replica_claims_bid(config_manager, monkeypatch):
+    """Ставку подает реплика, обнаружившая старт первой; остальные ждут"""
+    config_manager.config['lots'] = [{'name': 'A', 'url': 'https://auction-site.com/lot/1', 'replicas': 3}]
+    engine = MultiLotEngine(config_manager)
+    first, second, third = engine.lots
+    assert [lot.label for lot in engine.lots] == ['A/1', 'A/2', 'A/3']
+
+    bids = []
+
+    async def fake_bid(lot):
+        bids.append(lot.label)
+
+    monkeypatch.setattr(engine, '_bid', fake_bid)
+    for lot in engine.lots:
+        engine._set_state(lot, LotState.FINAL)
+
+    second.bot.trigger_auction_start('observer')
+    first.bot.trigger_auction_start('polling')
+    engine._start_bids()
+    await asyncio.sleep(0)
+
+    assert bids == ['A/2']
+    assert second.state == LotState.BIDDING
+    assert first.state == LotState.STANDBY
+    assert third.state == LotState.STANDBY
+    assert engine.metrics()['A']['state'] == LotState.BIDDING
+
+    result = second.token.race_result()
+    assert result['winner'] == 'A/2'
+    assert result['margin_ms'] > 0
+    assert 'A/3' not in result['detections']
+
+
+@pytest.mark.asyncio
+async def test_unknown_bid_outcome_stops_retries(config_manager):
+    """После ставки с неизвестным результатом лот не возвращается к опросу"""
+    config_manager.config['lots'] = [{'name': 'A', 'url': 'https://auction-site.com/lot/1', 'replicas': 2}]
+    engine = MultiLotEngine(config_manager)
+    first, second = engine.lots
+
+    async def submit_bid():
+        first.bot.bid_outcome_unknown = True
+
+    first.bot.submit_bid = submit_bid
+    engine._set_state(first, LotState.BIDDING)
+    engine._set_state(second, LotState.STANDBY)
+    first.bot.trigger_auction_start('observer')
+    await engine._bid(first)
+
+    assert first.state == LotState.FAILED
+    assert second.state == LotState.FAILED
+    assert first.bot.auction_started.is_set()
+    assert first.token.finished
+
+
+@pytest.mark.asyncio
+async def test_spin_only_for_probe_at_predicted_start(config_manager, monkeypatch):
+    """Плотный цикл ожидания - только для пробы в прогнозируемый момент старта"""
+    engine = MultiLotEngine(config_manager)
+    lot = engine.lots[0]
+    spins = []
+
+    async def fake_sleep_until(deadline, spin_window):
+        spins.append(deadline)
+
+    monkeypatch.setattr('bot.multi_lot.sleep_until', fake_sleep_until)
+    engine._set_state(lot, LotState.FINAL)
+    lot.bot.predicted_start = time.monotonic() + 0.05
+
+    engine._schedule(lot, time.monotonic() + 0.01)
+    engine.wakeup.clear()
+    assert not engine._aims_at_start(engine.queue[0])
+    assert not await engine._wait(engine.queue[0][0], engine._aims_at_start(engine.queue[0]))
+    assert spins == []
+
+    engine.queue.clear()
+    engine._schedule(lot, lot.bot.predicted_start)
+    engine.wakeup.clear()
+    assert engine._aims_at_start(engine.queue[0])
+    await engine._wait(engine.queue[0][0], True)
+    assert spins == [lot.bot.predicted_start]
+
+
+@pytest.mark.asyncio
+async def test_loading_lot_does_not_hold_probe_slot(config_manager, monkeypatch):
+    """Загрузка страницы лота не занимает слот проб"""
+    engine = MultiLotEngine(config_manager)
+    loading = engine.lots[0]
+    page_requested = asyncio.Event()
+    release_page = asyncio.Event()
+
+    class SlowBrowser:
+        async def new_page(self):
+            page_requested.set()
+            await release_page.wait()
+            raise RuntimeError("страница не нужна")
+
+    engine.browser = SlowBrowser()
+    engine.settings['max_parallel_probes'] = 1
+    engine.probe_slots = asyncio.Semaphore(1)
+    load_task = asyncio.ensure_future(engine._load(loading))
+    await page_requested.wait()
+
+    assert not engine.probe_slots.locked()
+    release_page.set()
+    await load_task
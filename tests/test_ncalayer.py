@@ -2,21 +2,38 @@
 Тесты для NCALayerClient
 """
 import pytest
+import pytest_asyncio
 import asyncio
+from aiohttp import web
 from bot.ncalayer_client import NCALayerClient
 
 
 class TestNCALayerClient:
     """Тесты для NCALayerClient"""
     
-    @pytest.fixture
+    @pytest_asyncio.fixture
     async def ncalayer_client(self):
         """Создание клиента для тестов"""
         config = {
             'port': 13579,
             'storage': 'PKCS12',
             'password': '',
-            'timeout': 30000
+            'timeout': 30000,
+            'hedge_delay': 50,
+            'hedge_fallback_delay': 1000,
+            'health': {
+                'enabled': True,
+                'interval': 5,
+                'window': 200,
+                'latency_budget': 1000,
+                'failure_threshold': 3,
+                'reset_timeout': 10
+            },
+            'ping_interval': 15,
+            'transport': 'http',
+            'ws_url': 'wss://127.0.0.1:13579/',
+            'callback_port': 0,
+            'batch_window': 0
         }
         client = NCALayerClient(config)
         yield client
@@ -33,10 +50,203 @@ class TestNCALayerClient:
         
         # Имитируем callback запрос
         test_signature = "test_signature"
-        await ncalayer_client.handle_callback({
+        future = asyncio.get_running_loop().create_future()
+        ncalayer_client.pending_callbacks['current'] = future
+        await ncalayer_client.handle_callback('stale', {
+            'signature': 'stale_signature'
+        })
+        assert not future.done()
+        await ncalayer_client.handle_callback('current', {
             'signature': test_signature
         })
         
         # Проверяем, что подпись получена
-        assert ncalayer_client.received_signature == test_signature
-        assert ncalayer_client.signature_received.is_set()
+        assert future.result() == test_signature
+    
+    @pytest.mark.asyncio
+    async def test_hedged_signing(self, ncalayer_client):
+        """Тест хеджирования: медленный HTTP проигрывает запасному способу"""
+        http_cancelled = asyncio.Event()
+        
+        async def slow_http(data):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                http_cancelled.set()
+                raise
+        
+        async def fast_protocol(data):
+            return "protocol_signature"
+        
+        ncalayer_client._sign_via_http = slow_http
+        ncalayer_client._sign_via_protocol = fast_protocol
+        
+        assert await ncalayer_client.sign_data("data") == "protocol_signature"
+        await asyncio.sleep(0)
+        assert http_cancelled.is_set()
+        assert ncalayer_client.hedge_rate('fired') == 1.0
+        assert ncalayer_client.hedge_rate('won') == 1.0
+    
+    @pytest.mark.asyncio
+    async def test_hedge_delay_p95(self, ncalayer_client):
+        """Тест расчета задержки хеджирования по истории HTTP"""
+        ncalayer_client.config['hedge_delay'] = 'p95'
+        assert ncalayer_client.hedge_delay() == 1.0
+        
+        ncalayer_client.primary_latencies.extend([0.01] * 19 + [0.5])
+        assert ncalayer_client.hedge_delay() == 0.5
+    
+    @pytest.mark.asyncio
+    async def test_pooled_session(self, ncalayer_client):
+        """Тест пинга и подписи через одно keep-alive соединение"""
+        peers = set()
+        
+        async def ping(request):
+            peers.add(request.transport.get_extra_info('peername'))
+            return web.Response(text='OK')
+        
+        async def sign(request):
+            peers.add(request.transport.get_extra_info('peername'))
+            return web.json_response({'signature': 'http_signature'})
+        
+        app = web.Application()
+        app.router.add_get('/', ping)
+        app.router.add_post('/sign', sign)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, 'localhost', 0)
+        await site.start()
+        ncalayer_client.config['port'] = site._server.sockets[0].getsockname()[1]
+        try:
+            await ncalayer_client.start()
+            assert ncalayer_client.ping_task is not None
+            assert await ncalayer_client._sign_via_http('data') == 'http_signature'
+            assert await ncalayer_client._sign_via_http('data') == 'http_signature'
+            assert len(peers) == 1
+            
+            await ncalayer_client.close()
+            assert ncalayer_client.ping_task is None
+            assert ncalayer_client.session is None
+        finally:
+            await runner.cleanup()
+    
+    @pytest.mark.asyncio
+    async def test_warm_up(self, ncalayer_client):
+        """Тест прогрева: сведения о ключе кэшируются, повтор в интервале пропускается"""
+        calls = []
+        
+        async def key_info():
+            calls.append('key_info')
+            return {'alias': 'test_key'}
+        
+        async def sign(data):
+            calls.append('sign')
+            return "warm_signature"
+        
+        ncalayer_client._get_key_info = key_info
+        ncalayer_client._sign_primary = sign
+        
+        assert await ncalayer_client.warm_up()
+        assert await ncalayer_client.warm_up()
+        
+        assert calls == ['key_info', 'sign', 'sign']
+        assert ncalayer_client.key_info == {'alias': 'test_key'}
+        assert len(ncalayer_client.primary_latencies) == 1
+    
+    @pytest.mark.asyncio
+    async def test_protocol_signing_callback(self, ncalayer_client, monkeypatch):
+        """Тест подписи по протоколу: подпись приходит на callback-сервер"""
+        import urllib.parse
+        import webbrowser
+        import aiohttp
+        
+        async def post_signature(callback_url):
+            async with aiohttp.ClientSession() as session:
+                await session.post(callback_url, json={'signature': 'callback_signature'})
+        
+        def open_url(url):
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+            assert query['data'] == ['data & more']
+            asyncio.ensure_future(post_signature(query['callback'][0]))
+        
+        monkeypatch.setattr(webbrowser, 'open', open_url)
+        
+        assert await ncalayer_client._sign_via_protocol('data & more') == 'callback_signature'
+        assert ncalayer_client.pending_callbacks == {}
+    
+    @pytest.mark.asyncio
+    async def test_protocol_ignores_stale_dialog_signature(self, ncalayer_client, monkeypatch):
+        """Тест отбрасывания подписи из диалога отмененного запроса"""
+        import urllib.parse
+        import webbrowser
+        import aiohttp
+        
+        callbacks = []
+        
+        async def post_signatures(callback_url):
+            async with aiohttp.ClientSession() as session:
+                # Пользователь подписал диалог прежнего, уже отмененного запроса
+                await session.post(callbacks[0], json={'signature': 'stale_signature'})
+                await session.post(callback_url, json={'signature': 'current_signature'})
+        
+        def open_url(url):
+            callbacks.append(urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)['callback'][0])
+            if len(callbacks) == 2:
+                asyncio.ensure_future(post_signatures(callbacks[1]))
+        
+        monkeypatch.setattr(webbrowser, 'open', open_url)
+        ncalayer_client.config['timeout'] = 100
+        
+        assert await ncalayer_client._sign_via_protocol('first') is None
+        ncalayer_client.config['timeout'] = 5000
+        assert await ncalayer_client._sign_via_protocol('second') == 'current_signature'
+        assert callbacks[0] != callbacks[1]
+    
+    @pytest.mark.asyncio
+    async def test_circuit_breaker_skips_primary(self, ncalayer_client):
+        """Тест предохранителя: после серии сбоев HTTP не вызывается"""
+        calls = []
+        
+        async def failing_http(data):
+            calls.append('http')
+            return None
+        
+        async def protocol(data):
+            calls.append('protocol')
+            return "protocol_signature"
+        
+        ncalayer_client._sign_via_http = failing_http
+        ncalayer_client._sign_via_protocol = protocol
+        
+        for _ in range(3):
+            assert await ncalayer_client.sign_data("data") == "protocol_signature"
+        assert not ncalayer_client.primary_available()
+        
+        calls.clear()
+        assert await ncalayer_client.sign_data("data") == "protocol_signature"
+        assert calls == ['protocol']
+    
+    @pytest.mark.asyncio
+    async def test_batch_hedged_and_recorded(self, ncalayer_client):
+        """Тест пакетной подписи: медленный пакет хеджируется, сбои учитываются предохранителем"""
+        async def slow_batch(items):
+            await asyncio.sleep(10)
+        
+        async def protocol(data):
+            return f"protocol({data})"
+        
+        original_batch = ncalayer_client._sign_batch
+        ncalayer_client._sign_batch = slow_batch
+        ncalayer_client._sign_via_protocol = protocol
+        
+        signatures = await asyncio.wait_for(ncalayer_client.sign_many(["a", "b"]), timeout=1)
+        assert signatures == ["protocol(a)", "protocol(b)"]
+        assert ncalayer_client.hedge_rate('won') == 1.0
+        
+        # Недоступный NCALayer: каждая пакетная попытка - сбой для предохранителя
+        ncalayer_client._sign_batch = original_batch
+        ncalayer_client.config['port'] = 9
+        for _ in range(3):
+            assert await ncalayer_client._sign_batch(["a", "b"]) is None
+        assert not ncalayer_client.primary_available()
+
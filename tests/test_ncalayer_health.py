@@ -0,0 +1,134 @@
+"""
+Тесты контроля состояния NCALayer
+"""
+import asyncio
+import time
+
+import pytest
+
+from bot.ncalayer_health import CircuitBreaker, LatencyHistogram, NCALayerHealthMonitor
+
+
+HEALTH_CONFIG = {
+    'enabled': True,
+    'interval': 5,
+    'window': 200,
+    'latency_budget': 100,
+    'failure_threshold': 2,
+    'reset_timeout': 10
+}
+
+
+class FakeClient:
+    """Клиент NCALayer с заданной историей подписей"""
+
+    def __init__(self, sign_p95=None):
+        self.sign_p95 = sign_p95
+        self.primary_in_flight = 0
+        self.pings = 0
+
+    async def ping_primary(self):
+        self.pings += 1
+        return 5
+
+    def primary_percentile(self, percent):
+        return self.sign_p95
+
+
+def test_latency_histogram():
+    """Гистограмма считает замеры по корзинам в пределах окна"""
+    histogram = LatencyHistogram(window=3)
+    for latency_ms in (1, 30, 7000, 40):
+        histogram.add(latency_ms)
+
+    assert len(histogram) == 3
+    assert histogram.percentile(50) == 40
+    buckets = histogram.buckets()
+    assert buckets['<=50'] == 2
+    assert buckets['>5000'] == 1
+    assert buckets['<=5'] == 0
+
+
+def test_circuit_breaker_cycle():
+    """Предохранитель размыкается после серии сбоев и пробует снова после паузы"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record(False)
+    assert breaker.state == 'closed'
+    breaker.record(False)
+    assert breaker.state == 'open'
+    assert not breaker.allow_request()
+
+    breaker.opened_at = time.monotonic() - 10
+    assert breaker.state == 'half_open'
+    assert breaker.allow_request()
+
+    # Неудачная проба снова размыкает предохранитель
+    breaker.record(False)
+    assert breaker.state == 'open'
+
+    breaker.opened_at = time.monotonic() - 10
+    breaker.record(True)
+    assert breaker.state == 'closed'
+
+
+def test_half_open_allows_single_trial():
+    """В half_open к основному способу пропускается только одна проба"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record(False)
+    breaker.opened_at = time.monotonic() - 10
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # Пропавшая проба не держит предохранитель вечно
+    breaker.trial_started = time.monotonic() - 10
+    assert breaker.allow_request()
+
+    breaker.record(True)
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+@pytest.mark.asyncio
+async def test_ping_skipped_while_signing():
+    """Пинг не встает в очередь NCALayer перед выполняющейся подписью"""
+    client = FakeClient()
+    monitor = NCALayerHealthMonitor(client, dict(HEALTH_CONFIG, interval=0.01))
+    client.primary_in_flight = 1
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        assert client.pings == 0
+
+        client.primary_in_flight = 0
+        await asyncio.sleep(0.05)
+        assert client.pings > 0
+    finally:
+        await monitor.stop()
+
+
+@pytest.mark.asyncio
+async def test_warning_sent_once_per_incident():
+    """Предупреждение уходит при переходе в неисправное состояние и перед торгами"""
+    messages = []
+
+    async def notify(message):
+        messages.append(message)
+
+    client = FakeClient(sign_p95=250)
+    monitor = NCALayerHealthMonitor(client, HEALTH_CONFIG, on_warning=notify)
+
+    assert await monitor.check()
+    assert await monitor.check()
+    assert len(messages) == 1
+    assert 'p95 подписи 250 мс' in messages[0]
+
+    await monitor.check(force=True)
+    assert len(messages) == 2
+
+    client.sign_p95 = 20
+    assert await monitor.check() == []
+    monitor.record(None)
+    monitor.record(None)
+    assert 'не отвечает' in (await monitor.check())[0]
+    assert len(messages) == 3
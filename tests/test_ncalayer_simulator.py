@@ -0,0 +1,103 @@
+"""
+Тесты заменителя NCALayer и клиента против него
+"""
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from bot.ncalayer_client import NCALayerClient
+from config_manager import ConfigManager
+from ncalayer_simulator import LatencyProfile, NCALayerSimulator, fake_cms
+
+
+@pytest_asyncio.fixture
+async def simulator():
+    """Заменитель NCALayer на свободном порту"""
+    simulator = NCALayerSimulator(port=0, profile=LatencyProfile('fixed', base=5), seed=1)
+    await simulator.start()
+    yield simulator
+    await simulator.stop()
+
+
+def make_client(port, transport):
+    """Клиент с конфигурацией по умолчанию, направленный на заменитель"""
+    config = ConfigManager().config['ncalayer']
+    config.update(port=port, transport=transport, ws_url=f"ws://127.0.0.1:{port}/", timeout=2000)
+    return NCALayerClient(config)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('transport', ['http', 'websocket'])
+async def test_sign_through_simulator(simulator, transport):
+    """Подпись через HTTP и WebSocket возвращает детерминированную CMS"""
+    client = make_client(simulator.port, transport)
+    await client.start()
+    try:
+        assert await client.sign_data("lot-1") == fake_cms("lot-1")
+        assert await client.warm_up()
+        assert client.key_info['alias'] == 'simulator-key'
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_failures_are_reported(simulator):
+    """При доле сбоев 100% основной способ не возвращает подпись"""
+    simulator.failure_rate = 1.0
+    client = make_client(simulator.port, 'websocket')
+    await client.start()
+    try:
+        assert await client._sign_primary("lot-1") is None
+        assert simulator.stats['failures'] == 1
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('transport', ['http', 'websocket'])
+async def test_concurrent_requests_coalesced(simulator, transport):
+    """Одновременные запросы подписи уходят одним пакетным вызовом"""
+    client = make_client(simulator.port, transport)
+    client.config['batch_window'] = 5
+    await client.start()
+    try:
+        lots = [f"lot-{index}" for index in range(3)]
+        signatures = await asyncio.gather(*(client.sign_data(lot) for lot in lots))
+        assert signatures == [fake_cms(lot) for lot in lots]
+        assert simulator.stats['requests'] == 1
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_hedge_served_by_simulated_protocol(simulator, monkeypatch):
+    """Запасной способ обслуживает заменитель, настоящий ncalayer:// не открывается"""
+    import webbrowser
+
+    opened = []
+    monkeypatch.setattr(webbrowser, 'open', opened.append)
+    client = make_client(simulator.port, 'http')
+    client.config['hedge_delay'] = 0
+    client.protocol_opener = simulator.open_protocol_url
+    await client.start()
+    try:
+        assert await client._sign_via_protocol("lot-1") == fake_cms("lot-1")
+        assert simulator.stats['protocol'] == 1
+        assert opened == []
+    finally:
+        await client.close()
+
+
+def test_latency_profiles():
+    """Профили задержки воспроизводимы при одном зерне"""
+    assert LatencyProfile('fixed', base=20).next_delay() == 0.02
+
+    first = [LatencyProfile('longtail', base=20, spread=1.0, seed=7).next_delay() for _ in range(3)]
+    second = [LatencyProfile('longtail', base=20, spread=1.0, seed=7).next_delay() for _ in range(3)]
+    assert first == second
+
+    stall = LatencyProfile('stall', base=10, stall_every=60, stall_ms=1000)
+    stall.started = time.monotonic() - 0.5
+    assert 0.4 < stall.next_delay() < 0.6
@@ -0,0 +1,112 @@
+"""
+Тесты WebSocket-транспорта NCALayer
+"""
+import asyncio
+import json
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from bot.ncalayer_transport import NCALayerWebSocket
+
+
+@pytest_asyncio.fixture
+async def ncalayer_ws():
+    """Локальный WebSocket-сервер: эхо аргумента с задержкой из запроса"""
+    connections = []
+    
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connections.append(ws)
+        await ws.send_str(json.dumps({'result': {'version': '1.4'}}))
+        
+        async def answer(message):
+            data = json.loads(message)
+            await asyncio.sleep(data['delay'])
+            response = {'code': '200', 'responseObject': data['args'][0]}
+            if data.get('with_id'):
+                response['id'] = data['id']
+            await ws.send_str(json.dumps(response))
+        
+        async for message in ws:
+            if message.type == aiohttp.WSMsgType.TEXT:
+                data = json.loads(message.data)
+                if data.get('with_id'):
+                    asyncio.ensure_future(answer(message.data))
+                else:
+                    await answer(message.data)
+        return ws
+    
+    app = web.Application()
+    app.router.add_get('/', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    session = aiohttp.ClientSession()
+    transport = NCALayerWebSocket(f"ws://127.0.0.1:{port}/", session, reconnect_delay=0.05)
+    yield transport, connections
+    await transport.close()
+    await session.close()
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_responses_routed_by_id(ncalayer_ws):
+    """Параллельные запросы получают свои ответы независимо от порядка"""
+    transport, connections = ncalayer_ws
+    assert await transport.start()
+    
+    slow = transport.request({'args': ['slow'], 'delay': 0.1, 'with_id': True}, timeout=5)
+    fast = transport.request({'args': ['fast'], 'delay': 0.01, 'with_id': True}, timeout=5)
+    slow_response, fast_response = await asyncio.gather(slow, fast)
+    
+    assert slow_response['responseObject'] == 'slow'
+    assert fast_response['responseObject'] == 'fast'
+    assert transport.latency_summary()['count'] == 2
+
+
+@pytest.mark.asyncio
+async def test_responses_without_id_fifo(ncalayer_ws):
+    """Ответы без id отдаются запросам в порядке отправки"""
+    transport, connections = ncalayer_ws
+    assert await transport.start()
+    
+    responses = await asyncio.gather(*(
+        transport.request({'args': [str(index)], 'delay': 0}, timeout=5) for index in range(3)
+    ))
+    
+    assert [response['responseObject'] for response in responses] == ['0', '1', '2']
+
+
+@pytest.mark.asyncio
+async def test_reconnect(ncalayer_ws):
+    """После разрыва соединение восстанавливается автоматически"""
+    transport, connections = ncalayer_ws
+    assert await transport.start()
+    
+    await connections[0].close()
+    await asyncio.sleep(0.2)
+    
+    response = await transport.request({'args': ['again'], 'delay': 0}, timeout=5)
+    assert response['responseObject'] == 'again'
+    assert transport.reconnects == 1
+
+
+@pytest.mark.asyncio
+async def test_abandoned_reply_not_misrouted(ncalayer_ws):
+    """Поздний ответ на отмененный запрос не достается следующему запросу"""
+    transport, connections = ncalayer_ws
+    assert await transport.start()
+    
+    abandoned = asyncio.ensure_future(transport.request({'args': ['lot-A'], 'delay': 0.2}, timeout=5))
+    await asyncio.sleep(0.05)
+    abandoned.cancel()
+    
+    response = await transport.request({'args': ['lot-B'], 'delay': 0}, timeout=5)
+    assert response['responseObject'] == 'lot-B'
+    assert not transport.abandoned
@@ -0,0 +1,50 @@
+"""
+Тесты для сетевого детектора начала торгов
+"""
+import pytest
+from bot.network_detector import NetworkMatcher, NetworkDetector, extract_json_path
+
+
+class TestNetworkDetector:
+    """Тесты для NetworkDetector"""
+    
+    def test_json_path_extraction(self):
+        """Тест извлечения значения по JSON-пути"""
+        data = {'data': {'lots': [{'status': 'started'}]}}
+        assert extract_json_path(data, 'data.lots[0].status') == 'started'
+        assert extract_json_path(data, 'data.lots.1.status') is None
+        assert extract_json_path(data, 'data.missing') is None
+    
+    def test_matcher_rules(self):
+        """Тест правил сопоставления URL и содержимого"""
+        matcher = NetworkMatcher({
+            'source': 'websocket',
+            'url': r'/ws/lot/123',
+            'json_path': 'status',
+            'equals': 'STARTED'
+        })
+        assert matcher.matches_url('wss://auction-site.com/ws/lot/123')
+        assert not matcher.matches_url('wss://auction-site.com/ws/lot/456')
+        assert matcher.matches_payload('{"status": "STARTED"}')
+        assert not matcher.matches_payload('{"status": "WAITING"}')
+        
+        socket_io = NetworkMatcher({'url': 'socket.io', 'json_path': '[1].status', 'equals': 'STARTED'})
+        assert socket_io.matches_payload('42["update", {"status": "STARTED"}]')
+        
+        substring = NetworkMatcher({'url': r'/api/lot', 'contains': 'AUCTION_OPEN'})
+        assert substring.matches_payload('event=AUCTION_OPEN')
+        assert not substring.matches_payload('event=AUCTION_WAIT')
+    
+    def test_trigger_reports_source(self):
+        """Тест вызова общего триггера с указанием источника"""
+        fired = []
+        detector = NetworkDetector(
+            [{'source': 'response', 'url': 'lot', 'json_path': 'open'}],
+            fired.append
+        )
+        detector._check(detector.matchers, b'{"open": true}', 'response')
+        assert fired == ['response']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
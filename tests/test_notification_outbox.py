@@ -0,0 +1,81 @@
+"""
+Тесты очереди уведомлений
+"""
+import asyncio
+import time
+
+import pytest
+from telegram.error import RetryAfter
+
+from utils.notification_outbox import MAX_MESSAGE_LENGTH, NotificationOutbox, coalesce
+
+
+OUTBOX_CONFIG = {
+    'queue_size': 100,
+    'coalesce_window': 20,
+    'min_interval': 0,
+    'max_retries': 3,
+    'retry_delay': 10
+}
+
+
+class FakeNotifier:
+    """Уведомитель, запоминающий сообщения; первые ответы могут быть ошибками"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+        self.closed = False
+
+    async def start(self):
+        pass
+
+    async def send_message(self, message):
+        await asyncio.sleep(0.05)
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_coalesce_respects_length_limit():
+    """Серия сообщений склеивается, не превышая ограничение Telegram"""
+    assert coalesce(['a', 'b']) == ['a\n\nb']
+    texts = coalesce(['x' * 3000, 'y' * 3000, 'z'])
+    assert texts == ['x' * 3000, 'y' * 3000 + '\n\nz']
+    assert all(len(text) <= MAX_MESSAGE_LENGTH for text in coalesce(['w' * 5000]))
+
+
+@pytest.mark.asyncio
+async def test_post_does_not_wait_and_coalesces():
+    """post() возвращается сразу, серия уходит одним сообщением"""
+    notifier = FakeNotifier()
+    outbox = NotificationOutbox(notifier, OUTBOX_CONFIG)
+
+    start = time.perf_counter()
+    outbox.post("⚡ Начало торгов")
+    outbox.post("✅ Ставка подана")
+    assert time.perf_counter() - start < 0.01
+    assert notifier.sent == []
+
+    await outbox.close()
+    assert notifier.sent == ["⚡ Начало торгов\n\n✅ Ставка подана"]
+    assert notifier.closed
+
+    outbox.post("после закрытия")
+    assert outbox.task is None
+
+
+@pytest.mark.asyncio
+async def test_retry_after_and_backoff():
+    """После RetryAfter и сетевой ошибки сообщение доставляется повтором"""
+    notifier = FakeNotifier(errors=[RetryAfter(0), ConnectionError("сеть недоступна")])
+    outbox = NotificationOutbox(notifier, OUTBOX_CONFIG)
+
+    outbox.post("ставка")
+    await outbox.close()
+
+    assert notifier.sent == ["ставка"]
+    assert outbox.stats == {'sent': 1, 'failed': 0, 'dropped': 0}
@@ -0,0 +1,45 @@
+"""
+Тесты для блокировки лишних запросов
+"""
+import pytest
+from bot.request_blocker import RequestBlocker
+
+
+class TestRequestBlocker:
+    """Тесты для RequestBlocker"""
+    
+    def test_lean_preset_rules(self):
+        """Тест правил встроенного набора lean и пользовательских шаблонов"""
+        blocker = RequestBlocker({'preset': 'lean', 'url_patterns': [r'/chat-widget/']})
+        
+        assert blocker.enabled
+        assert blocker.should_block('image', 'https://auction-site.com/logo.png')
+        assert blocker.should_block('script', 'https://www.googletagmanager.com/gtm.js')
+        assert blocker.should_block('script', 'https://auction-site.com/chat-widget/app.js')
+        assert not blocker.should_block('script', 'https://auction-site.com/app.js')
+        assert not blocker.should_block('xhr', 'https://auction-site.com/api/lot/123')
+    
+    def test_route_pattern_skips_bid_requests(self):
+        """Тест маршрутизации только блокируемых URL, запросы ставки мимо обработчика"""
+        blocker = RequestBlocker({'preset': 'lean', 'url_patterns': []})
+        pattern = blocker.route_pattern()
+        
+        assert pattern.search('https://auction-site.com/img/logo.PNG?v=2')
+        assert pattern.search('https://auction-site.com/fonts/main.woff2')
+        assert pattern.search('https://mc.yandex.ru/watch/123')
+        assert not pattern.search('https://auction-site.com/api/lot/123/bid')
+        assert not pattern.search('https://auction-site.com/api/confirm?format=json')
+        assert not pattern.search('https://auction-site.com/app.js')
+    
+    def test_route_all_for_unknown_resource_type(self):
+        """Тест маршрутизации всех запросов, если тип не распознается по URL"""
+        blocker = RequestBlocker({'preset': '', 'resource_types': ['xhr'], 'url_patterns': []})
+        assert blocker.route_pattern() == '**/*'
+    
+    def test_disabled_without_rules(self):
+        """Тест отключенной блокировки без правил"""
+        assert not RequestBlocker({'preset': '', 'resource_types': [], 'url_patterns': []}).enabled
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,65 @@
+"""
+Тесты фоновой очереди скриншотов
+"""
+import asyncio
+
+import pytest
+
+from bot.screenshot_queue import ScreenshotQueue
+
+
+class FakePage:
+    """Страница, отдающая снимок в байтах"""
+
+    def __init__(self):
+        self.shots = []
+
+    def is_closed(self):
+        return False
+
+    async def screenshot(self, type, quality):
+        self.shots.append((type, quality))
+        return b'JPEG'
+
+
+def make_queue(tmp_path, size=10):
+    return ScreenshotQueue({
+        'screenshots': True,
+        'screenshots_path': str(tmp_path),
+        'screenshot_quality': 60,
+        'screenshot_queue_size': size
+    })
+
+
+@pytest.mark.asyncio
+async def test_capture_deferred_during_critical_section(tmp_path):
+    """Снимок откладывается до конца критической секции и пишется воркером"""
+    page = FakePage()
+    queue = make_queue(tmp_path)
+
+    with queue.critical_section():
+        queue.capture(page, 'bid_clicked')
+        await asyncio.sleep(0.01)
+        assert page.shots == []
+
+    await queue.close()
+    assert page.shots == [('jpeg', 60)]
+    files = list(tmp_path.iterdir())
+    assert len(files) == 1
+    assert files[0].name.startswith('bid_clicked_') and files[0].suffix == '.jpg'
+    assert files[0].read_bytes() == b'JPEG'
+
+
+@pytest.mark.asyncio
+async def test_overflow_drops_requests(tmp_path):
+    """Переполненная очередь не блокирует вызывающего"""
+    page = FakePage()
+    queue = make_queue(tmp_path, size=1)
+
+    with queue.critical_section():
+        queue.capture(page, 'first')
+        queue.capture(page, 'second')
+        assert queue.dropped == 1
+
+    await queue.close()
+    assert len(page.shots) == 1
@@ -0,0 +1,40 @@
+"""
+Тесты для разбора таймера и прогноза начала торгов
+"""
+import pytest
+from bot.timer_parser import CountdownPredictor, TimerReading, parse_timer
+
+
+class TestTimerParser:
+    """Тесты для parse_timer и CountdownPredictor"""
+    
+    def test_clock_formats(self):
+        """Тест форматов HH:MM:SS, MM:SS и MM:SS.cc"""
+        assert parse_timer("01:30:00") == TimerReading(5400000, 1000)
+        assert parse_timer("До начала: 05:07") == TimerReading(307000, 1000)
+        assert parse_timer("00:09.45") == TimerReading(9450, 10)
+        assert parse_timer("2 дня 03:00:00") == TimerReading(183600000, 1000)
+        assert parse_timer("--:--") is None
+        assert parse_timer("") is None
+    
+    def test_word_formats(self):
+        """Тест словесных форм и индикаторов завершения"""
+        assert parse_timer("1 ч 30 мин") == TimerReading(5400000, 60000)
+        assert parse_timer("5 мин 10 сек") == TimerReading(310000, 1000)
+        assert parse_timer("2h 15m 5s") == TimerReading(8105000, 1000)
+        assert parse_timer("Время вышло") == TimerReading(0, 0)
+    
+    def test_prediction_narrows_on_transition(self):
+        """Тест сужения прогноза при смене показаний таймера"""
+        predictor = CountdownPredictor()
+        predictor.add_reading(TimerReading(10000, 1000), at=100.0)
+        assert predictor.uncertainty == pytest.approx(0.5)
+        
+        # Показание сменилось через 0.8 сек: старт в [110.8, 110.8 + 1] ∩ [110, 111]
+        predictor.add_reading(TimerReading(9000, 1000), at=101.8)
+        assert predictor.predicted_start == pytest.approx(110.9)
+        assert predictor.uncertainty == pytest.approx(0.1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,136 @@
+"""
+Очередь уведомлений с фоновой отправкой
+"""
+import asyncio
+import logging
+import time
+
+from telegram.error import RetryAfter
+
+from utils.telegram_notifier import TelegramNotifier
+
+
+# Ограничение Telegram на длину одного сообщения
+MAX_MESSAGE_LENGTH = 4096
+
+
+def retry_after_seconds(error):
+    """Пауза из RetryAfter: число секунд или timedelta в новых версиях"""
+    retry_after = error.retry_after
+    if hasattr(retry_after, 'total_seconds'):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+def coalesce(messages):
+    """Склейка сообщений в тексты не длиннее MAX_MESSAGE_LENGTH"""
+    texts = []
+    current = ""
+    for message in messages:
+        message = message[:MAX_MESSAGE_LENGTH]
+        if current and len(current) + 2 + len(message) > MAX_MESSAGE_LENGTH:
+            texts.append(current)
+            current = ""
+        current = f"{current}\n\n{message}" if current else message
+    if current:
+        texts.append(current)
+    return texts
+
+
+def create_notification_outbox(config):
+    """Очередь уведомлений в Telegram по разделу конфигурации telegram"""
+    return NotificationOutbox(TelegramNotifier(config), config['outbox'])
+
+
+class NotificationOutbox:
+    """Неблокирующая отправка уведомлений
+
+    post() только ставит сообщение в очередь. Воркер собирает сообщения,
+    пришедшие за coalesce_window, в одно, выдерживает min_interval между
+    отправками (ограничение Telegram для одного чата), при RetryAfter ждет
+    указанное Telegram время, при прочих ошибках повторяет с нарастающей
+    паузой до max_retries раз.
+    """
+
+    def __init__(self, notifier, config):
+        self.notifier = notifier
+        self.config = config
+        self.queue = asyncio.Queue(maxsize=config['queue_size'])
+        self.task = None
+        self.closed = False
+        self.last_sent = 0.0
+        self.stats = {'sent': 0, 'failed': 0, 'dropped': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def post(self, message):
+        """Постановка сообщения в очередь без ожидания отправки"""
+        if self.closed:
+            self.logger.debug(f"Очередь уведомлений закрыта, сообщение не отправлено: {message}")
+            return
+        if self.task is None:
+            self.task = asyncio.ensure_future(self._worker())
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            self.logger.warning("Очередь уведомлений переполнена, сообщение пропущено")
+
+    async def _worker(self):
+        """Отправка накопленных сообщений с учетом ограничений Telegram"""
+        await self.notifier.start()
+        while True:
+            messages = [await self.queue.get()]
+            # Сообщения одной серии уходят одним текстом
+            await asyncio.sleep(self.config['coalesce_window'] / 1000)
+            while not self.queue.empty():
+                messages.append(self.queue.get_nowait())
+            try:
+                for text in coalesce(messages):
+                    await self._send(text)
+            finally:
+                for _ in messages:
+                    self.queue.task_done()
+
+    async def _send(self, text):
+        """Отправка с соблюдением интервала и повторами"""
+        attempts = self.config['max_retries'] + 1
+        for attempt in range(1, attempts + 1):
+            await asyncio.sleep(max(self.last_sent + self.config['min_interval'] / 1000 - time.monotonic(), 0))
+            try:
+                await self.notifier.send_message(text)
+                self.last_sent = time.monotonic()
+                self.stats['sent'] += 1
+                return True
+            except RetryAfter as e:
+                delay = retry_after_seconds(e)
+            except Exception:
+                delay = self.config['retry_delay'] / 1000 * 2 ** (attempt - 1)
+            self.last_sent = time.monotonic()
+            if attempt < attempts:
+                self.logger.warning(f"Уведомление не отправлено, повтор через {delay:.1f} сек")
+                await asyncio.sleep(delay)
+
+        self.stats['failed'] += 1
+        self.logger.error(f"Уведомление не отправлено после {attempts} попыток")
+        return False
+
+    async def close(self, timeout=10):
+        """Отправка оставшихся сообщений и остановка воркера"""
+        self.closed = True
+        if self.task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Не отправлено уведомлений: {self.queue.qsize()}")
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        await self.notifier.close()
+        self.logger.info(
+            f"Уведомления: отправлено {self.stats['sent']}, ошибок {self.stats['failed']}, "
+            f"пропущено {self.stats['dropped']}"
+        )
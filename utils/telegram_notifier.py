@@ -15,6 +15,17 @@ class TelegramNotifier:
         self.chat_id = config['chat_id']
         self.logger = logging.getLogger(__name__)
     
+    async def start(self):
+        """Открытие постоянного соединения с API Telegram"""
+        try:
+            await self.bot.initialize()
+        except Exception as e:
+            self.logger.warning(f"Не удалось подключиться к Telegram: {e}")
+    
+    async def close(self):
+        """Закрытие соединения с API Telegram"""
+        await self.bot.shutdown()
+    
     async def send_message(self, message):
         """Отправка сообщения в Telegram"""
         try: